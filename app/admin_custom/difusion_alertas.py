@@ -0,0 +1,122 @@
+"""
+Entrega de alertas 'enviar_a_todos' a cada usuario activo.
+
+Por cada lote de usuarios (recorridos por id, con consultas por rango en lugar de
+cargar la tabla completa) se insertan en bloque la fila de la bandeja
+(Alerta.destinatarios) y la de HistorialNotificacion, y se avanza el progreso,
+todo en una transacción: tras una caída se retoma desde el último lote confirmado.
+"""
+import logging
+import time
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from web.services import cache_dashboard
+
+from .models import Alerta, DifusionAlerta, HistorialNotificacion
+
+logger = logging.getLogger(__name__)
+
+LOTE_POR_DEFECTO = 1000
+
+
+def encolar(alerta):
+    """Registra la alerta para que el trabajador la difunda"""
+    difusion, _ = DifusionAlerta.objects.get_or_create(alerta=alerta)
+    return difusion
+
+
+def _ids_usuarios(desde, lote):
+    """Ids de usuarios activos mayores que `desde`, por páginas de `lote` (sin OFFSET)"""
+    consulta = User.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)
+    while True:
+        ids = list(consulta.filter(id__gt=desde)[:lote])
+        yield from ids
+        if len(ids) < lote:
+            return
+        desde = ids[-1]
+
+
+def _entregar_lote(difusion, ids):
+    """Inserta bandeja e historial del lote; False si otro trabajador ya lo entregó"""
+    alerta = difusion.alerta
+    with transaction.atomic():
+        # Avance condicional: solo un trabajador confirma el lote que empieza en este punto
+        avanzado = DifusionAlerta.objects.filter(
+            pk=difusion.pk, ultimo_usuario_id=difusion.ultimo_usuario_id
+        ).update(ultimo_usuario_id=ids[-1], enviados=difusion.enviados + len(ids), estado='en_curso')
+        if not avanzado:
+            return False
+
+        Alerta.destinatarios.through.objects.bulk_create(
+            [Alerta.destinatarios.through(alerta_id=alerta.pk, user_id=usuario_id) for usuario_id in ids],
+            ignore_conflicts=True,
+        )
+        HistorialNotificacion.objects.bulk_create([
+            HistorialNotificacion(
+                alerta=alerta,
+                usuario_destinatario_id=usuario_id,
+                zona=alerta.ubicacion or "General",
+                estado_entrega='enviado',
+                tipo_notificacion='sistema'
+            )
+            for usuario_id in ids
+        ])
+        transaction.on_commit(lambda: cache_dashboard.invalidar(cache_dashboard.AMBITO_ALERTAS))
+
+    difusion.ultimo_usuario_id = ids[-1]
+    difusion.enviados += len(ids)
+    difusion.estado = 'en_curso'
+    return True
+
+
+def difundir(difusion, lote=LOTE_POR_DEFECTO, al_avanzar=None):
+    """
+    Entrega la alerta a los usuarios que faltan. Retorna {'enviados', 'segundos',
+    'por_segundo'} de esta ejecución; al_avanzar(difusion) se llama tras cada lote.
+    """
+    if difusion.fecha_inicio is None:
+        difusion.fecha_inicio = timezone.now()
+        DifusionAlerta.objects.filter(pk=difusion.pk).update(fecha_inicio=difusion.fecha_inicio)
+
+    inicio = time.perf_counter()
+    enviados = 0
+    completada = False
+    ids = _ids_usuarios(difusion.ultimo_usuario_id, lote)
+    while True:
+        lote_ids = list(islice(ids, lote))
+        if not lote_ids:
+            completada = True
+            break
+        if not _entregar_lote(difusion, lote_ids):
+            logger.warning(f"Difusión {difusion.pk} avanzada por otro trabajador; se detiene esta ejecución")
+            break
+        enviados += len(lote_ids)
+        if al_avanzar:
+            al_avanzar(difusion)
+
+    if completada:
+        difusion.estado = 'completada'
+        difusion.fecha_fin = timezone.now()
+        DifusionAlerta.objects.filter(pk=difusion.pk, ultimo_usuario_id=difusion.ultimo_usuario_id).update(
+            estado=difusion.estado, fecha_fin=difusion.fecha_fin
+        )
+
+    segundos = time.perf_counter() - inicio
+    return {
+        'enviados': enviados,
+        'segundos': segundos,
+        'por_segundo': enviados / segundos if segundos > 0 else 0.0,
+    }
+
+
+def difundir_pendientes(lote=LOTE_POR_DEFECTO, al_avanzar=None):
+    """Difunde, de la más antigua a la más nueva, las alertas sin completar"""
+    resultados = []
+    pendientes = DifusionAlerta.objects.filter(estado__in=['pendiente', 'en_curso']).select_related('alerta')
+    for difusion in pendientes.order_by('fecha_creacion'):
+        resultados.append((difusion, difundir(difusion, lote, al_avanzar)))
+    return resultados
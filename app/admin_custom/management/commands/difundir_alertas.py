@@ -0,0 +1,65 @@
+# Archivo: app/admin_custom/management/commands/difundir_alertas.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.admin_custom.difusion_alertas import LOTE_POR_DEFECTO, difundir, difundir_pendientes
+from app.admin_custom.models import DifusionAlerta
+
+
+class Command(BaseCommand):
+    """
+    Trabajador que entrega las alertas "enviar a todos": escribe en bloque la
+    bandeja y el historial de cada usuario activo y guarda el avance por lote,
+    así que si se interrumpe continúa donde quedó.
+
+    Ejemplos de uso:
+    python manage.py difundir_alertas
+    python manage.py difundir_alertas --una-vez --lote 5000
+    python manage.py difundir_alertas --alerta 42
+    """
+
+    help = 'Difunde las alertas dirigidas a todos los usuarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Difunde las alertas pendientes y termina',
+        )
+        parser.add_argument('--alerta', type=int, help='Difunde solo esta alerta (id) y termina')
+        parser.add_argument('--lote', type=int, default=LOTE_POR_DEFECTO, help='Usuarios por transacción')
+        parser.add_argument(
+            '--espera',
+            type=float,
+            default=5.0,
+            help='Segundos entre revisiones cuando no hay alertas pendientes',
+        )
+
+    def handle(self, *args, **options):
+        if options['lote'] <= 0:
+            raise CommandError('--lote debe ser positivo')
+
+        if options['alerta']:
+            difusion = DifusionAlerta.objects.select_related('alerta').filter(alerta_id=options['alerta']).first()
+            if difusion is None:
+                raise CommandError(f"La alerta {options['alerta']} no tiene difusión registrada")
+            self._informar(difusion, difundir(difusion, options['lote'], self._progreso))
+            return
+
+        while True:
+            for difusion, resumen in difundir_pendientes(options['lote'], self._progreso):
+                self._informar(difusion, resumen)
+            if options['una_vez']:
+                break
+            time.sleep(options['espera'])
+
+    def _progreso(self, difusion):
+        self.stdout.write(f"  {difusion.alerta.titulo}: {difusion.enviados} enviados (hasta usuario {difusion.ultimo_usuario_id})")
+
+    def _informar(self, difusion, resumen):
+        self.stdout.write(self.style.SUCCESS(
+            f"{difusion.alerta.titulo} [{difusion.estado}]: {resumen['enviados']} destinatarios en "
+            f"{resumen['segundos']:.2f} s ({resumen['por_segundo']:.0f}/s)"
+        ))
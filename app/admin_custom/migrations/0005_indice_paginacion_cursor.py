@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_custom', '0004_alter_alerta_destinatarios_alter_alerta_enviado_por'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historialnotificacion',
+            index=models.Index(fields=['fecha_envio_real', 'id'], name='admin_custo_fecha_e_6c8679_idx'),
+        ),
+    ]
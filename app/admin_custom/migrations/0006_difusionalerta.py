@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_custom', '0005_indice_paginacion_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DifusionAlerta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('completada', 'Completada')], default='pendiente', max_length=20)),
+                ('ultimo_usuario_id', models.BigIntegerField(default=0)),
+                ('enviados', models.PositiveIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('alerta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='difusion', to='admin_custom.alerta')),
+            ],
+            options={
+                'verbose_name': 'Difusión de alerta',
+                'verbose_name_plural': 'Difusiones de alertas',
+                'indexes': [models.Index(fields=['estado', 'fecha_creacion'], name='admin_custo_estado_375dfc_idx')],
+            },
+        ),
+    ]
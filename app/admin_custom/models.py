@@ -51,7 +51,38 @@ class HistorialNotificacion(models.Model):
         verbose_name = "Historial de Notificación"
         verbose_name_plural = "Historiales de Notificaciones"
         ordering = ['-fecha_envio_real']
+        # Paginación por cursor del historial
+        indexes = [models.Index(fields=['fecha_envio_real', 'id'])]
     
     def __str__(self):
         destinatario = self.usuario_destinatario.username if self.usuario_destinatario else "Todos"
-        return f"{self.alerta.titulo} → {destinatario} ({self.fecha_envio_real.strftime('%d/%m/%Y %H:%M')})"
\ No newline at end of file
+        return f"{self.alerta.titulo} → {destinatario} ({self.fecha_envio_real.strftime('%d/%m/%Y %H:%M')})"
+
+class DifusionAlerta(models.Model):
+    """
+    Progreso de la entrega de una alerta 'enviar_a_todos' (manage.py difundir_alertas).
+    Los usuarios se recorren por id ascendente; ultimo_usuario_id marca hasta dónde
+    llegó el último lote confirmado, así un trabajador caído se retoma sin duplicar.
+    """
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('en_curso', 'En curso'),
+        ('completada', 'Completada'),
+    ]
+
+    alerta = models.OneToOneField(Alerta, on_delete=models.CASCADE, related_name='difusion')
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    ultimo_usuario_id = models.BigIntegerField(default=0)
+    enviados = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Difusión de alerta"
+        verbose_name_plural = "Difusiones de alertas"
+        indexes = [models.Index(fields=['estado', 'fecha_creacion'])]
+
+    def __str__(self):
+        return f"{self.alerta.titulo}: {self.enviados} enviados ({self.estado})"
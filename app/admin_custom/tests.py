@@ -1,3 +1,225 @@
 from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from app.reporte.models import ReporteColaborativo
+from app.repositorio.reporte.reporteColaborativoRepositoryImpl import ReporteColaborativoRepositoryImpl
+
+
+class AdminReportesFiltrosTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123', email='admin@test.com')
+        datos = [
+            ('accidente', 'pendiente', 3, 'Av. Ejército', 'Yanahuara'),
+            ('accidente', 'probado', 1, 'Calle Mercaderes', 'Cercado'),
+            ('bache', 'pendiente', 3, 'Av. Ejército', 'Cayma'),
+            ('bache', 'rechazado', 2, 'Av. Dolores', 'José Luis Bustamante'),
+        ]
+        for i, (tipo, estado, nivel, via, distrito) in enumerate(datos):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte {i}',
+                descripcion='Descripción del incidente de prueba',
+                tipo_incidente=tipo,
+                estado_reporte=estado,
+                nivel_peligro=nivel,
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                nombre_via=via,
+                distrito=distrito,
+                usuario_reportador=self.admin,
+            )
+        self.repositorio = ReporteColaborativoRepositoryImpl()
+
+    def test_filtros_se_componen_en_una_consulta(self):
+        reportes = self.repositorio.filtrar(estado='PENDIENTE', ubicacion='ejército', nivel_peligro='3')
+        with self.assertNumQueries(1):
+            titulos = sorted(r.titulo for r in reportes if r.usuario_reportador.username)
+        self.assertEqual(titulos, ['Reporte 0', 'Reporte 2'])
+
+        # Se puede seguir filtrando sobre el resultado
+        solo_baches = self.repositorio.filtrar(tipo_incidente='bache', reportes=reportes)
+        self.assertEqual([r.titulo for r in solo_baches], ['Reporte 2'])
+
+        # Valores inválidos se ignoran en lugar de fallar
+        self.assertEqual(self.repositorio.filtrar(fecha='no-es-fecha', nivel_peligro='x').count(), 4)
+
+    def test_vista_pagina_los_resultados(self):
+        self.client.force_login(self.admin)
+        with mock.patch('app.admin_custom.views.REPORTES_POR_PAGINA', 1):
+            respuesta = self.client.get(reverse('admin_reportes'), {'tipo_incidente': 'accidente', 'page': 2})
+
+        pagina = respuesta.context['reportes']
+        self.assertEqual(pagina.paginator.count, 2)
+        self.assertEqual(pagina.number, 2)
+        self.assertEqual(len(pagina.object_list), 1)
+        self.assertContains(respuesta, '?page=1&tipo_incidente=accidente')
+
+
+from app.admin_custom.models import Alerta, HistorialNotificacion
+
+
+class HistorialNotificacionesCursorTests(TestCase):
+    def test_historial_pagina_por_cursor(self):
+        admin = User.objects.create_superuser(username='admin', password='adminpass123', email='admin@test.com')
+        alerta = Alerta.objects.create(titulo='Corte de vía', mensaje='Av. Ejército cerrada', enviado_por=admin)
+        HistorialNotificacion.objects.bulk_create(
+            HistorialNotificacion(alerta=alerta, usuario_destinatario=admin, zona='Yanahuara') for _ in range(25)
+        )
+        self.client.force_login(admin)
+
+        primera = self.client.get(reverse('historial_notificaciones'), {'zona': 'Yanahuara'})
+        pagina = primera.context['historiales']
+        self.assertEqual(len(pagina), 20)
+        self.assertFalse(pagina.has_previous())
+
+        segunda = self.client.get(reverse('historial_notificaciones'), {'cursor': pagina.siguiente, 'zona': 'Yanahuara'})
+        resto = segunda.context['historiales']
+        self.assertEqual(len(resto), 5)
+        self.assertFalse(resto.has_next())
+        self.assertFalse({h.id for h in pagina} & {h.id for h in resto})
+
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from app.presentation.controladores.alertaController import emitir_alerta
+
+
+class EmitirAlertaTests(TestCase):
+    def test_historial_por_lotes_en_una_transaccion(self):
+        admin = User.objects.create_superuser(username='admin', password='adminpass123', email='admin@test.com')
+        User.objects.bulk_create(User(username=f'conductor{i}') for i in range(300))
+        destinatarios = User.objects.filter(username__startswith='conductor')
+
+        with mock.patch('app.repositorio.alerta.alertaRepositoryImpl.HISTORIAL_LOTE', 100):
+            with CaptureQueriesContext(connection) as consultas:
+                alerta = emitir_alerta('Corte de vía', 'Av. Ejército cerrada', admin, destinatarios, 'Yanahuara')
+
+        self.assertIsInstance(alerta, Alerta)
+        self.assertEqual(alerta.destinatarios.count(), 300)
+        historial = HistorialNotificacion.objects.filter(alerta=alerta)
+        self.assertEqual(historial.count(), 300)
+        self.assertEqual(set(historial.values_list('zona', flat=True)), {'Yanahuara'})
+        # La cantidad de consultas no crece con los destinatarios
+        inserts_historial = [q for q in consultas.captured_queries if 'INSERT INTO "admin_custom_historialnotificacion"' in q['sql']]
+        self.assertEqual(len(inserts_historial), 3)
+        self.assertLess(len(consultas), 20)
+
+
+from django.core.management import call_command
+from io import StringIO
+from app.admin_custom import difusion_alertas
+from app.admin_custom.models import DifusionAlerta
+from app.repositorio.alerta.alertaRepositoryImpl import AlertaRepositoryImpl
+
+
+class DifusionAlertasTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123', email='admin@test.com')
+        User.objects.bulk_create(User(username=f'conductor{i}') for i in range(249))
+        User.objects.bulk_create([User(username='inactivo', is_active=False)])
+        self.alerta = emitir_alerta('Sismo', 'Evacuar edificios', self.admin, [], 'Arequipa', enviar_a_todos=True)
+
+    def test_difusion_se_retoma_tras_una_caida(self):
+        difusion = DifusionAlerta.objects.get(alerta=self.alerta)
+        self.assertEqual(difusion.estado, 'pendiente')
+        self.assertFalse(HistorialNotificacion.objects.filter(alerta=self.alerta).exists())
+
+        class Caida(Exception):
+            pass
+
+        def caer(difusion):
+            if difusion.enviados >= 200:
+                raise Caida()
+
+        with self.assertRaises(Caida):
+            difusion_alertas.difundir(difusion, lote=100, al_avanzar=caer)
+        difusion.refresh_from_db()
+        self.assertEqual((difusion.estado, difusion.enviados), ('en_curso', 200))
+
+        salida = StringIO()
+        call_command('difundir_alertas', '--una-vez', '--lote', '100', stdout=salida)
+        self.assertIn('50 destinatarios', salida.getvalue())
+
+        difusion.refresh_from_db()
+        self.assertEqual((difusion.estado, difusion.enviados), ('completada', 250))
+        historial = HistorialNotificacion.objects.filter(alerta=self.alerta)
+        self.assertEqual(historial.count(), 250)
+        self.assertEqual(historial.values('usuario_destinatario').distinct().count(), 250)
+        self.assertEqual(self.alerta.destinatarios.count(), 250)
+        conductor = User.objects.get(username='conductor7')
+        self.assertIn(self.alerta, AlertaRepositoryImpl().obtener_por_usuario(conductor.id))
+        self.assertFalse(self.alerta.destinatarios.filter(username='inactivo').exists())
+
+    def test_lote_ya_entregado_no_se_duplica(self):
+        difusion = DifusionAlerta.objects.get(alerta=self.alerta)
+        # Otro trabajador tomó la misma difusión antes de que este avanzara
+        atrasada = DifusionAlerta.objects.get(pk=difusion.pk)
+        difusion_alertas.difundir(difusion, lote=100)
+        with self.assertLogs('app.admin_custom.difusion_alertas', 'WARNING'):
+            resumen = difusion_alertas.difundir(atrasada, lote=100)
+        self.assertEqual(resumen['enviados'], 0)
+        self.assertEqual(HistorialNotificacion.objects.filter(alerta=self.alerta).count(), 250)
+
+
+import csv as csv_modulo
+
+
+class ExportarHistorialCsvTests(TestCase):
+    def test_exportacion_en_streaming_sin_n_mas_1(self):
+        admin = User.objects.create_superuser(username='admin', password='adminpass123', email='admin@test.com')
+        conductor = User.objects.create_user(username='conductor', password='testpass123')
+        for i in range(3):
+            alerta = Alerta.objects.create(titulo=f'Alerta {i}', mensaje='Desvío, usar "Av. Dolores"', enviado_por=admin)
+            HistorialNotificacion.objects.create(alerta=alerta, usuario_destinatario=conductor, zona='Cayma')
+            HistorialNotificacion.objects.create(alerta=alerta, usuario_destinatario=None, zona='Cercado')
+        self.client.force_login(admin)
+
+        respuesta = self.client.get(reverse('exportar_historial_csv'), {'zona': 'cayma'})
+        self.assertTrue(respuesta.streaming)
+        # Se consume fuera de la vista: una sola consulta para todas las filas
+        with self.assertNumQueries(1):
+            contenido = b''.join(respuesta.streaming_content).decode('utf-8')
+
+        filas = list(csv_modulo.reader(contenido.lstrip('﻿').splitlines()))
+        self.assertEqual(filas[0][2], 'Título de la Alerta')
+        self.assertEqual(len(filas), 4)
+        self.assertEqual(
+            filas[1][2:],
+            ['Alerta 2', 'Desvío, usar "Av. Dolores"', 'Cayma', 'conductor', 'Enviado', 'Sistema', 'Media', 'admin'],
+        )
+
+
+class ExportarReportesTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='adminpass123', email='admin@test.com')
+        for tipo in ('bache', 'accidente'):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte {tipo}',
+                descripcion='Descripción del incidente de prueba',
+                tipo_incidente=tipo,
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                usuario_reportador=self.admin,
+            )
+        self.client.force_login(self.admin)
+
+    def test_csv_en_streaming_con_filtros(self):
+        respuesta = self.client.get(reverse('exportar_reportes'), {'tipo_incidente': 'bache'})
+        self.assertTrue(respuesta.streaming)
+        self.assertIn('.csv"', respuesta['Content-Disposition'])
+        filas = list(csv_modulo.reader(b''.join(respuesta.streaming_content).decode('utf-8').splitlines()))
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(filas[1][3], 'bache')
+
+    def test_npz_y_formato_invalido(self):
+        import io
+        import numpy as np
+
+        respuesta = self.client.get(reverse('exportar_reportes'), {'formato': 'npz'})
+        self.assertEqual(respuesta.status_code, 200)
+        with np.load(io.BytesIO(b''.join(respuesta.streaming_content))) as datos:
+            self.assertEqual(len(datos['id']), 2)
+
+        self.assertEqual(self.client.get(reverse('exportar_reportes'), {'formato': 'xlsx'}).status_code, 400)
@@ -6,6 +6,7 @@ urlpatterns = [
     path("loginadmin/", views.custom_login, name="custom_login"),
     path("logout_admin/", views.logout_admin, name="logout_admin"),
     path("panel/reportes/", views.admin_reportes, name="admin_reportes"),
+    path("panel/reportes/exportar/", views.exportar_reportes, name="exportar_reportes"),
     path("panel/editar/\u003cint:id\u003e/", views.editar_reporte, name="editar_reporte_admin"),
     path("panel/cambiar-estado/\u003cint:id\u003e/", views.cambiar_estado_reporte, name="cambiar_estado_reporte"),
     path("usuarios/", views.gestion_usuarios, name="gestion_usuarios"),
@@ -19,5 +20,7 @@ urlpatterns = [
     
     path('historial-notificaciones/', views.historial_notificaciones, name='historial_notificaciones'),
     path('historial-notificaciones/exportar/', views.exportar_historial_csv, name='exportar_historial_csv'),
+
+    path('panel/geocodificacion/estadisticas/', views.estadisticas_cache_geocodificacion, name='estadisticas_cache_geocodificacion'),
 ]
 
@@ -21,10 +21,13 @@ from app.presentation.controladores.alertaController import obtener_alertas_usua
 from .models import HistorialNotificacion
 from django.db.models import Q, Count
 from django.core.paginator import Paginator
+from web.services.paginacion_cursor import PaginadorCursor
 
 # Configuración de logging
 logger = logging.getLogger(__name__)
 
+REPORTES_POR_PAGINA = 50
+
 # Create your views here.
 # admin
 
@@ -151,29 +154,30 @@ def admin_reportes(request):
         nivel_peligro = sanitizar_input(request.GET.get("nivel_peligro"))
 
     try:
-        reportes = controlador.obtener_todos()
-        
-        # Filtrado mejorado
-        if estado:
-            reportes = [r for r in reportes if r.estado_reporte.lower() == estado.lower()]
-        if fecha:
-            # Filtrar por fecha (formato YYYY-MM-DD)
-            reportes = [r for r in reportes if str(r.fecha_creacion.date()) == fecha]
-        if filtro_ubicacion:
-            reportes = [r for r in reportes if filtro_ubicacion.lower() in (r.nombre_via or '').lower() or filtro_ubicacion.lower() in (r.distrito or '').lower()]
-        if tipo_incidente:
-            reportes = [r for r in reportes if r.tipo_incidente.lower() == tipo_incidente.lower()]
-        if nivel_peligro:
-            reportes = [r for r in reportes if str(r.nivel_peligro) == nivel_peligro]
+        filtros = {
+            "estado": estado,
+            "fecha": fecha,
+            "ubicacion": filtro_ubicacion,
+            "tipo_incidente": tipo_incidente,
+            "nivel_peligro": nivel_peligro,
+        }
+        # Filtros aplicados como consultas a la BD; solo se carga la página pedida
+        reportes = controlador.listar_reportes(filtros)
+
+        paginator = Paginator(reportes, REPORTES_POR_PAGINA)
+        # Un envío del formulario (POST) vuelve a la primera página
+        page_obj = paginator.get_page(request.GET.get('page') if request.method == 'GET' else 1)
 
         context = {
             "titulo": "Control de Reportes",
-            "reportes": reportes,
+            "reportes": page_obj,
+            "paginas": paginator.get_elided_page_range(page_obj.number),
             "estado_actual": estado,
             "fecha_actual": fecha,
             "ubicacion_actual": filtro_ubicacion,
             "tipo_incidente_actual": tipo_incidente,
-            "nivel_peligro_actual": nivel_peligro
+            "nivel_peligro_actual": nivel_peligro,
+            "filtros": filtros,
         }
         
         return render(request, 'partials/admin_reportes.html', context)
@@ -353,9 +357,13 @@ def crear_alerta(request):
             mensaje = form.cleaned_data['mensaje']
             ubicacion = form.cleaned_data['ubicacion']
             destinatarios = User.objects.filter(id__in=request.POST.getlist("destinatarios"))
+            enviar_a_todos = request.POST.get('enviar_a_todos') == 'on'
             from app.presentation.controladores.alertaController import emitir_alerta
-            emitir_alerta(titulo, mensaje, request.user, destinatarios, ubicacion)
-            messages.success(request, 'Alerta enviada con éxito.')
+            emitir_alerta(titulo, mensaje, request.user, destinatarios, ubicacion, enviar_a_todos)
+            if enviar_a_todos:
+                messages.success(request, 'Alerta en cola: se está entregando a todos los usuarios.')
+            else:
+                messages.success(request, 'Alerta enviada con éxito.')
             return redirect('crear_alerta')
     else:
         form = AlertaForm()
@@ -397,20 +405,14 @@ def historial_notificaciones(request):
     
     
 # --- A..
-@login_required(login_url='/loginadmin/')
-@user_passes_test(is_superuser, login_url='/loginadmin/')
-def historial_notificaciones(request):
-    # Obtener todos los historiales
-    historiales = HistorialNotificacion.objects.select_related('alerta', 'usuario_destinatario').order_by('-fecha_envio_real')
-    
-    # Filtros
-    zona_filtro = request.GET.get('zona', '')
-    estado_filtro = request.GET.get('estado', '')
-    fecha_desde = request.GET.get('fecha_desde', '')
-    fecha_hasta = request.GET.get('fecha_hasta', '')
-    busqueda = request.GET.get('busqueda', '')
-    
-    # Aplicar filtros
+def _filtrar_historial(historiales, parametros):
+    """Filtros del historial (zona, estado, rango de fechas, búsqueda) compartidos con la exportación"""
+    zona_filtro = parametros.get('zona', '')
+    estado_filtro = parametros.get('estado', '')
+    fecha_desde = parametros.get('fecha_desde', '')
+    fecha_hasta = parametros.get('fecha_hasta', '')
+    busqueda = parametros.get('busqueda', '')
+
     if zona_filtro:
         historiales = historiales.filter(zona__icontains=zona_filtro)
     
@@ -433,6 +435,22 @@ def historial_notificaciones(request):
             Q(alerta__mensaje__icontains=busqueda) |
             Q(zona__icontains=busqueda)
         )
+    return historiales
+
+
+@login_required(login_url='/loginadmin/')
+@user_passes_test(is_superuser, login_url='/loginadmin/')
+def historial_notificaciones(request):
+    # Obtener todos los historiales
+    historiales = HistorialNotificacion.objects.select_related('alerta', 'usuario_destinatario').order_by('-fecha_envio_real')
+    
+    # Filtros
+    zona_filtro = request.GET.get('zona', '')
+    estado_filtro = request.GET.get('estado', '')
+    fecha_desde = request.GET.get('fecha_desde', '')
+    fecha_hasta = request.GET.get('fecha_hasta', '')
+    busqueda = request.GET.get('busqueda', '')
+    historiales = _filtrar_historial(historiales, request.GET)
     
     
     # Estadísticas básicas
@@ -440,10 +458,8 @@ def historial_notificaciones(request):
     envios_exitosos = historiales.filter(estado_entrega='enviado').count()
     envios_fallidos = historiales.filter(estado_entrega='fallido').count()
     
-    # Paginación
-    paginator = Paginator(historiales, 20)  # 20 registros por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginación por cursor sobre (fecha_envio_real, id): sin OFFSET en páginas profundas
+    page_obj = PaginadorCursor(historiales, 'fecha_envio_real', 20).obtener_pagina(request.GET.get('cursor'))
     
     # Obtener zonas únicas para el filtro
     zonas_disponibles = HistorialNotificacion.objects.values_list('zona', flat=True).distinct().order_by('zona')
@@ -463,64 +479,46 @@ def historial_notificaciones(request):
         }
     }
 
-    for alerta in Alerta.objects.all():
-        print(f"Título: {alerta.titulo} | Mensaje: {alerta.mensaje}")
-        
-    print(historiales.query)
-
     return render(request, 'panel/historial_notificaciones.html', context)
 
 
 import csv
-from django.http import HttpResponse
+import tempfile
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from datetime import datetime
 
-@login_required(login_url='/loginadmin/')
-@user_passes_test(is_superuser, login_url='/loginadmin/')
-def exportar_historial_csv(request):
-    # Obtener los mismos datos que en la vista del historial
-    historiales = HistorialNotificacion.objects.select_related('alerta', 'usuario_destinatario').order_by('-fecha_envio_real')
-    
-    # Aplicar los mismos filtros que en la vista normal
-    zona_filtro = request.GET.get('zona', '')
-    estado_filtro = request.GET.get('estado', '')
-    fecha_desde = request.GET.get('fecha_desde', '')
-    fecha_hasta = request.GET.get('fecha_hasta', '')
-    busqueda = request.GET.get('busqueda', '')
-    
-    # Aplicar filtros
-    if zona_filtro:
-        historiales = historiales.filter(zona__icontains=zona_filtro)
-    
-    if estado_filtro:
-        historiales = historiales.filter(estado_entrega=estado_filtro)
-    
-    if fecha_desde:
-        fecha_desde_obj = datetime.strptime(fecha_desde, '%Y-%m-%d')
-        historiales = historiales.filter(fecha_envio_real__date__gte=fecha_desde_obj)
-    
-    if fecha_hasta:
-        fecha_hasta_obj = datetime.strptime(fecha_hasta, '%Y-%m-%d')
-        historiales = historiales.filter(fecha_envio_real__date__lte=fecha_hasta_obj)
-    
-    if busqueda:
-        historiales = historiales.filter(
-            Q(alerta__titulo__icontains=busqueda) | 
-            Q(alerta__mensaje__icontains=busqueda) |
-            Q(zona__icontains=busqueda)
-        )
-    
-    # Crear la respuesta HTTP para CSV
-    response = HttpResponse(content_type='text/csv')
-    fecha_actual = datetime.now().strftime('%Y%m%d_%H%M%S')
-    response['Content-Disposition'] = f'attachment; filename="historial_notificaciones_{fecha_actual}.csv"'
-    
-    # Configurar el writer de CSV con codificación UTF-8
-    response.write('\ufeff')  # BOM para UTF-8 (para Excel)
-    writer = csv.writer(response)
-    
-    # Escribir encabezados
-    writer.writerow([
+# Filas que trae cada viaje a la BD al exportar
+EXPORTACION_CHUNK = 2000
+
+# Columnas del CSV: solo estas se leen de la BD (sin instanciar modelos)
+COLUMNAS_EXPORTACION = (
+    'fecha_envio_real',
+    'alerta__titulo',
+    'alerta__mensaje',
+    'zona',
+    'usuario_destinatario__username',
+    'estado_entrega',
+    'tipo_notificacion',
+    'alerta__prioridad',
+    'alerta__enviado_por__username',
+)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: retorna cada línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def _filas_historial_csv(historiales):
+    writer = csv.writer(_Eco())
+    estados = dict(HistorialNotificacion.ESTADOS)
+    tipos = dict(HistorialNotificacion.TIPOS)
+    prioridades = dict(Alerta.PRIORIDADES)
+
+    yield '\ufeff'  # BOM para UTF-8 (para Excel)
+    yield writer.writerow([
         'Fecha de Envío',
         'Hora de Envío', 
         'Título de la Alerta',
@@ -532,22 +530,84 @@ def exportar_historial_csv(request):
         'Prioridad',
         'Creada por'
     ])
-    
-    # Escribir datos
-    for historial in historiales:
-        destinatario = historial.usuario_destinatario.username if historial.usuario_destinatario else "Todos los usuarios"
-        
-        writer.writerow([
-            historial.fecha_envio_real.strftime('%d/%m/%Y'),
-            historial.fecha_envio_real.strftime('%H:%M:%S'),
-            historial.alerta.titulo,
-            historial.alerta.mensaje,
-            historial.zona,
-            destinatario,
-            historial.get_estado_entrega_display(),
-            historial.get_tipo_notificacion_display(),
-            historial.alerta.get_prioridad_display(),
-            historial.alerta.enviado_por.username
+
+    filas = historiales.values_list(*COLUMNAS_EXPORTACION).iterator(chunk_size=EXPORTACION_CHUNK)
+    for fecha, titulo, mensaje, zona, destinatario, estado, tipo, prioridad, creador in filas:
+        yield writer.writerow([
+            fecha.strftime('%d/%m/%Y'),
+            fecha.strftime('%H:%M:%S'),
+            titulo,
+            mensaje,
+            zona,
+            destinatario or "Todos los usuarios",
+            estados.get(estado, estado),
+            tipos.get(tipo, tipo),
+            prioridades.get(prioridad, prioridad),
+            creador
         ])
-    
-    return response
\ No newline at end of file
+
+
+@login_required(login_url='/loginadmin/')
+@user_passes_test(is_superuser, login_url='/loginadmin/')
+def exportar_historial_csv(request):
+    """
+    CSV del historial con los mismos filtros que la vista. Se genera mientras se
+    envía: una consulta con solo las columnas necesarias, leída por bloques de
+    EXPORTACION_CHUNK filas, así la memoria no crece con el tamaño del historial.
+    """
+    historiales = _filtrar_historial(
+        HistorialNotificacion.objects.order_by('-fecha_envio_real', '-id'), request.GET
+    )
+
+    response = StreamingHttpResponse(_filas_historial_csv(historiales), content_type='text/csv')
+    fecha_actual = datetime.now().strftime('%Y%m%d_%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="historial_notificaciones_{fecha_actual}.csv"'
+    return response
+
+
+@admin_required
+def estadisticas_cache_geocodificacion(request):
+    """Aciertos/fallos de la cache de geocodificación (contadores compartidos en la BD)"""
+    from app.reporte.cache_geocodificacion import estadisticas
+    return JsonResponse(estadisticas())
+
+
+@admin_required
+def exportar_reportes(request):
+    """
+    Descarga de reportes para análisis con los mismos filtros que el panel
+    (?estado=&fecha=&ubicacion=&tipo_incidente=&nivel_peligro=) en
+    ?formato=csv|ndjson|npz|arrow. CSV, NDJSON y Arrow se envían mientras se
+    leen de la BD; el .npz se arma en un archivo temporal (no en memoria).
+    """
+    from app.reporte import exportacion
+
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exportacion.FORMATOS:
+        return JsonResponse({'error': f'Formato no soportado: {formato}'}, status=400)
+    if formato == 'arrow' and not exportacion.arrow_disponible():
+        return JsonResponse({'error': 'El formato arrow no está disponible en el servidor'}, status=400)
+
+    filtros = {
+        campo: sanitizar_input(request.GET.get(campo))
+        for campo in ('estado', 'fecha', 'ubicacion', 'tipo_incidente', 'nivel_peligro')
+    }
+    reportes = ReporteColaborativoController().listar_reportes(filtros)
+    content_type, extension = exportacion.FORMATOS[formato]
+
+    if formato == 'npz':
+        archivo = tempfile.TemporaryFile()
+        exportacion.exportar_npz(reportes, archivo)
+        archivo.seek(0)
+        response = FileResponse(archivo, content_type=content_type)
+    else:
+        generador = {
+            'csv': exportacion.exportar_csv,
+            'ndjson': exportacion.exportar_ndjson,
+            'arrow': exportacion.exportar_arrow,
+        }[formato]
+        response = StreamingHttpResponse(generador(reportes), content_type=content_type)
+
+    fecha_actual = datetime.now().strftime('%Y%m%d_%H%M%S')
+    response['Content-Disposition'] = f'attachment; filename="reportes_{fecha_actual}.{extension}"'
+    return response
@@ -1,7 +1,8 @@
 class Alerta:
-    def __init__(self, titulo, mensaje, enviado_por, destinatarios, ubicacion=None):
+    def __init__(self, titulo, mensaje, enviado_por, destinatarios, ubicacion=None, enviar_a_todos=False):
         self.titulo = titulo
         self.mensaje = mensaje
         self.ubicacion = ubicacion
         self.enviado_por = enviado_por
         self.destinatarios = destinatarios  # Lista de usuarios
+        self.enviar_a_todos = enviar_a_todos  # Se entrega a todos con manage.py difundir_alertas
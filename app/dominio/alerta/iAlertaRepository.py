@@ -3,6 +3,16 @@ from abc import ABC, abstractmethod
 class IAlertaRepository(ABC):
     @abstractmethod
     def guardar(self, alerta):
+        """Persiste la alerta con sus destinatarios y la retorna"""
+        pass
+
+    @abstractmethod
+    def registrar_historial(self, alerta, destinatarios, zona):
+        pass
+
+    @abstractmethod
+    def encolar_difusion(self, alerta):
+        """Deja la alerta lista para entregarse a todos los usuarios"""
         pass
 
     @abstractmethod
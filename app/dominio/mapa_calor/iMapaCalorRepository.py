@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+
+class IMapaCalorRepository(ABC):
+    @abstractmethod
+    def guardar_zonas(self, zonas, version_datos):
+        pass
+
+    @abstractmethod
+    def listar_zonas(self, nivel_minimo=None, limite=None):
+        pass
+
+    @abstractmethod
+    def obtener_zona(self, zona_id):
+        pass
+
+    @abstractmethod
+    def estado_calculo(self):
+        pass
+
+    @abstractmethod
+    def nombres_por_clave(self):
+        pass
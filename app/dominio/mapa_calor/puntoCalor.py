@@ -1,6 +1,10 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+# Intensidad normalizada (0 a 1) desde la que un punto se considera caliente
+UMBRAL_PUNTO_CALIENTE = 0.65
+
+
 class PuntoCalor:
     def __init__(self):
         self.ubicacion = None
@@ -9,7 +13,15 @@ class PuntoCalor:
         self.fecha_calculo = None
 
     def es_punto_caliente(self, ):
-        pass
+        return (self.intensidad or 0) >= UMBRAL_PUNTO_CALIENTE
 
     def obtener_color_intensidad(self, ):
-        pass
+        """Mismo gradiente que las teselas del mapa de calor: verde, amarillo, naranja, rojo"""
+        intensidad = self.intensidad or 0
+        if intensidad < 0.35:
+            return '#28a745'
+        if intensidad < 0.65:
+            return '#ffc107'
+        if intensidad < 0.85:
+            return '#fd7e14'
+        return '#dc3545'
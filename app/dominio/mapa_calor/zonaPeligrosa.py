@@ -1,35 +1,86 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+# Una zona con este número de reportes sube un nivel de peligro sobre su promedio
+UMBRAL_REPORTES_ZONA_CALIENTE = 10
+# Variación mínima (proporcional y absoluta) para considerar que la zona cambia de tendencia
+VARIACION_TENDENCIA = 0.25
+DIFERENCIA_MINIMA_TENDENCIA = 2
+
 
 class ZonaPeligrosa:
     def __init__(self):
-        self.zona_id = None
-        self.nombre_zona = None
-        self.ubicacion_centro = None
-        self.radio_cobertura = None
-        self.nivel_peligro_actual = None
-        self.fecha_actualizacion = None
-        self.cantidad_reportes = None
-        self.reportes_asociados = None
-        self.tendencia = None
+        self.zona_id: Optional[int] = None
+        self.clave: Optional[str] = None
+        self.nombre_zona: Optional[str] = None
+        self.ubicacion_centro: Optional[Tuple[float, float]] = None
+        self.radio_cobertura: Optional[float] = None
+        self.nivel_peligro_actual: Optional[int] = None
+        self.fecha_actualizacion: Optional[datetime] = None
+        self.cantidad_reportes: int = 0
+        self.reportes_asociados: List[int] = []
+        self.tendencia: Optional[str] = None
+        # Suma de los niveles de peligro de los reportes asociados
+        self.intensidad: float = 0.0
+        # Reportes creados en la ventana de tendencia actual y en la anterior
+        self.reportes_periodo_actual: int = 0
+        self.reportes_periodo_anterior: int = 0
 
     def actualizar_nivel_peligro(self, ):
-        pass
+        self.nivel_peligro_actual = self.calcular_nivel_peligro_por_reportes()
+        self.fecha_actualizacion = datetime.now()
 
-    def agregar_reporte(self, reporte_id):
-        pass
+    def agregar_reporte(self, reporte_id, nivel_peligro=1):
+        if reporte_id in self.reportes_asociados:
+            return
+        self.reportes_asociados.append(reporte_id)
+        self.cantidad_reportes += 1
+        self.intensidad += nivel_peligro
 
     def calcular_nivel_peligro_por_reportes(self, ):
-        pass
+        """Promedio de los niveles (1 a 4), un nivel más si la zona concentra muchos reportes"""
+        if not self.cantidad_reportes:
+            return 1
+        nivel = round(self.intensidad / self.cantidad_reportes)
+        if self.cantidad_reportes >= UMBRAL_REPORTES_ZONA_CALIENTE:
+            nivel += 1
+        return min(max(nivel, 1), 4)
 
     def obtener_estadisticas_zona(self, ):
-        pass
+        return {
+            'zona_id': self.zona_id,
+            'nombre_zona': self.nombre_zona,
+            'centro': self.ubicacion_centro,
+            'radio_km': self.radio_cobertura,
+            'nivel_peligro': self.nivel_peligro_actual,
+            'cantidad_reportes': self.cantidad_reportes,
+            'tendencia': self.tendencia,
+            'reportes_periodo_actual': self.reportes_periodo_actual,
+            'reportes_periodo_anterior': self.reportes_periodo_anterior,
+            'fecha_actualizacion': self.fecha_actualizacion,
+        }
 
     def es_zona_caliente(self, ):
-        pass
+        return (self.nivel_peligro_actual or 0) >= 3 or self.cantidad_reportes >= UMBRAL_REPORTES_ZONA_CALIENTE
 
     def obtener_reportes_recientes(self, dias):
-        pass
+        from django.utils import timezone
+        from app.reporte.models import ReporteColaborativo
+
+        return ReporteColaborativo.objects.filter(
+            id__in=self.reportes_asociados,
+            fecha_creacion__gte=timezone.now() - timedelta(days=dias),
+        )
 
     def recalcular_tendencia(self, ):
-        pass
+        actual, anterior = self.reportes_periodo_actual, self.reportes_periodo_anterior
+        diferencia = actual - anterior
+        if diferencia >= DIFERENCIA_MINIMA_TENDENCIA and diferencia > anterior * VARIACION_TENDENCIA:
+            self.tendencia = 'creciente'
+        elif -diferencia >= DIFERENCIA_MINIMA_TENDENCIA and -diferencia > anterior * VARIACION_TENDENCIA:
+            self.tendencia = 'decreciente'
+        else:
+            self.tendencia = 'estable'
+        return self.tendencia
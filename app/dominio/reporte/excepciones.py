@@ -0,0 +1,21 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+class VotoError(Exception):
+    """Excepción base para votos de validación rechazados"""
+    pass
+
+
+class ReporteNoEncontradoError(VotoError):
+    """El reporte no existe o no está activo"""
+    pass
+
+
+class VotoDuplicadoError(VotoError):
+    """El usuario ya votó este reporte"""
+    pass
+
+
+class VotoPropioError(VotoError):
+    """El autor no puede votar su propio reporte"""
+    pass
@@ -27,6 +27,22 @@ class IReporteColaborativoRepository:
         """
         pass
 
+    @abstractmethod
+    def filtrar(self, estado=None, fecha=None, ubicacion=None, tipo_incidente=None, nivel_peligro=None, reportes=None):
+        """
+        Aplica los filtros indicados (los vacíos se ignoran) y retorna una consulta
+        perezosa que puede seguir filtrándose, ordenándose o paginándose.
+        """
+        pass
+
+    @abstractmethod
+    def registrar_voto(self, reporte_id, usuario_id, positivo):
+        """
+        Registra el voto del usuario y suma el contador correspondiente en una sola
+        transacción. Retorna los contadores resultantes.
+        """
+        pass
+
     @abstractmethod
     def buscar_por_zona(self, ubicacion, radio):
         """
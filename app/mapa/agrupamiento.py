@@ -0,0 +1,111 @@
+import math
+
+import numpy as np
+
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+
+from .teselas import TAMANO_TESELA, a_pixeles, limites_tesela, tesela_de
+
+# Tamaño de la celda de agrupamiento en píxeles de pantalla (divide exacto a la tesela,
+# así una celda nunca queda repartida entre dos respuestas con bbox distinto)
+CELDA_PX = 64
+ZOOM_MAXIMO = 20
+# Teselas por lado permitidas en una consulta (≈ una pantalla 4K con margen)
+MAX_TESELAS_LADO = 32
+
+
+class BBoxInvalidoError(ValueError):
+    pass
+
+
+def zoom_agrupamiento(zoom):
+    """Nivel de zoom entero usado para agrupar (Leaflet puede enviar zoom fraccionario)"""
+    zoom = float(zoom)
+    if not math.isfinite(zoom):
+        raise ValueError(f"zoom no finito: {zoom}")
+    return min(max(int(zoom), 0), ZOOM_MAXIMO)
+
+
+def parsear_bbox(texto):
+    """Convierte 'lng_min,lat_min,lng_max,lat_max' (formato toBBoxString de Leaflet)"""
+    try:
+        lng_min, lat_min, lng_max, lat_max = (float(valor) for valor in texto.split(','))
+    except (AttributeError, ValueError):
+        raise BBoxInvalidoError("bbox debe ser 'lng_min,lat_min,lng_max,lat_max'")
+    if not (-90 <= lat_min <= lat_max <= 90 and -180 <= lng_min <= lng_max <= 180):
+        raise BBoxInvalidoError("bbox fuera de rango")
+    return lng_min, lat_min, lng_max, lat_max
+
+
+def ajustar_a_teselas(bbox, z):
+    """
+    Expande el bbox a los bordes de las teselas del zoom z que lo cubren.
+    Vistas cercanas comparten así la misma clave de cache.
+
+    Returns:
+        tuple: (x_min, y_min, x_max, y_max) en índices de tesela.
+    """
+    lng_min, lat_min, lng_max, lat_max = bbox
+    x_min, y_min = tesela_de(lat_max, lng_min, z)
+    x_max, y_max = tesela_de(lat_min, lng_max, z)
+    if x_max - x_min >= MAX_TESELAS_LADO or y_max - y_min >= MAX_TESELAS_LADO:
+        raise BBoxInvalidoError("bbox demasiado grande para el zoom indicado")
+    return x_min, y_min, x_max, y_max
+
+
+def bbox_de_teselas(z, x_min, y_min, x_max, y_max):
+    """bbox (lng_min, lat_min, lng_max, lat_max) que cubre el rango de teselas"""
+    lat_min, lng_min, _, _ = limites_tesela(z, x_min, y_max)
+    _, _, lat_max, lng_max = limites_tesela(z, x_max, y_min)
+    return [round(lng_min, 6), round(lat_min, 6), round(lng_max, 6), round(lat_max, 6)]
+
+
+def agrupar_puntos(z, x_min, y_min, x_max, y_max):
+    """
+    Agrupa en una grilla de CELDA_PX píxeles los incidentes activos del snapshot
+    que caen dentro del rango de teselas.
+
+    Returns:
+        list: grupos con centroide, cantidad, nivel_peligro promedio, nivel máximo
+        y, si el grupo tiene un solo reporte, su id.
+    """
+    ids, latitudes, longitudes, niveles = snapshot_incidentes.puntos()
+    px, py = a_pixeles(latitudes, longitudes, z)
+    dentro = (
+        (px >= x_min * TAMANO_TESELA) & (px < (x_max + 1) * TAMANO_TESELA)
+        & (py >= y_min * TAMANO_TESELA) & (py < (y_max + 1) * TAMANO_TESELA)
+    )
+    if not dentro.any():
+        return []
+
+    ids, latitudes, longitudes = ids[dentro], latitudes[dentro], longitudes[dentro]
+    pesos = niveles[dentro].astype(np.float64)
+    celdas = np.stack([
+        (px[dentro] // CELDA_PX).astype(np.int64),
+        (py[dentro] // CELDA_PX).astype(np.int64),
+    ], axis=1)
+    _, primero, grupo = np.unique(celdas, axis=0, return_index=True, return_inverse=True)
+    grupo = grupo.ravel()
+
+    cantidad = np.bincount(grupo)
+    suma_pesos = np.bincount(grupo, weights=pesos)
+    # Centroide ponderado por nivel de peligro: el grupo se dibuja hacia lo más grave
+    lat_centro = np.bincount(grupo, weights=latitudes * pesos) / suma_pesos
+    lng_centro = np.bincount(grupo, weights=longitudes * pesos) / suma_pesos
+    nivel_maximo = np.zeros(len(cantidad), dtype=np.int64)
+    np.maximum.at(nivel_maximo, grupo, pesos.astype(np.int64))
+
+    return [
+        {
+            'lat': round(lat, 6),
+            'lng': round(lng, 6),
+            'cantidad': total,
+            'nivel_peligro': round(suma / total, 2),
+            'nivel_maximo': maximo,
+            'id': reporte_id if total == 1 else None,
+        }
+        for lat, lng, total, suma, maximo, reporte_id in zip(
+            lat_centro.tolist(), lng_centro.tolist(), cantidad.tolist(),
+            suma_pesos.tolist(), nivel_maximo.tolist(), ids[primero].tolist(),
+        )
+    ]
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class MapaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'mapa'
+    name = 'app.mapa'
+
+    def ready(self):
+        import app.mapa.signals  # Registrar las señales
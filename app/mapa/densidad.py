@@ -0,0 +1,141 @@
+from math import cos, radians
+
+import numpy as np
+
+from app.reporte.distancias import RADIO_TIERRA_KM, distancias_por_pares
+
+# Desplazamientos de las 8 celdas vecinas
+VECINOS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+_DESPLAZAMIENTO_Y = 2 ** 31
+
+
+def _claves(cx, cy):
+    """Clave escalar de celda; respeta el orden lexicográfico (cx, cy) de np.unique"""
+    return cx * (2 ** 32) + (cy + _DESPLAZAMIENTO_Y)
+
+
+def celdas_de(latitudes, longitudes, tamano_celda_km):
+    """
+    Índices (cx, cy) de la celda de cada punto en una grilla de tamano_celda_km.
+
+    Usa una proyección equirectangular con la latitud de referencia redondeada
+    al grado, así la grilla no se desplaza cuando cambian los datos.
+    """
+    lat_referencia = round(float(np.median(latitudes)))
+    x = np.radians(longitudes) * cos(radians(lat_referencia)) * RADIO_TIERRA_KM
+    y = np.radians(latitudes) * RADIO_TIERRA_KM
+    return (
+        np.floor(x / tamano_celda_km).astype(np.int64),
+        np.floor(y / tamano_celda_km).astype(np.int64),
+    )
+
+
+def agrupar_por_densidad(latitudes, longitudes, tamano_celda_km=0.2, min_reportes=3):
+    """
+    Agrupamiento por densidad estilo DBSCAN sobre una grilla.
+
+    Una celda es núcleo si su bloque de 3x3 celdas suma al menos min_reportes
+    (aproxima el vecindario ε de DBSCAN); las celdas núcleo vecinas
+    (8-conectividad) forman una zona; una celda no núcleo junto a una zona se
+    une como frontera; el resto es ruido.
+
+    Returns:
+        tuple: (etiquetas, claves_zona). etiquetas tiene una entrada por punto
+        (-1 = ruido); claves_zona[k] identifica de forma estable la zona k
+        (celda núcleo mínima, formato 'cx:cy').
+    """
+    if len(latitudes) == 0:
+        return np.empty(0, dtype=np.int64), []
+
+    cx, cy = celdas_de(latitudes, longitudes, tamano_celda_km)
+    celdas, inversa, conteo = np.unique(
+        np.stack([cx, cy], axis=1), axis=0, return_inverse=True, return_counts=True
+    )
+    inversa = inversa.ravel()
+    total_celdas = len(celdas)
+    claves = _claves(celdas[:, 0], celdas[:, 1])
+
+    # Índice de cada celda vecina (-1 si está vacía)
+    vecinas = []
+    for dx, dy in VECINOS:
+        buscadas = _claves(celdas[:, 0] + dx, celdas[:, 1] + dy)
+        posiciones = np.minimum(np.searchsorted(claves, buscadas), total_celdas - 1)
+        vecinas.append(np.where(claves[posiciones] == buscadas, posiciones, -1))
+
+    # Vecindario ε ≈ bloque de 3x3 celdas: un grupo partido por el borde de una celda sigue contando
+    vecindario = conteo.copy()
+    for vecina in vecinas:
+        vecindario += np.where(vecina >= 0, conteo[vecina], 0)
+    nucleo = vecindario >= min_reportes
+
+    # Componentes conexas de celdas núcleo: propagación de la etiqueta mínima
+    sin_zona = total_celdas
+    etiqueta = np.where(nucleo, np.arange(total_celdas), sin_zona)
+    while True:
+        nueva = etiqueta.copy()
+        for vecina in vecinas:
+            enlace = nucleo & (vecina >= 0)
+            enlace[enlace] = nucleo[vecina[enlace]]
+            nueva[enlace] = np.minimum(nueva[enlace], etiqueta[vecina[enlace]])
+        # Salto de punteros: acelera la convergencia en zonas alargadas
+        nueva[nucleo] = nueva[nueva[nucleo]]
+        if np.array_equal(nueva, etiqueta):
+            break
+        etiqueta = nueva
+
+    # Celdas frontera: toman la zona (menor) de alguna vecina núcleo
+    frontera = etiqueta.copy()
+    for vecina in vecinas:
+        enlace = ~nucleo & (vecina >= 0)
+        enlace[enlace] = nucleo[vecina[enlace]]
+        frontera[enlace] = np.minimum(frontera[enlace], etiqueta[vecina[enlace]])
+
+    representantes, etiqueta_zona = np.unique(frontera, return_inverse=True)
+    etiqueta_zona = etiqueta_zona.ravel()
+    if len(representantes) and representantes[-1] == sin_zona:
+        etiqueta_zona[frontera == sin_zona] = -1
+        representantes = representantes[:-1]
+
+    claves_zona = [f"{celdas[i, 0]}:{celdas[i, 1]}" for i in representantes.tolist()]
+    return etiqueta_zona[inversa], claves_zona
+
+
+def resumir_zonas(etiquetas, latitudes, longitudes, pesos, creados, ahora, ventana_segundos):
+    """
+    Estadísticas por zona a partir de las etiquetas de agrupar_por_densidad.
+
+    Returns:
+        dict: arreglos de longitud K (número de zonas) con cantidad, intensidad
+        (suma de niveles), centro ponderado por nivel, radio en km y reportes en la
+        ventana actual y en la anterior; 'miembros' lista los índices de cada zona.
+    """
+    en_zona = etiquetas >= 0
+    zona = etiquetas[en_zona]
+    total_zonas = int(zona.max()) + 1 if len(zona) else 0
+    latitudes, longitudes = latitudes[en_zona], longitudes[en_zona]
+    pesos = pesos[en_zona].astype(np.float64)
+    creados = creados[en_zona]
+
+    cantidad = np.bincount(zona, minlength=total_zonas)
+    intensidad = np.bincount(zona, weights=pesos, minlength=total_zonas)
+    lat_centro = np.bincount(zona, weights=latitudes * pesos, minlength=total_zonas) / np.maximum(intensidad, 1e-12)
+    lng_centro = np.bincount(zona, weights=longitudes * pesos, minlength=total_zonas) / np.maximum(intensidad, 1e-12)
+
+    radio = np.zeros(total_zonas, dtype=np.float64)
+    np.maximum.at(radio, zona, distancias_por_pares(latitudes, longitudes, lat_centro[zona], lng_centro[zona], None))
+
+    actual = creados >= ahora - ventana_segundos
+    anterior = (creados >= ahora - 2 * ventana_segundos) & ~actual
+
+    orden = np.argsort(zona, kind='stable')
+    cortes = np.cumsum(cantidad)[:-1]
+    return {
+        'cantidad': cantidad,
+        'intensidad': intensidad,
+        'lat_centro': lat_centro,
+        'lng_centro': lng_centro,
+        'radio_km': radio,
+        'periodo_actual': np.bincount(zona, weights=actual, minlength=total_zonas).astype(np.int64),
+        'periodo_anterior': np.bincount(zona, weights=anterior, minlength=total_zonas).astype(np.int64),
+        'miembros': np.split(np.flatnonzero(en_zona)[orden], cortes) if total_zonas else [],
+    }
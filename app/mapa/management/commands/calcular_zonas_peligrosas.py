@@ -0,0 +1,60 @@
+# Archivo: app/mapa/management/commands/calcular_zonas_peligrosas.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.servicios.mapaCalorApplicationService import MapaCalorApplicationService
+
+
+class Command(BaseCommand):
+    """
+    Recalcula las zonas peligrosas precalculadas (agrupamiento por densidad de
+    los reportes activos). Si los reportes no cambiaron desde la última ejecución
+    no hace nada, así que puede programarse con cron cada pocos minutos o
+    dejarse corriendo con --cada.
+
+    Ejemplos de uso:
+    python manage.py calcular_zonas_peligrosas
+    python manage.py calcular_zonas_peligrosas --forzar
+    python manage.py calcular_zonas_peligrosas --cada 300
+    """
+
+    help = 'Identifica y guarda las zonas peligrosas a partir de los reportes activos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--forzar',
+            action='store_true',
+            help='Recalcula aunque los reportes no hayan cambiado',
+        )
+        parser.add_argument(
+            '--cada',
+            type=int,
+            default=None,
+            help='Repite el cálculo cada N segundos (hasta interrumpirlo)',
+        )
+
+    def handle(self, *args, **options):
+        if options['cada'] is not None and options['cada'] <= 0:
+            raise CommandError('--cada debe ser un número positivo de segundos')
+
+        servicio = MapaCalorApplicationService()
+        forzar = options['forzar']
+        while True:
+            inicio = time.perf_counter()
+            resultado = servicio.identificar_zonas_peligrosas(forzar=forzar)
+            duracion = time.perf_counter() - inicio
+
+            if resultado is None:
+                self.stdout.write(f'Sin cambios en los reportes; zonas vigentes ({duracion:.2f}s)')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Zonas: {resultado['creadas']} nuevas, {resultado['actualizadas']} actualizadas, "
+                    f"{resultado['eliminadas']} eliminadas ({duracion:.2f}s)"
+                ))
+
+            if options['cada'] is None:
+                break
+            forzar = False
+            time.sleep(options['cada'])
@@ -0,0 +1,69 @@
+# Archivo: app/mapa/management/commands/construir_teselas.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.mapa.models import TeselaCalor
+from app.mapa.teselas import renderizar_tesela, teselas_con_datos, zoom_maximo, zoom_minimo
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+
+
+class Command(BaseCommand):
+    """
+    Precalcula la pirámide de teselas del mapa de calor.
+
+    Por defecto solo genera las teselas que faltan (las invalidadas por cambios en
+    reportes), por lo que puede ejecutarse periódicamente de forma incremental.
+
+    Ejemplos de uso:
+    python manage.py construir_teselas
+    python manage.py construir_teselas --zoom-min 12 --zoom-max 15
+    python manage.py construir_teselas --todas
+    """
+
+    help = 'Genera las teselas del mapa de calor que faltan (o todas con --todas)'
+
+    TAMANO_LOTE = 200
+
+    def add_arguments(self, parser):
+        parser.add_argument('--zoom-min', type=int, default=None, help='Zoom mínimo a generar')
+        parser.add_argument('--zoom-max', type=int, default=None, help='Zoom máximo a generar')
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Regenera todas las teselas, no solo las faltantes',
+        )
+
+    def handle(self, *args, **options):
+        zoom_min = options['zoom_min'] if options['zoom_min'] is not None else zoom_minimo()
+        zoom_max = options['zoom_max'] if options['zoom_max'] is not None else zoom_maximo()
+        if zoom_min > zoom_max:
+            raise CommandError('--zoom-min no puede ser mayor que --zoom-max')
+
+        snapshot_incidentes.sincronizar(forzar=True)
+        inicio = time.perf_counter()
+        generadas = 0
+
+        for z in range(zoom_min, zoom_max + 1):
+            teselas = teselas_con_datos(z)
+            if options['todas']:
+                TeselaCalor.objects.filter(z=z).delete()
+                existentes = set()
+            else:
+                existentes = set(TeselaCalor.objects.filter(z=z).values_list('x', 'y'))
+
+            faltantes = sorted(teselas - existentes)
+            for i in range(0, len(faltantes), self.TAMANO_LOTE):
+                lote = []
+                for x, y in faltantes[i:i + self.TAMANO_LOTE]:
+                    imagen, cantidad = renderizar_tesela(z, x, y)
+                    lote.append(TeselaCalor(z=z, x=x, y=y, imagen=imagen, cantidad_reportes=cantidad))
+                TeselaCalor.objects.bulk_create(lote, ignore_conflicts=True)
+
+            generadas += len(faltantes)
+            self.stdout.write(f'Zoom {z}: {len(faltantes)} teselas generadas ({len(teselas)} con datos)')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Se generaron {generadas} teselas en {time.perf_counter() - inicio:.2f}s')
+        )
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeselaCalor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('z', models.PositiveSmallIntegerField()),
+                ('x', models.PositiveIntegerField()),
+                ('y', models.PositiveIntegerField()),
+                ('imagen', models.BinaryField()),
+                ('cantidad_reportes', models.PositiveIntegerField(default=0)),
+                ('fecha_generacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tesela de mapa de calor',
+                'verbose_name_plural': 'Teselas de mapa de calor',
+                'constraints': [models.UniqueConstraint(fields=('z', 'x', 'y'), name='tesela_calor_zxy_unica')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mapa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ZonaPeligrosa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=50, unique=True)),
+                ('nombre_zona', models.CharField(blank=True, max_length=200)),
+                ('latitud_centro', models.FloatField()),
+                ('longitud_centro', models.FloatField()),
+                ('radio_cobertura', models.FloatField(help_text='Radio en km')),
+                ('nivel_peligro', models.PositiveSmallIntegerField(default=1)),
+                ('cantidad_reportes', models.PositiveIntegerField(default=0)),
+                ('intensidad', models.FloatField(default=0, help_text='Suma de los niveles de peligro')),
+                ('reportes_asociados', models.JSONField(default=list)),
+                ('tendencia', models.CharField(choices=[('creciente', 'Creciente'), ('estable', 'Estable'), ('decreciente', 'Decreciente')], default='estable', max_length=20)),
+                ('reportes_periodo_actual', models.PositiveIntegerField(default=0)),
+                ('reportes_periodo_anterior', models.PositiveIntegerField(default=0)),
+                ('version_datos', models.CharField(blank=True, max_length=32)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Zona peligrosa',
+                'verbose_name_plural': 'Zonas peligrosas',
+                'ordering': ['-nivel_peligro', '-cantidad_reportes'],
+                'indexes': [models.Index(fields=['nivel_peligro', 'cantidad_reportes'], name='mapa_zonape_nivel_p_dccf59_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,99 @@
-from django.db import models
+from django.db import models, transaction
 
-# Create your models here.
+
+class TeselaCalor(models.Model):
+    """Tesela PNG precalculada (z/x/y) del mapa de calor de reportes activos"""
+
+    z = models.PositiveSmallIntegerField()
+    x = models.PositiveIntegerField()
+    y = models.PositiveIntegerField()
+    imagen = models.BinaryField()
+    cantidad_reportes = models.PositiveIntegerField(default=0)
+    fecha_generacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Tesela de mapa de calor'
+        verbose_name_plural = 'Teselas de mapa de calor'
+        constraints = [
+            models.UniqueConstraint(fields=['z', 'x', 'y'], name='tesela_calor_zxy_unica'),
+        ]
+
+    def __str__(self):
+        return f"Tesela {self.z}/{self.x}/{self.y} ({self.cantidad_reportes} reportes)"
+
+    @classmethod
+    def obtener_o_generar(cls, z, x, y):
+        """Retorna el PNG de la tesela; si no existe (o fue invalidada) la genera y la guarda"""
+        from app.reporte.snapshot_incidentes import snapshot_incidentes
+        from .teselas import renderizar_tesela
+
+        imagen = cls.objects.filter(z=z, x=x, y=y).values_list('imagen', flat=True).first()
+        if imagen is not None:
+            return bytes(imagen)
+
+        # Antes de generar, traer los cambios hechos en otros procesos
+        snapshot_incidentes.sincronizar(forzar=True)
+        version = snapshot_incidentes.version
+        imagen, cantidad = renderizar_tesela(z, x, y)
+
+        with transaction.atomic():
+            # Si un reporte cambió durante el renderizado, su invalidación pudo correr
+            # antes que esta escritura: la imagen se sirve pero no se guarda
+            snapshot_incidentes.sincronizar(forzar=True)
+            if snapshot_incidentes.version == version:
+                cls.objects.update_or_create(
+                    z=z, x=x, y=y,
+                    defaults={'imagen': imagen, 'cantidad_reportes': cantidad}
+                )
+        return imagen
+
+    @classmethod
+    def invalidar_punto(cls, latitud, longitud):
+        """Elimina las teselas (de todos los zooms) cuya imagen depende de la coordenada"""
+        from .teselas import teselas_afectadas, zoom_maximo, zoom_minimo
+
+        condicion = models.Q()
+        for z in range(zoom_minimo(), zoom_maximo() + 1):
+            for x, y in teselas_afectadas(float(latitud), float(longitud), z):
+                condicion |= models.Q(z=z, x=x, y=y)
+        if condicion:
+            cls.objects.filter(condicion).delete()
+
+
+class ZonaPeligrosa(models.Model):
+    """Zona peligrosa precalculada por MapaCalorApplicationService.identificar_zonas_peligrosas"""
+
+    TENDENCIA_CHOICES = [
+        ('creciente', 'Creciente'),
+        ('estable', 'Estable'),
+        ('decreciente', 'Decreciente'),
+    ]
+
+    # Identifica la zona entre ejecuciones (celda núcleo mínima del agrupamiento)
+    clave = models.CharField(max_length=50, unique=True)
+    nombre_zona = models.CharField(max_length=200, blank=True)
+    latitud_centro = models.FloatField()
+    longitud_centro = models.FloatField()
+    radio_cobertura = models.FloatField(help_text='Radio en km')
+    nivel_peligro = models.PositiveSmallIntegerField(default=1)
+    cantidad_reportes = models.PositiveIntegerField(default=0)
+    intensidad = models.FloatField(default=0, help_text='Suma de los niveles de peligro')
+    reportes_asociados = models.JSONField(default=list)
+    tendencia = models.CharField(max_length=20, choices=TENDENCIA_CHOICES, default='estable')
+    reportes_periodo_actual = models.PositiveIntegerField(default=0)
+    reportes_periodo_anterior = models.PositiveIntegerField(default=0)
+    # Versión del snapshot de incidentes con la que se calculó
+    version_datos = models.CharField(max_length=32, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Zona peligrosa'
+        verbose_name_plural = 'Zonas peligrosas'
+        ordering = ['-nivel_peligro', '-cantidad_reportes']
+        indexes = [
+            models.Index(fields=['nivel_peligro', 'cantidad_reportes']),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre_zona or self.clave} (nivel {self.nivel_peligro}, {self.cantidad_reportes} reportes)"
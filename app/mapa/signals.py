@@ -0,0 +1,61 @@
+# app/mapa/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from app.reporte.models import ReporteColaborativo
+from .models import TeselaCalor
+
+CAMPOS_DIBUJADOS = ReporteColaborativo.CAMPOS_MAPA
+
+
+@receiver(pre_save, sender=ReporteColaborativo)
+def recordar_estado_anterior(sender, instance, update_fields=None, **kwargs):
+    """
+    Guarda la posición y el estado previos para invalidar también las teselas de origen.
+    Solo consulta la BD si la instancia no trae esos valores de su carga (from_db).
+    """
+    instance._estado_tesela_anterior = None
+    instance._tesela_misma_posicion = False
+    if update_fields is not None and not set(CAMPOS_DIBUJADOS) & set(update_fields):
+        instance._tesela_sin_cambios = True
+        return
+    instance._tesela_sin_cambios = False
+    if update_fields is not None and not {'latitud', 'longitud'} & set(update_fields):
+        # La posición no cambia: basta con invalidar la huella actual
+        instance._tesela_misma_posicion = True
+        return
+    if getattr(instance, '_valores_mapa', None) is not None:
+        instance._estado_tesela_anterior = instance._valores_mapa
+    elif instance.pk:
+        instance._estado_tesela_anterior = ReporteColaborativo.objects.filter(pk=instance.pk).values_list(
+            *CAMPOS_DIBUJADOS
+        ).first()
+
+
+@receiver(post_save, sender=ReporteColaborativo)
+def invalidar_teselas_reporte(sender, instance, created, **kwargs):
+    """
+    Invalida las teselas afectadas cuando cambia algo que se dibuja en el mapa de calor
+    """
+    if getattr(instance, '_tesela_sin_cambios', False):
+        return
+    anterior = getattr(instance, '_estado_tesela_anterior', None)
+    actual = (instance.latitud, instance.longitud, instance.nivel_peligro, instance.is_active)
+    instance._valores_mapa = actual
+
+    if getattr(instance, '_tesela_misma_posicion', False):
+        # Cambió el nivel o la actividad: la huella es la misma, activo o no
+        TeselaCalor.invalidar_punto(instance.latitud, instance.longitud)
+        return
+    if anterior is not None and tuple(anterior) == actual:
+        return
+    if anterior is not None and anterior[3]:
+        TeselaCalor.invalidar_punto(anterior[0], anterior[1])
+    if instance.is_active:
+        TeselaCalor.invalidar_punto(instance.latitud, instance.longitud)
+
+
+@receiver(post_delete, sender=ReporteColaborativo)
+def invalidar_teselas_reporte_eliminado(sender, instance, **kwargs):
+    if instance.is_active:
+        TeselaCalor.invalidar_punto(instance.latitud, instance.longitud)
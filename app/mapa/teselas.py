@@ -0,0 +1,159 @@
+import io
+from math import atan, degrees, floor, pi
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+
+TAMANO_TESELA = 256
+# Radio (en píxeles) de la mancha de calor de cada reporte; define el margen de influencia
+RADIO_PX = 18
+# Intensidad acumulada que se considera "saturada" (≈ tres reportes críticos superpuestos)
+ESCALA_INTENSIDAD = 6.0
+
+# Gradiente: verde -> amarillo -> naranja -> rojo
+PARADAS_COLOR = np.array([0.0, 0.35, 0.65, 1.0])
+COLORES = np.array([
+    [40, 167, 69],
+    [255, 193, 7],
+    [253, 126, 20],
+    [220, 53, 69],
+], dtype=np.float64)
+
+
+def zoom_minimo():
+    return getattr(settings, 'MAPA_TESELAS_ZOOM_MIN', 10)
+
+
+def zoom_maximo():
+    return getattr(settings, 'MAPA_TESELAS_ZOOM_MAX', 17)
+
+
+def a_pixeles(latitudes, longitudes, z):
+    """Proyección Web Mercator: coordenadas -> píxeles globales en el zoom z"""
+    escala = TAMANO_TESELA * (2 ** z)
+    latitudes = np.clip(np.asarray(latitudes, dtype=np.float64), -85.05112878, 85.05112878)
+    lat_rad = np.radians(latitudes)
+    x = (np.asarray(longitudes, dtype=np.float64) + 180.0) / 360.0 * escala
+    y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / pi) / 2.0 * escala
+    return x, y
+
+
+def tesela_de(latitud, longitud, z):
+    """Retorna (x, y) de la tesela que contiene la coordenada en el zoom z"""
+    x, y = a_pixeles([latitud], [longitud], z)
+    maximo = 2 ** z - 1
+    return (
+        min(max(int(x[0] // TAMANO_TESELA), 0), maximo),
+        min(max(int(y[0] // TAMANO_TESELA), 0), maximo),
+    )
+
+
+def teselas_afectadas(latitud, longitud, z):
+    """Teselas del zoom z cuya imagen cambia si se agrega/quita un punto (incluye el margen de la mancha)"""
+    px, py = a_pixeles([latitud], [longitud], z)
+    px, py = float(px[0]), float(py[0])
+    maximo = 2 ** z - 1
+    x_min = max(int(floor((px - RADIO_PX) / TAMANO_TESELA)), 0)
+    x_max = min(int(floor((px + RADIO_PX) / TAMANO_TESELA)), maximo)
+    y_min = max(int(floor((py - RADIO_PX) / TAMANO_TESELA)), 0)
+    y_max = min(int(floor((py + RADIO_PX) / TAMANO_TESELA)), maximo)
+    return [(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)]
+
+
+def limites_tesela(z, x, y):
+    """Retorna (lat_min, lng_min, lat_max, lng_max) de la tesela"""
+    n = 2 ** z
+
+    def lat_de(fila):
+        return degrees(atan(np.sinh(pi * (1 - 2 * fila / n))))
+
+    return lat_de(y + 1), x / n * 360.0 - 180.0, lat_de(y), (x + 1) / n * 360.0 - 180.0
+
+
+def _nucleo_gaussiano():
+    sigma = RADIO_PX / 2.0
+    posiciones = np.arange(-RADIO_PX, RADIO_PX + 1, dtype=np.float64)
+    return np.exp(-(posiciones ** 2) / (2 * sigma ** 2))
+
+
+def _matriz_convolucion(tamano):
+    """Matriz de Toeplitz que aplica el núcleo gaussiano 1D (desenfoque separable con dos productos)"""
+    nucleo = _nucleo_gaussiano()
+    matriz = np.zeros((tamano, tamano), dtype=np.float64)
+    for desplazamiento, peso in zip(range(-RADIO_PX, RADIO_PX + 1), nucleo):
+        matriz += np.eye(tamano, k=desplazamiento) * peso
+    return matriz
+
+
+_LADO = TAMANO_TESELA + 2 * RADIO_PX
+_CONVOLUCION = _matriz_convolucion(_LADO)
+
+
+def intensidad_tesela(z, x, y, latitudes, longitudes, pesos):
+    """
+    Acumula los pesos (nivel_peligro) de los puntos en una grilla de 256x256 píxeles
+    con desenfoque gaussiano; incluye puntos vecinos dentro del margen de la mancha.
+    """
+    px, py = a_pixeles(latitudes, longitudes, z)
+    px = px - x * TAMANO_TESELA + RADIO_PX
+    py = py - y * TAMANO_TESELA + RADIO_PX
+
+    dentro = (px >= 0) & (px < _LADO) & (py >= 0) & (py < _LADO)
+    grilla = np.zeros((_LADO, _LADO), dtype=np.float64)
+    np.add.at(grilla, (py[dentro].astype(np.int64), px[dentro].astype(np.int64)), np.asarray(pesos, dtype=np.float64)[dentro])
+
+    desenfocada = _CONVOLUCION @ grilla @ _CONVOLUCION.T
+    return desenfocada[RADIO_PX:RADIO_PX + TAMANO_TESELA, RADIO_PX:RADIO_PX + TAMANO_TESELA]
+
+
+def colorear(intensidad):
+    """Convierte la intensidad en una imagen RGBA (PNG en bytes)"""
+    normalizada = 1.0 - np.exp(-intensidad / ESCALA_INTENSIDAD)
+    rgba = np.zeros(intensidad.shape + (4,), dtype=np.uint8)
+    for canal in range(3):
+        rgba[..., canal] = np.interp(normalizada, PARADAS_COLOR, COLORES[:, canal]).astype(np.uint8)
+    rgba[..., 3] = (np.clip(normalizada * 1.6, 0.0, 0.8) * 255).astype(np.uint8)
+
+    buffer = io.BytesIO()
+    Image.fromarray(rgba).save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def puntos_en_tesela(z, x, y):
+    """Puntos activos (del snapshot en memoria) que influyen en la tesela, con margen de la mancha"""
+    _, latitudes, longitudes, niveles = snapshot_incidentes.puntos()
+    lat_min, lng_min, lat_max, lng_max = limites_tesela(z, x, y)
+    # Margen holgado (Mercator no es lineal en latitud); el recorte exacto se hace en píxeles
+    margen_lat = (lat_max - lat_min) * 2 * RADIO_PX / TAMANO_TESELA
+    margen_lng = (lng_max - lng_min) * 2 * RADIO_PX / TAMANO_TESELA
+    mascara = (
+        (latitudes >= lat_min - margen_lat) & (latitudes <= lat_max + margen_lat)
+        & (longitudes >= lng_min - margen_lng) & (longitudes <= lng_max + margen_lng)
+    )
+    return latitudes[mascara], longitudes[mascara], niveles[mascara]
+
+
+def renderizar_tesela(z, x, y):
+    """Retorna (png_bytes, cantidad_de_puntos) para la tesela z/x/y"""
+    latitudes, longitudes, niveles = puntos_en_tesela(z, x, y)
+    intensidad = intensidad_tesela(z, x, y, latitudes, longitudes, niveles)
+    return colorear(intensidad), len(latitudes)
+
+
+def teselas_con_datos(z):
+    """Conjunto de teselas del zoom z que tienen al menos un punto dentro de su zona de influencia"""
+    _, latitudes, longitudes, _ = snapshot_incidentes.puntos()
+    if len(latitudes) == 0:
+        return set()
+    px, py = a_pixeles(latitudes, longitudes, z)
+    maximo = 2 ** z - 1
+    teselas = set()
+    for dx in (-RADIO_PX, 0, RADIO_PX):
+        for dy in (-RADIO_PX, 0, RADIO_PX):
+            xs = np.clip(((px + dx) // TAMANO_TESELA).astype(np.int64), 0, maximo)
+            ys = np.clip(((py + dy) // TAMANO_TESELA).astype(np.int64), 0, maximo)
+            teselas.update(zip(xs.tolist(), ys.tolist()))
+    return teselas
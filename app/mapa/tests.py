@@ -1,3 +1,211 @@
 from django.test import TestCase
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.urls import reverse
+from decimal import Decimal
+import numpy as np
+from app.presentation.controladores.mapaCalorController import MapaCalorController
+from app.reporte.models import ReporteColaborativo
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+from app.servicios.mapaCalorApplicationService import MapaCalorApplicationService
+from .densidad import agrupar_por_densidad
+from .models import TeselaCalor, ZonaPeligrosa as ZonaPeligrosaModel
+from .teselas import tesela_de
 
 # Create your tests here.
+class TeselasCalorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='teselas', password='testpass123')
+        self.reporte = ReporteColaborativo.objects.create(
+            titulo='Choque en la avenida',
+            descripcion='Choque entre dos vehículos',
+            tipo_incidente='accidente',
+            latitud=Decimal('-16.4090'),
+            longitud=Decimal('-71.5375'),
+            usuario_reportador=self.user,
+            nivel_peligro=3,
+            nombre_via='Av. Ejército',
+            distrito='Yanahuara',
+        )
+        self.x, self.y = tesela_de(-16.4090, -71.5375, 14)
+
+    def _url(self, z, x, y):
+        return reverse('tesela_calor', kwargs={'z': z, 'x': x, 'y': y})
+
+    def test_tesela_se_genera_y_se_guarda(self):
+        response = self.client.get(self._url(14, self.x, self.y))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        tesela = TeselaCalor.objects.get(z=14, x=self.x, y=self.y)
+        self.assertEqual(tesela.cantidad_reportes, 1)
+
+    def test_cambio_en_reporte_invalida_teselas_de_su_huella(self):
+        self.client.get(self._url(14, self.x, self.y))
+        self.client.get(self._url(14, self.x + 5, self.y))
+
+        self.reporte.nivel_peligro = 4
+        self.reporte.save()
+
+        self.assertFalse(TeselaCalor.objects.filter(z=14, x=self.x, y=self.y).exists())
+        self.assertTrue(TeselaCalor.objects.filter(z=14, x=self.x + 5, y=self.y).exists())
+
+    def test_tesela_no_se_guarda_si_los_datos_cambian_al_renderizar(self):
+        from unittest import mock
+        from .teselas import renderizar_tesela
+
+        def renderizar_y_cambiar(z, x, y):
+            resultado = renderizar_tesela(z, x, y)
+            # Cambio (e invalidación) entre el renderizado y la escritura
+            ReporteColaborativo.objects.filter(pk=self.reporte.pk).update(nivel_peligro=1)
+            self.reporte.refresh_from_db()
+            self.reporte.nivel_peligro = 4
+            self.reporte.save()
+            return resultado
+
+        with mock.patch('app.mapa.teselas.renderizar_tesela', side_effect=renderizar_y_cambiar):
+            respuesta = self.client.get(self._url(14, self.x, self.y))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertFalse(TeselaCalor.objects.filter(z=14, x=self.x, y=self.y).exists())
+
+    def test_guardado_sin_cambio_de_posicion_no_relee_el_reporte(self):
+        from .signals import recordar_estado_anterior
+
+        self.client.get(self._url(14, self.x, self.y))
+        reporte = ReporteColaborativo.objects.get(pk=self.reporte.pk)
+        with self.assertNumQueries(0):
+            recordar_estado_anterior(ReporteColaborativo, reporte)
+            recordar_estado_anterior(ReporteColaborativo, reporte, update_fields=['is_active'])
+
+        # Desactivar con update_fields también invalida la huella
+        reporte.is_active = False
+        reporte.save(update_fields=['is_active'])
+        self.assertFalse(TeselaCalor.objects.filter(z=14, x=self.x, y=self.y).exists())
+
+    def test_tesela_fuera_de_rango(self):
+        self.assertEqual(self.client.get(self._url(3, 0, 0)).status_code, 404)
+        self.assertEqual(self.client.get(self._url(14, 2 ** 14, 0)).status_code, 404)
+
+
+class PuntosMapaApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='puntos', password='testpass123')
+        coordenadas = [
+            ('-16.40900', '-71.53750', 2),
+            ('-16.40910', '-71.53760', 4),
+            ('-16.45000', '-71.50000', 1),
+        ]
+        for i, (lat, lng, nivel) in enumerate(coordenadas):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte {i}',
+                descripcion='Reporte para agrupar',
+                tipo_incidente='embotellamiento',
+                latitud=Decimal(lat),
+                longitud=Decimal(lng),
+                usuario_reportador=self.user,
+                nivel_peligro=nivel,
+                nombre_via='Av. Ejército',
+                distrito='Yanahuara',
+            )
+        self.url = reverse('api_mapa_puntos')
+        self.bbox = '-71.56,-16.47,-71.49,-16.39'
+
+    def test_agrupa_puntos_cercanos(self):
+        response = self.client.get(self.url, {'bbox': self.bbox, 'zoom': 13})
+
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual(datos['total'], 3)
+        grupos = sorted(datos['grupos'], key=lambda grupo: grupo['cantidad'])
+        self.assertEqual([grupo['cantidad'] for grupo in grupos], [1, 2])
+        self.assertEqual(grupos[0]['titulo'], 'Reporte 2')
+        self.assertEqual(grupos[1]['nivel_peligro'], 3.0)
+        self.assertEqual(grupos[1]['nivel_maximo'], 4)
+        self.assertIsNone(grupos[1]['id'])
+
+        # En zoom máximo los reportes se separan
+        response = self.client.get(self.url, {'bbox': '-71.5377,-16.4092,-71.5374,-16.4089', 'zoom': 20})
+        self.assertEqual(len(response.json()['grupos']), 2)
+
+    def test_respuesta_cacheada_hasta_que_cambian_los_datos(self):
+        self.client.get(self.url, {'bbox': self.bbox, 'zoom': 13.4})
+        with self.assertNumQueries(0):
+            snapshot_incidentes.version  # el snapshot queda vigente dentro del TTL
+            response = self.client.get(self.url, {'bbox': self.bbox, 'zoom': 13})
+        self.assertEqual(response.json()['total'], 3)
+
+        ReporteColaborativo.objects.filter(titulo='Reporte 2').first().delete()
+        response = self.client.get(self.url, {'bbox': self.bbox, 'zoom': 13})
+        self.assertEqual(response.json()['total'], 2)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get(self.url, {'bbox': 'a,b', 'zoom': 13}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bbox': self.bbox, 'zoom': 'x'}).status_code, 400)
+        for zoom in ('inf', '-inf', 'nan'):
+            self.assertEqual(self.client.get(self.url, {'bbox': self.bbox, 'zoom': zoom}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'bbox': '-180,-85,180,85', 'zoom': 15}).status_code, 400)
+
+
+class ZonasPeligrosasTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='zonas', password='testpass123')
+        self.servicio = MapaCalorApplicationService()
+
+    def _crear_reporte(self, lat, lng, nivel=2):
+        return ReporteColaborativo.objects.create(
+            titulo='Reporte de zona',
+            descripcion='Reporte para zonas peligrosas',
+            tipo_incidente='accidente',
+            latitud=Decimal(lat),
+            longitud=Decimal(lng),
+            usuario_reportador=self.user,
+            nivel_peligro=nivel,
+            nombre_via='Av. Ejército',
+            distrito='Yanahuara',
+        )
+
+    def test_agrupamiento_por_densidad(self):
+        latitudes = np.array([-16.4000, -16.4001, -16.4002, -16.4003, -16.5000, -16.6000, -16.6001, -16.6002])
+        longitudes = np.array([-71.5000, -71.5001, -71.5002, -71.5003, -71.6000, -71.7000, -71.7001, -71.7002])
+
+        etiquetas, claves = agrupar_por_densidad(latitudes, longitudes, tamano_celda_km=0.3, min_reportes=3)
+
+        self.assertEqual(len(claves), 2)
+        self.assertEqual(len(set(etiquetas[:4].tolist())), 1)
+        self.assertEqual(etiquetas[4], -1)
+        self.assertEqual(len(set(etiquetas[5:].tolist())), 1)
+        self.assertNotEqual(etiquetas[0], etiquetas[5])
+
+    def test_identifica_y_persiste_zonas(self):
+        cercanos = [self._crear_reporte(f'-16.40{90 + i}', '-71.5375', nivel=3) for i in range(4)]
+        self._crear_reporte('-16.5000', '-71.6000')
+
+        resultado = self.servicio.identificar_zonas_peligrosas()
+
+        self.assertEqual(resultado, {'creadas': 1, 'actualizadas': 0, 'eliminadas': 0})
+        zona = MapaCalorController().obtener_zonas_peligrosas()[0]
+        self.assertEqual(zona.cantidad_reportes, 4)
+        self.assertEqual(sorted(zona.reportes_asociados), sorted(r.id for r in cercanos))
+        self.assertEqual(zona.nivel_peligro_actual, 3)
+        self.assertEqual(zona.tendencia, 'creciente')
+        self.assertEqual(zona.nombre_zona, 'Av. Ejército, Yanahuara')
+        self.assertTrue(zona.es_zona_caliente())
+
+    def test_calculo_incremental(self):
+        for i in range(3):
+            self._crear_reporte(f'-16.40{90 + i}', '-71.5375')
+        self.servicio.identificar_zonas_peligrosas()
+        zona_id = ZonaPeligrosaModel.objects.get().id
+
+        # Sin cambios en los reportes no se recalcula
+        self.assertIsNone(self.servicio.identificar_zonas_peligrosas())
+
+        self._crear_reporte('-16.4093', '-71.5376', nivel=4)
+        resultado = self.servicio.identificar_zonas_peligrosas()
+
+        self.assertEqual(resultado, {'creadas': 0, 'actualizadas': 1, 'eliminadas': 0})
+        zona = ZonaPeligrosaModel.objects.get()
+        self.assertEqual(zona.id, zona_id)
+        self.assertEqual(zona.cantidad_reportes, 4)
@@ -4,4 +4,6 @@ from . import views
 urlpatterns = [
     path('plan_route/', views.PlanRouteView.as_view(), name='plan_route'),
     path('see_state/', views.SeeStateView.as_view(), name='see_state'),
-]
\ No newline at end of file
+    path('mapa/teselas/<int:z>/<int:x>/<int:y>.png', views.tesela_calor, name='tesela_calor'),
+    path('api/mapa/puntos/', views.puntos_mapa, name='api_mapa_puntos'),
+]
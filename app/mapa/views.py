@@ -1,5 +1,19 @@
 from django.shortcuts import render
 from django.views.generic import TemplateView
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, Http404, JsonResponse
+from django.views.decorators.http import require_GET
+from django.views.decorators.cache import cache_control
+
+from app.reporte.models import ReporteColaborativo
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+from .agrupamiento import (
+    BBoxInvalidoError, agrupar_puntos, ajustar_a_teselas, bbox_de_teselas,
+    parsear_bbox, zoom_agrupamiento,
+)
+from .models import TeselaCalor
+from .teselas import zoom_minimo, zoom_maximo
 
 # Create your views here.
 class SeeStateView(TemplateView):
@@ -7,3 +21,59 @@ class SeeStateView(TemplateView):
 
 class PlanRouteView(TemplateView):
     template_name = 'plan_route.html'
+
+
+@require_GET
+@cache_control(public=True, max_age=60)
+def tesela_calor(request, z, x, y):
+    """Sirve la tesela PNG z/x/y del mapa de calor (precalculada o generada bajo demanda)"""
+    if not zoom_minimo() <= z <= zoom_maximo() or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise Http404("Tesela fuera de rango")
+
+    imagen = TeselaCalor.obtener_o_generar(z, x, y)
+    return HttpResponse(imagen, content_type='image/png')
+
+
+@require_GET
+@cache_control(public=True, max_age=30)
+def puntos_mapa(request):
+    """
+    Puntos del mapa agrupados en el servidor para el bbox y zoom visibles.
+
+    Parámetros GET: bbox=lng_min,lat_min,lng_max,lat_max y zoom. El bbox se expande
+    a las teselas que lo cubren, de modo que la respuesta se cachea por
+    (versión de datos, zoom, rango de teselas).
+    """
+    try:
+        z = zoom_agrupamiento(request.GET.get('zoom', ''))
+        rango = ajustar_a_teselas(parsear_bbox(request.GET.get('bbox')), z)
+    except BBoxInvalidoError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'zoom debe ser numérico'}, status=400)
+
+    clave = f"mapa_puntos:{snapshot_incidentes.clave_version}:{z}:" + ":".join(str(valor) for valor in rango)
+
+    datos = cache.get(clave)
+    if datos is None:
+        grupos = agrupar_puntos(z, *rango)
+        # Solo los reportes individuales llevan título (para el popup)
+        titulos = dict(
+            ReporteColaborativo.objects
+            .filter(id__in=[grupo['id'] for grupo in grupos if grupo['id']])
+            .order_by()
+            .values_list('id', 'titulo')
+        )
+        for grupo in grupos:
+            grupo['titulo'] = titulos.get(grupo['id'])
+
+        datos = {
+            'status': 'success',
+            'zoom': z,
+            'bbox': bbox_de_teselas(z, *rango),
+            'total': sum(grupo['cantidad'] for grupo in grupos),
+            'grupos': grupos,
+        }
+        cache.set(clave, datos, getattr(settings, 'MAPA_PUNTOS_CACHE_TTL', 300))
+
+    return JsonResponse(datos)
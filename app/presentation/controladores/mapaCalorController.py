@@ -1,18 +1,20 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+from app.servicios.mapaCalorApplicationService import MapaCalorApplicationService
 
 class MapaCalorController:
     def __init__(self):
-        self.mapa_app_service = None
+        self.mapa_app_service = MapaCalorApplicationService()
 
     def obtener_mapa_calor(self, coordenadas, radio):
         pass
 
-    def obtener_zonas_peligrosas(self, ):
-        pass
+    def obtener_zonas_peligrosas(self, nivel_minimo=None, limite=None):
+        return self.mapa_app_service.listar_zonas_peligrosas(nivel_minimo=nivel_minimo, limite=limite)
 
     def obtener_estadisticas_zona(self, zona_id):
-        pass
+        zona = self.mapa_app_service.obtener_zona(zona_id)
+        return zona.obtener_estadisticas_zona() if zona else None
 
     def generar_reporte_estadistico(self, fecha_inicio, fecha_fin):
         pass
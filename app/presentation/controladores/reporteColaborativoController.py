@@ -20,8 +20,11 @@ class ReporteColaborativoController:
         return self.reporte_app_service.listar_repotes()
 
     def listar_reportes(self, filtros):
-        """TODO: Listar reportes con filtros aplicados."""
-        pass
+        """QuerySet perezoso con los filtros aplicados en la base de datos"""
+        return self.reporte_app_service.filtrar_reportes(filtros)
+
+    def votar_reporte(self, reporte_id, usuario_id, voto):
+        return self.reporte_app_service.votar_validacion_reporte(reporte_id, usuario_id, voto)
 
     def actualizar_estado_reporte(self, reporte_id, nuevo_estado):
         """TODO: Actualizar el estado de un reporte."""
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ReporteConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.reporte'
+
+    def ready(self):
+        import app.reporte.signals  # Registrar las señales
@@ -0,0 +1,233 @@
+import atexit
+import hashlib
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import CacheGeocodificacion, ContadorCacheGeocodificacion
+
+logger = logging.getLogger(__name__)
+
+CONTADOR_ACIERTOS = 'aciertos'
+CONTADOR_FALLOS = 'fallos'
+# Un acierto solo renueva ultimo_uso si el valor guardado es más antiguo que esto
+RENOVACION_ULTIMO_USO = timedelta(hours=1)
+LARGO_MAXIMO_CLAVE = 255
+
+
+def _configuracion(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def normalizar_direccion(texto):
+    """Minúsculas, sin tildes, sin signos de puntuación y con espacios simples"""
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(caracter for caracter in texto if not unicodedata.combining(caracter))
+    texto = re.sub(r'[^\w\s]', ' ', texto.lower())
+    return ' '.join(texto.split())
+
+
+def _acotar(clave):
+    if len(clave) <= LARGO_MAXIMO_CLAVE:
+        return clave
+    prefijo = clave[:LARGO_MAXIMO_CLAVE - 41]
+    return f"{prefijo}#{hashlib.sha1(clave.encode('utf-8')).hexdigest()}"
+
+
+def cuantizar(valor):
+    """Redondea una coordenada a GEOCODIFICACION_CACHE_DECIMALES (5 decimales ≈ 1 m)"""
+    return round(float(valor), _configuracion('GEOCODIFICACION_CACHE_DECIMALES', 5))
+
+
+def clave_inversa(proveedor, latitud, longitud):
+    decimales = _configuracion('GEOCODIFICACION_CACHE_DECIMALES', 5)
+    return f"inversa:{proveedor}:{cuantizar(latitud):.{decimales}f}:{cuantizar(longitud):.{decimales}f}"
+
+
+def clave_directa(proveedor, direccion):
+    return _acotar(f"directa:{proveedor}:{normalizar_direccion(direccion)}")
+
+
+class ContadoresCache:
+    """
+    Acumula en memoria (por proceso) los aciertos/fallos y los aciertos de cada
+    entrada, y los escribe en lote (como ContadorVistas): un acierto no toma el
+    lock de escritura de la BD. Se vacía en la primera consulta que encuentra
+    vencido el intervalo, al superar el máximo pendiente y al salir el proceso.
+    """
+
+    def __init__(self, intervalo=None, maximo_pendientes=None):
+        self._intervalo = intervalo
+        self._maximo_pendientes = maximo_pendientes
+        self._lock = threading.Lock()
+        self._contadores = Counter()
+        self._aciertos_entrada = Counter()
+        self._ultimo_vaciado = time.monotonic()
+
+    @property
+    def intervalo(self):
+        if self._intervalo is not None:
+            return self._intervalo
+        return _configuracion('GEOCODIFICACION_CONTADORES_SEGUNDOS', 30)
+
+    @property
+    def maximo_pendientes(self):
+        if self._maximo_pendientes is not None:
+            return self._maximo_pendientes
+        return _configuracion('GEOCODIFICACION_CONTADORES_MAXIMO_PENDIENTES', 500)
+
+    def registrar(self, nombre, entrada_id=None):
+        with self._lock:
+            self._contadores[nombre] += 1
+            if entrada_id is not None:
+                self._aciertos_entrada[entrada_id] += 1
+            vencido = (
+                sum(self._contadores.values()) >= self.maximo_pendientes
+                or time.monotonic() - self._ultimo_vaciado >= self.intervalo
+            )
+        if vencido:
+            self.vaciar_registrando_errores()
+
+    def pendientes(self):
+        with self._lock:
+            return dict(self._contadores)
+
+    def vaciar(self):
+        """Escribe lo acumulado: un UPDATE con F() por contador y por cada cantidad distinta de aciertos"""
+        with self._lock:
+            contadores, self._contadores = self._contadores, Counter()
+            aciertos_entrada, self._aciertos_entrada = self._aciertos_entrada, Counter()
+            self._ultimo_vaciado = time.monotonic()
+        if not contadores and not aciertos_entrada:
+            return
+
+        por_cantidad = defaultdict(list)
+        for entrada_id, cantidad in aciertos_entrada.items():
+            por_cantidad[cantidad].append(entrada_id)
+        try:
+            for nombre in list(contadores):
+                _sumar_contador(nombre, contadores[nombre])
+                del contadores[nombre]
+            for cantidad, ids in por_cantidad.items():
+                CacheGeocodificacion.objects.filter(id__in=ids).update(aciertos=F('aciertos') + cantidad)
+        except Exception:
+            # Se reintentan en el próximo vaciado (los contadores ya sumados no se repiten)
+            with self._lock:
+                self._contadores.update(contadores)
+                self._aciertos_entrada.update(aciertos_entrada)
+            raise
+
+    def vaciar_registrando_errores(self):
+        try:
+            self.vaciar()
+        except Exception as e:
+            logger.error(f"Error escribiendo contadores de la caché de geocodificación: {str(e)}")
+
+
+def _sumar_contador(nombre, cantidad):
+    """UPDATE con F() sobre la fila compartida; la fila se crea la primera vez"""
+    contadores = ContadorCacheGeocodificacion.objects.filter(nombre=nombre)
+    if contadores.update(valor=F('valor') + cantidad):
+        return
+    try:
+        with transaction.atomic():
+            ContadorCacheGeocodificacion.objects.create(nombre=nombre, valor=cantidad)
+    except IntegrityError:
+        # Otro proceso creó la fila al mismo tiempo
+        contadores.update(valor=F('valor') + cantidad)
+
+
+contadores_cache = ContadoresCache()
+atexit.register(contadores_cache.vaciar_registrando_errores)
+
+
+def obtener(clave):
+    """Resultado vigente guardado para la clave, o None (registra acierto o fallo)"""
+    ahora = timezone.now()
+    ttl = timedelta(days=_configuracion('GEOCODIFICACION_CACHE_TTL_DIAS', 30))
+    entrada = (
+        CacheGeocodificacion.objects
+        .filter(clave=clave, fecha_creacion__gte=ahora - ttl)
+        .values('id', 'resultado', 'ultimo_uso')
+        .first()
+    )
+    if entrada is None:
+        contadores_cache.registrar(CONTADOR_FALLOS)
+        return None
+
+    contadores_cache.registrar(CONTADOR_ACIERTOS, entrada['id'])
+    if ahora - entrada['ultimo_uso'] > RENOVACION_ULTIMO_USO:
+        CacheGeocodificacion.objects.filter(id=entrada['id']).update(ultimo_uso=ahora)
+    return entrada['resultado']
+
+
+def guardar(clave, resultado):
+    ahora = timezone.now()
+    try:
+        entrada, _ = CacheGeocodificacion.objects.update_or_create(
+            clave=clave,
+            defaults={'resultado': resultado, 'fecha_creacion': ahora, 'ultimo_uso': ahora},
+        )
+    except IntegrityError:
+        # Otro proceso guardó la misma clave al mismo tiempo
+        return
+    if entrada.id % _configuracion('GEOCODIFICACION_CACHE_REVISION', 100) == 0:
+        desalojar()
+
+
+def con_cache(clave, calcular):
+    """
+    Retorna el resultado cacheado o lo calcula con `calcular()`. Un resultado None
+    (error del servicio) no se guarda, así se reintenta en la próxima llamada.
+    """
+    resultado = obtener(clave)
+    if resultado is None:
+        resultado = calcular()
+        if resultado is not None:
+            guardar(clave, resultado)
+    return resultado
+
+
+def desalojar():
+    """Elimina las entradas vencidas y, si sobran, las usadas hace más tiempo (LRU)"""
+    ttl = timedelta(days=_configuracion('GEOCODIFICACION_CACHE_TTL_DIAS', 30))
+    vencidas, _ = CacheGeocodificacion.objects.filter(fecha_creacion__lt=timezone.now() - ttl).delete()
+
+    maximo = _configuracion('GEOCODIFICACION_CACHE_MAX_ENTRADAS', 50000)
+    corte = (
+        CacheGeocodificacion.objects.order_by('-ultimo_uso', '-id')
+        .values_list('ultimo_uso', 'id')[maximo:maximo + 1]
+        .first()
+    )
+    excedentes = 0
+    if corte:
+        # La entrada en la posición `maximo` y todas las usadas antes que ella
+        ultimo_uso, entrada_id = corte
+        excedentes, _ = CacheGeocodificacion.objects.filter(
+            Q(ultimo_uso__lt=ultimo_uso) | Q(ultimo_uso=ultimo_uso, id__lte=entrada_id)
+        ).delete()
+    return vencidas + excedentes
+
+
+def estadisticas():
+    # Lo acumulado en este proceso se escribe antes de leer el total
+    contadores_cache.vaciar()
+    contadores = dict(ContadorCacheGeocodificacion.objects.values_list('nombre', 'valor'))
+    aciertos = contadores.get(CONTADOR_ACIERTOS, 0)
+    fallos = contadores.get(CONTADOR_FALLOS, 0)
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else 0.0,
+        'entradas': CacheGeocodificacion.objects.count(),
+    }
@@ -0,0 +1,138 @@
+import logging
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from web.services import cache_dashboard
+
+from .geocodificadores import geocodificar_inverso
+from .models import ReporteColaborativo, TareaGeocodificacion
+from .snapshot_incidentes import snapshot_incidentes
+
+logger = logging.getLogger(__name__)
+
+
+def _configuracion(nombre, defecto):
+    return getattr(settings, nombre, defecto)
+
+
+def _disponibles(ahora):
+    # 'procesando' con proximo_intento vencido = trabajador caído: la tarea se puede retomar
+    return Q(estado__in=['pendiente', 'procesando'], proximo_intento__lte=ahora)
+
+
+def calcular_espera(intentos):
+    """Backoff exponencial con variación aleatoria (±20%) para no reintentar en bloque"""
+    base = _configuracion('GEOCODIFICACION_BACKOFF_BASE', 30)
+    maximo = _configuracion('GEOCODIFICACION_BACKOFF_MAX', 3600)
+    espera = min(base * 2 ** max(intentos - 1, 0), maximo)
+    return timedelta(seconds=espera * random.uniform(0.8, 1.2))
+
+
+def reclamar_tareas(lote):
+    """
+    Reclama hasta `lote` tareas disponibles para este trabajador. El UPDATE vuelve a
+    evaluar la condición, así dos trabajadores nunca se quedan con la misma tarea.
+    """
+    ahora = timezone.now()
+    ids = list(
+        TareaGeocodificacion.objects.filter(_disponibles(ahora))
+        .order_by('proximo_intento')
+        .values_list('id', flat=True)[:lote]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4().hex
+    bloqueo = timedelta(seconds=_configuracion('GEOCODIFICACION_BLOQUEO', 300))
+    TareaGeocodificacion.objects.filter(_disponibles(ahora), id__in=ids).update(
+        estado='procesando',
+        token_trabajador=token,
+        proximo_intento=ahora + bloqueo,
+        fecha_actualizacion=ahora,
+    )
+    return list(
+        TareaGeocodificacion.objects.filter(token_trabajador=token, estado='procesando')
+        .select_related('reporte')
+    )
+
+
+def procesar_tarea(tarea):
+    """
+    Geocodifica el reporte de la tarea y completa solo los campos que siguen vacíos.
+
+    Returns:
+        str: estado final de la tarea ('completada', 'pendiente' o 'fallida').
+    """
+    reporte = tarea.reporte
+    info = geocodificar_inverso(reporte.latitud, reporte.longitud)
+    if "error" in info:
+        return _reprogramar(tarea, info["error"])
+
+    # update() con filtro por campo vacío: no pisa lo que el usuario haya editado entretanto.
+    # update() no dispara señales ni auto_now: se avanza fecha_actualizacion y se invalida a mano
+    ahora = timezone.now()
+    actualizados = ReporteColaborativo.objects.filter(id=reporte.id, nombre_via='').update(
+        nombre_via=info.get("calle", "Desconocido"), fecha_actualizacion=ahora
+    )
+    actualizados += ReporteColaborativo.objects.filter(id=reporte.id, distrito='').update(
+        distrito=info.get("distrito", "Desconocido"), fecha_actualizacion=ahora
+    )
+    if actualizados:
+        snapshot_incidentes.marcar_desactualizado()
+        autor_id = reporte.usuario_reportador_id
+        if autor_id:
+            transaction.on_commit(lambda: cache_dashboard.invalidar(cache_dashboard.AMBITO_REPORTES, autor_id))
+    TareaGeocodificacion.objects.filter(id=tarea.id, token_trabajador=tarea.token_trabajador).update(
+        estado='completada',
+        intentos=tarea.intentos + 1,
+        ultimo_error='',
+        fecha_actualizacion=timezone.now(),
+    )
+    return 'completada'
+
+
+def _reprogramar(tarea, error):
+    intentos = tarea.intentos + 1
+    ahora = timezone.now()
+    if intentos >= _configuracion('GEOCODIFICACION_MAX_INTENTOS', 5):
+        estado, proximo_intento = 'fallida', ahora
+        logger.warning(f"Geocodificación del reporte {tarea.reporte_id} fallida tras {intentos} intentos: {error}")
+    else:
+        estado, proximo_intento = 'pendiente', ahora + calcular_espera(intentos)
+
+    TareaGeocodificacion.objects.filter(id=tarea.id, token_trabajador=tarea.token_trabajador).update(
+        estado=estado,
+        intentos=intentos,
+        proximo_intento=proximo_intento,
+        ultimo_error=error[:1000],
+        fecha_actualizacion=ahora,
+    )
+    return estado
+
+
+def procesar_pendientes(lote=20, pausa=1.0):
+    """
+    Procesa tareas hasta vaciar las disponibles. `pausa` separa las llamadas al
+    servicio externo (Nominatim admite como máximo una solicitud por segundo).
+
+    Returns:
+        dict: cantidad de tareas por estado final.
+    """
+    resultado = {'completada': 0, 'pendiente': 0, 'fallida': 0}
+    primera = True
+    while True:
+        tareas = reclamar_tareas(lote)
+        if not tareas:
+            return resultado
+        for tarea in tareas:
+            if not primera and pausa:
+                time.sleep(pausa)
+            primera = False
+            resultado[procesar_tarea(tarea)] += 1
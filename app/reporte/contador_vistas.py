@@ -0,0 +1,93 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class ContadorVistas:
+    """
+    Acumula en memoria (por proceso) las vistas de cada reporte y las escribe en
+    lote: un UPDATE ... SET views_count = views_count + n por cada n distinto, en
+    lugar de un save() por vista. El incremento lo hace la BD, así que no se
+    pierden vistas entre procesos o peticiones simultáneas.
+
+    Se vacía al terminar la primera petición que encuentra vencido el intervalo
+    (señal request_finished, después de enviar la respuesta), al superar el máximo
+    de vistas pendientes y al salir el proceso.
+    """
+
+    def __init__(self, intervalo=None, maximo_pendientes=None):
+        self._intervalo = intervalo
+        self._maximo_pendientes = maximo_pendientes
+        self._lock = threading.Lock()
+        self._pendientes = Counter()
+        self._ultimo_vaciado = time.monotonic()
+
+    @property
+    def intervalo(self):
+        if self._intervalo is not None:
+            return self._intervalo
+        return getattr(settings, 'VISTAS_VACIADO_SEGUNDOS', 10)
+
+    @property
+    def maximo_pendientes(self):
+        if self._maximo_pendientes is not None:
+            return self._maximo_pendientes
+        return getattr(settings, 'VISTAS_MAXIMO_PENDIENTES', 1000)
+
+    def registrar(self, reporte_id):
+        """Suma una vista; devuelve las que el reporte tiene pendientes de escribir"""
+        with self._lock:
+            self._pendientes[reporte_id] += 1
+            pendientes = self._pendientes[reporte_id]
+            lleno = sum(self._pendientes.values()) >= self.maximo_pendientes
+        if lleno:
+            self.vaciar()
+            return 0
+        return pendientes
+
+    def pendientes(self, reporte_id):
+        with self._lock:
+            return self._pendientes.get(reporte_id, 0)
+
+    def vaciar(self):
+        """Escribe las vistas acumuladas; devuelve cuántas se escribieron"""
+        from .models import ReporteColaborativo
+
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, Counter()
+            self._ultimo_vaciado = time.monotonic()
+        if not pendientes:
+            return 0
+
+        por_cantidad = defaultdict(list)
+        for reporte_id, cantidad in pendientes.items():
+            por_cantidad[cantidad].append(reporte_id)
+        try:
+            for cantidad, ids in por_cantidad.items():
+                ReporteColaborativo.objects.filter(id__in=ids).update(views_count=F('views_count') + cantidad)
+        except Exception:
+            # Se reintentan en el próximo vaciado
+            with self._lock:
+                self._pendientes.update(pendientes)
+            raise
+        return sum(pendientes.values())
+
+    def vaciar_si_corresponde(self, **kwargs):
+        if self._pendientes and time.monotonic() - self._ultimo_vaciado >= self.intervalo:
+            try:
+                self.vaciar()
+            except Exception as e:
+                logger.error(f"Error escribiendo vistas de reportes: {str(e)}")
+
+
+contador_vistas = ContadorVistas()
+request_finished.connect(contador_vistas.vaciar_si_corresponde, dispatch_uid='contador_vistas')
+atexit.register(contador_vistas.vaciar)
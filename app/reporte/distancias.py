@@ -0,0 +1,63 @@
+import numpy as np
+
+# Radio de la Tierra en km (mismo valor que ReporteColaborativo.get_distance_from)
+RADIO_TIERRA_KM = 6371
+
+
+def a_arreglo(valores):
+    """Convierte una secuencia de coordenadas (Decimal, float o str) a un arreglo float64"""
+    if isinstance(valores, np.ndarray) and valores.dtype == np.float64:
+        return valores
+    return np.fromiter((float(v) for v in valores), dtype=np.float64)
+
+
+def _haversine(lat1, lng1, lat2, lng2, decimales):
+    """Distancia Haversine (en km) entre arreglos en radianes; admite broadcasting"""
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng / 2) ** 2
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    distancias = c * RADIO_TIERRA_KM
+    if decimales is not None:
+        distancias = np.round(distancias, decimales)
+    return distancias
+
+
+def matriz_distancias(latitudes, longitudes, consultas_lat, consultas_lng, decimales=2):
+    """
+    Calcula en una sola pasada vectorizada las distancias Haversine (en km)
+    entre N reportes y M puntos de consulta.
+
+    Returns:
+        np.ndarray: matriz de forma (M, N); fila i = distancias desde la consulta i.
+    """
+    lat1 = np.radians(a_arreglo(latitudes))[np.newaxis, :]
+    lng1 = np.radians(a_arreglo(longitudes))[np.newaxis, :]
+    lat2 = np.radians(np.atleast_1d(a_arreglo(np.atleast_1d(consultas_lat))))[:, np.newaxis]
+    lng2 = np.radians(np.atleast_1d(a_arreglo(np.atleast_1d(consultas_lng))))[:, np.newaxis]
+    return _haversine(lat1, lng1, lat2, lng2, decimales)
+
+
+def distancias_por_pares(latitudes1, longitudes1, latitudes2, longitudes2, decimales=2):
+    """Distancia (en km) entre el punto i de la primera lista y el punto i de la segunda"""
+    return _haversine(
+        np.radians(a_arreglo(latitudes1)), np.radians(a_arreglo(longitudes1)),
+        np.radians(a_arreglo(latitudes2)), np.radians(a_arreglo(longitudes2)),
+        decimales,
+    )
+
+
+def distancias_desde(latitudes, longitudes, lat, lng, decimales=2):
+    """Distancias (en km) desde un único punto a cada reporte, como arreglo de N elementos"""
+    return matriz_distancias(latitudes, longitudes, [lat], [lng], decimales)[0]
+
+
+def indices_dentro_del_radio(distancias, radio_km):
+    """
+    Índices de los elementos con distancia <= radio, ordenados por distancia.
+    El orden es estable: los empates conservan el orden original.
+    """
+    candidatos = np.flatnonzero(distancias <= radio_km)
+    orden = np.argsort(distancias[candidatos], kind='stable')
+    return candidatos[orden]
@@ -0,0 +1,115 @@
+"""
+Mantenimiento incremental de EstadisticasUsuario.
+
+Cada reporte activo contribuye a la fila de su autor con: 1 al total, 1 a
+validados o pendientes según su estado, su credibilidad (si tiene votos) y 1 a
+su tipo. Al guardar un reporte se resta la
+contribución que tenía en la BD y se suma la nueva; al eliminarlo solo se resta.
+Si no se conoce la contribución anterior (instancia creada a mano o cargada con
+campos diferidos) o el usuario aún no tiene fila, se recalcula desde cero.
+Los reportes recientes dependen de la hora de lectura y se cuentan al leer.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import EstadisticasUsuario, ReporteColaborativo, porcentaje_votos_positivos
+
+
+def valores_actuales(reporte):
+    return {campo: getattr(reporte, campo) for campo in ReporteColaborativo.CAMPOS_ESTADISTICAS}
+
+
+def contribucion(valores):
+    """Aporte de un reporte a las estadísticas de su autor, o None si no aporta"""
+    if not valores or not valores['is_active'] or not valores['usuario_reportador_id']:
+        return None
+    total_votos = valores['votos_positivos'] + valores['votos_negativos']
+    return {
+        'usuario_id': valores['usuario_reportador_id'],
+        'validado': valores['estado_reporte'] == 'probado',
+        'pendiente': valores['estado_reporte'] == 'pendiente',
+        'con_votos': total_votos > 0,
+        'credibilidad': valores['votos_positivos'] * 100 / total_votos if total_votos else 0.0,
+        'tipo': valores['tipo_incidente'],
+    }
+
+
+def registrar_cambio(anterior, nueva):
+    """Aplica a las filas afectadas la diferencia entre dos contribuciones"""
+    if anterior == nueva:
+        return
+    cambios = [(c, -1) for c in (anterior,) if c] + [(c, 1) for c in (nueva,) if c]
+    with transaction.atomic():
+        for usuario_id in sorted({c['usuario_id'] for c, _ in cambios}):
+            fila = EstadisticasUsuario.objects.select_for_update().filter(usuario_id=usuario_id).first()
+            if fila is None:
+                # Sin fila (usuario con reportes previos a la tabla): una fila en cero
+                # más este cambio no reflejaría el resto; se calcula completa, ya con el cambio
+                recalcular(usuario_id)
+                continue
+            for aporte, signo in cambios:
+                if aporte['usuario_id'] == usuario_id:
+                    _aplicar(fila, aporte, signo)
+            fila.save()
+
+
+def _aplicar(fila, aporte, signo):
+    fila.total_reportes += signo
+    fila.reportes_validados += signo * aporte['validado']
+    fila.reportes_pendientes += signo * aporte['pendiente']
+    if aporte['con_votos']:
+        fila.reportes_con_votos += signo
+        fila.suma_credibilidad += signo * aporte['credibilidad']
+    fila.promedio_credibilidad = (
+        fila.suma_credibilidad / fila.reportes_con_votos if fila.reportes_con_votos > 0 else 0.0
+    )
+    _sumar(fila.reportes_por_tipo, aporte['tipo'], signo)
+
+
+def _sumar(conteos, clave, signo):
+    conteos[clave] = conteos.get(clave, 0) + signo
+    if conteos[clave] <= 0:
+        del conteos[clave]
+
+
+def recalcular(usuario_id):
+    """Reconstruye la fila del usuario a partir de sus reportes activos"""
+    reportes = ReporteColaborativo.objects.filter(usuario_reportador_id=usuario_id, is_active=True).order_by()
+    fila = reportes.aggregate(
+        total_reportes=Count('id'),
+        reportes_validados=Count('id', filter=Q(estado_reporte='probado')),
+        reportes_pendientes=Count('id', filter=Q(estado_reporte='pendiente')),
+        reportes_con_votos=Count('id', filter=Q(votos_positivos__gt=0) | Q(votos_negativos__gt=0)),
+        suma_credibilidad=Sum(porcentaje_votos_positivos()),
+    )
+    fila['suma_credibilidad'] = fila['suma_credibilidad'] or 0.0
+    fila['promedio_credibilidad'] = (
+        fila['suma_credibilidad'] / fila['reportes_con_votos'] if fila['reportes_con_votos'] else 0.0
+    )
+    fila['reportes_por_tipo'] = dict(
+        reportes.values_list('tipo_incidente').annotate(cantidad=Count('id'))
+    )
+
+    estadisticas, _ = EstadisticasUsuario.objects.update_or_create(usuario_id=usuario_id, defaults=fila)
+    return estadisticas
+
+
+def obtener(usuario_id):
+    """Fila de estadísticas del usuario; se construye la primera vez que se pide"""
+    estadisticas = EstadisticasUsuario.objects.filter(usuario_id=usuario_id).first()
+    return estadisticas if estadisticas is not None else recalcular(usuario_id)
+
+
+def reportes_recientes(usuario_id, dias):
+    """
+    Reportes activos del usuario creados en las últimas `dias` * 24 horas
+    (ventana móvil); usa el índice (usuario_reportador, fecha_creacion, id).
+    """
+    return ReporteColaborativo.objects.filter(
+        usuario_reportador_id=usuario_id,
+        is_active=True,
+        fecha_creacion__gte=timezone.now() - timedelta(days=dias),
+    ).count()
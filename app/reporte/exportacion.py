@@ -0,0 +1,205 @@
+"""
+Exportación masiva de reportes para análisis: CSV, NDJSON, columnas NumPy (.npz)
+y, si pyarrow está instalado, Arrow IPC (stream).
+
+Todas leen la consulta con values_list().iterator(chunk_size) y producen la salida
+por bloques, así la memoria no depende de cuántos reportes haya:
+
+- CSV / NDJSON / Arrow: generadores de fragmentos (str o bytes) listos para una
+  StreamingHttpResponse o para escribir a un archivo.
+- NPZ: cada columna se va escribiendo a un archivo temporal y al final se arma el
+  .npz (un .npy por columna). Los textos de pocas variantes (tipo, estado,
+  distrito, vía) van como códigos enteros más un arreglo '<columna>__categorias';
+  título y descripción no se incluyen (texto libre, sin uso en columnas).
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import zipfile
+from itertools import islice
+
+import numpy as np
+
+CHUNK_POR_DEFECTO = 2000
+
+CAMPOS = (
+    'id', 'titulo', 'descripcion', 'tipo_incidente', 'estado_reporte', 'nivel_peligro',
+    'latitud', 'longitud', 'nombre_via', 'distrito', 'votos_positivos', 'votos_negativos',
+    'views_count', 'is_active', 'usuario_reportador_id', 'fecha_creacion', 'fecha_actualizacion',
+)
+
+# Columnas del formato binario: (campo, dtype) o (campo, None) para categorías
+COLUMNAS = (
+    ('id', np.int64),
+    ('tipo_incidente', None),
+    ('estado_reporte', None),
+    ('nivel_peligro', np.int8),
+    ('latitud', np.float64),
+    ('longitud', np.float64),
+    ('nombre_via', None),
+    ('distrito', None),
+    ('votos_positivos', np.int32),
+    ('votos_negativos', np.int32),
+    ('views_count', np.int32),
+    ('is_active', np.bool_),
+    ('usuario_reportador_id', np.int64),
+    ('fecha_creacion', np.dtype('datetime64[us]')),  # UTC
+    ('fecha_actualizacion', np.dtype('datetime64[us]')),
+)
+
+FORMATOS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'npz': ('application/octet-stream', 'npz'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+
+def lotes(reportes, campos, chunk=CHUNK_POR_DEFECTO):
+    """Listas de tuplas (en el orden de `campos`) de a lo sumo `chunk` reportes"""
+    filas = reportes.order_by('id').values_list(*campos).iterator(chunk_size=chunk)
+    while True:
+        lote = list(islice(filas, chunk))
+        if not lote:
+            return
+        yield lote
+
+
+def _valor_texto(valor):
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return valor
+
+
+def exportar_csv(reportes, chunk=CHUNK_POR_DEFECTO):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CAMPOS)
+    for lote in lotes(reportes, CAMPOS, chunk):
+        writer.writerows([[_valor_texto(valor) for valor in fila] for fila in lote])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _json(valor):
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return float(valor)  # Decimal de latitud/longitud
+
+
+def exportar_ndjson(reportes, chunk=CHUNK_POR_DEFECTO):
+    for lote in lotes(reportes, CAMPOS, chunk):
+        yield ''.join(
+            json.dumps(dict(zip(CAMPOS, fila)), ensure_ascii=False, default=_json) + '\n' for fila in lote
+        )
+
+
+def _columna(valores, campo, dtype):
+    if dtype.kind == 'M':
+        valores = [np.datetime64(valor.replace(tzinfo=None), 'us') for valor in valores]
+    elif dtype.kind == 'f':
+        valores = [float(valor) for valor in valores]
+    return np.asarray(valores, dtype=dtype)
+
+
+def exportar_npz(reportes, destino, chunk=CHUNK_POR_DEFECTO, comprimir=True):
+    """
+    Escribe el .npz en `destino` (ruta o archivo binario) y retorna la cantidad
+    de reportes. Las fechas se guardan en UTC.
+    """
+    campos = [campo for campo, _ in COLUMNAS]
+    categorias = {campo: {} for campo, dtype in COLUMNAS if dtype is None}
+    total = 0
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        archivos = {campo: open(os.path.join(carpeta, campo), 'wb') for campo in campos}
+        try:
+            for lote in lotes(reportes, campos, chunk):
+                for indice, (campo, dtype) in enumerate(COLUMNAS):
+                    valores = [fila[indice] for fila in lote]
+                    if dtype is None:
+                        codigos = categorias[campo]
+                        arreglo = np.fromiter(
+                            (codigos.setdefault(valor or '', len(codigos)) for valor in valores),
+                            dtype=np.int32, count=len(valores),
+                        )
+                    else:
+                        arreglo = _columna(valores, campo, np.dtype(dtype))
+                    archivos[campo].write(arreglo.tobytes())
+                total += len(lote)
+        finally:
+            for archivo in archivos.values():
+                archivo.close()
+
+        compresion = zipfile.ZIP_DEFLATED if comprimir else zipfile.ZIP_STORED
+        with zipfile.ZipFile(destino, 'w', compression=compresion, allowZip64=True) as zf:
+            for campo, dtype in COLUMNAS:
+                dtype = np.dtype(np.int32 if dtype is None else dtype)
+                with zf.open(f'{campo}.npy', 'w', force_zip64=True) as npy, \
+                        open(os.path.join(carpeta, campo), 'rb') as datos:
+                    np.lib.format.write_array_header_1_0(npy, {
+                        'descr': np.lib.format.dtype_to_descr(dtype),
+                        'fortran_order': False,
+                        'shape': (total,),
+                    })
+                    while bloque := datos.read(1 << 20):
+                        npy.write(bloque)
+            for campo, codigos in categorias.items():
+                with zf.open(f'{campo}__categorias.npy', 'w') as npy:
+                    np.lib.format.write_array(npy, np.array(list(codigos), dtype=str))
+    return total
+
+
+def _esquema_arrow(pa):
+    return pa.schema([
+        ('id', pa.int64()),
+        ('titulo', pa.string()),
+        ('descripcion', pa.string()),
+        ('tipo_incidente', pa.string()),
+        ('estado_reporte', pa.string()),
+        ('nivel_peligro', pa.int8()),
+        ('latitud', pa.float64()),
+        ('longitud', pa.float64()),
+        ('nombre_via', pa.string()),
+        ('distrito', pa.string()),
+        ('votos_positivos', pa.int32()),
+        ('votos_negativos', pa.int32()),
+        ('views_count', pa.int32()),
+        ('is_active', pa.bool_()),
+        ('usuario_reportador_id', pa.int64()),
+        ('fecha_creacion', pa.timestamp('us', tz='UTC')),
+        ('fecha_actualizacion', pa.timestamp('us', tz='UTC')),
+    ])
+
+
+def arrow_disponible():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def exportar_arrow(reportes, chunk=CHUNK_POR_DEFECTO):
+    """Arrow IPC en formato stream, un RecordBatch por bloque (requiere pyarrow)"""
+    import pyarrow as pa
+
+    esquema = _esquema_arrow(pa)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, esquema) as writer:
+        for lote in lotes(reportes, CAMPOS, chunk):
+            columnas = list(zip(*lote))
+            columnas[6] = [float(valor) for valor in columnas[6]]
+            columnas[7] = [float(valor) for valor in columnas[7]]
+            writer.write_batch(pa.record_batch(
+                [pa.array(valores, type=campo.type) for valores, campo in zip(columnas, esquema)],
+                schema=esquema,
+            ))
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
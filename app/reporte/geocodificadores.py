@@ -0,0 +1,268 @@
+"""
+Backends de geocodificación intercambiables, elegidos en settings.GEOCODIFICADORES:
+
+    GEOCODIFICADORES = {
+        'default': {
+            'BACKEND': 'app.reporte.geocodificadores.GeocodificadorNominatim',
+            'OPCIONES': {'timeout': 10},
+        },
+    }
+
+Cada backend se instancia la primera vez que se usa y las bibliotecas de red se
+importan recién al hacer una consulta: importar este módulo (o los modelos) no
+hace I/O.
+"""
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .cache_geocodificacion import clave_directa, clave_inversa, con_cache
+
+CONFIGURACION_POR_DEFECTO = {
+    'default': {
+        'BACKEND': 'app.reporte.geocodificadores.GeocodificadorNominatim',
+        'OPCIONES': {'timeout': 10},
+    },
+}
+
+_instancias = {}
+
+
+class Geocodificador(ABC):
+    """
+    Interfaz de los backends. Las respuestas son diccionarios; ante una falla
+    contienen solo la llave 'error'.
+
+    inverso -> {'calle', 'distrito', 'etiqueta'}
+    directo -> {'lat', 'lng'}
+    """
+
+    nombre = 'base'
+    # Los resultados se guardan en CacheGeocodificacion
+    usar_cache = True
+
+    def __init__(self, timeout=10, **opciones):
+        self.timeout = timeout
+        self.opciones = opciones
+
+    @abstractmethod
+    def inverso(self, latitud, longitud):
+        pass
+
+    @abstractmethod
+    def directo(self, direccion):
+        pass
+
+    def _get(self, url, params, headers):
+        import requests
+
+        return requests.get(url, params=params, headers=headers, timeout=self.timeout)
+
+
+class GeocodificadorNominatim(Geocodificador):
+    nombre = 'nominatim'
+    URL = 'https://nominatim.openstreetmap.org'
+
+    def __init__(self, timeout=10, user_agent='mi-aplicacion-ejemplo', **opciones):
+        super().__init__(timeout, **opciones)
+        self.headers = {"User-Agent": user_agent}
+
+    def inverso(self, latitud, longitud):
+        params = {
+            "format": "json",
+            "lat": latitud,
+            "lon": longitud,
+            "zoom": 20,
+            "addressdetails": 1
+        }
+        response = self._get(f"{self.URL}/reverse", params, self.headers)
+        if response.status_code != 200:
+            return {"error": f"Error en la solicitud: {response.status_code}"}
+
+        data = response.json()
+        address = data.get("address", {})
+
+        calle = address.get("road") or address.get("pedestrian") or address.get("footway") or "Calle no encontrada"
+
+        # Buscar posibles campos que contienen el distrito
+        distrito_raw = (
+            address.get("city_district") or
+            address.get("suburb") or
+            address.get("town") or
+            address.get("village") or
+            address.get("city") or
+            "Distrito no encontrado"
+        )
+
+        # Si contiene " de ", probablemente es una urbanización: nos quedamos con lo último
+        if " de " in distrito_raw.lower():
+            distrito = distrito_raw.split(" de ")[-1]
+        else:
+            distrito = distrito_raw
+
+        return {
+            "calle": calle,
+            "distrito": distrito.strip(),
+            "etiqueta": data.get("display_name") or f"{calle}, {distrito.strip()}",
+        }
+
+    def directo(self, direccion):
+        params = {"format": "json", "q": direccion, "limit": 1}
+        response = self._get(f"{self.URL}/search", params, self.headers)
+        if response.status_code != 200:
+            return {"error": f"Error en la solicitud: {response.status_code}"}
+        resultados = response.json()
+        if not resultados:
+            return {"error": "Dirección no encontrada"}
+        return {"lat": float(resultados[0]["lat"]), "lng": float(resultados[0]["lon"])}
+
+
+class GeocodificadorORS(Geocodificador):
+    nombre = 'ors'
+    URL = 'https://api.openrouteservice.org/geocode'
+
+    def __init__(self, timeout=10, api_key=None, **opciones):
+        super().__init__(timeout, **opciones)
+        self.api_key = api_key
+
+    def _consultar(self, ruta, params):
+        if not self.api_key:
+            return None, {"error": "ORS_API_KEY no configurada"}
+        try:
+            response = self._get(f"{self.URL}/{ruta}", dict(params, size=1, lang='es'), {'Authorization': self.api_key})
+            response.raise_for_status()
+            return response.json()["features"][0], None
+        except Exception as e:
+            return None, {"error": f"Error ORS ({ruta}): {e}"}
+
+    def inverso(self, latitud, longitud):
+        feature, error = self._consultar('reverse', {'point.lat': latitud, 'point.lon': longitud})
+        if error:
+            return error
+        propiedades = feature["properties"]
+        return {
+            "calle": propiedades.get("street") or propiedades.get("name") or "Calle no encontrada",
+            "distrito": propiedades.get("locality") or propiedades.get("county") or "Distrito no encontrado",
+            "etiqueta": propiedades["label"],
+        }
+
+    def directo(self, direccion):
+        feature, error = self._consultar('search', {'text': direccion})
+        if error:
+            return error
+        lng, lat = feature["geometry"]["coordinates"]
+        return {"lat": lat, "lng": lng}
+
+
+class GeocodificadorSinConexion(Geocodificador):
+    """Para desarrollo, pruebas o despliegues sin salida a internet: nunca hace I/O"""
+
+    nombre = 'sin_conexion'
+    usar_cache = False
+
+    def inverso(self, latitud, longitud):
+        return {
+            "calle": "Desconocido",
+            "distrito": "Desconocido",
+            "etiqueta": f"Lat: {latitud}, Lng: {longitud}",
+        }
+
+    def directo(self, direccion):
+        return {"error": "Geocodificación directa no disponible sin conexión"}
+
+
+class GeocodificadorLocal(Geocodificador):
+    """
+    Geocodificación inversa con el índice de vías local (ver construir_indice_vias).
+    El archivo se mapea en memoria en la primera consulta; cada consulta toma
+    microsegundos, por eso no pasa por la cache persistente.
+    """
+
+    nombre = 'local'
+    usar_cache = False
+
+    def __init__(self, timeout=10, ruta=None, distancia_maxima_m=None, **opciones):
+        super().__init__(timeout, **opciones)
+        self.ruta = ruta or getattr(settings, 'GEOCODIFICACION_INDICE_VIAS', None)
+        self.distancia_maxima_m = distancia_maxima_m
+        self._indice = None
+
+    @property
+    def indice(self):
+        if self._indice is None:
+            from .indice_vias import IndiceVias
+
+            self._indice = IndiceVias(self.ruta)
+        return self._indice
+
+    def inverso(self, latitud, longitud):
+        resultado = self.indice.consultar(latitud, longitud, self.distancia_maxima_m)
+        del resultado["distancia_m"]
+        return resultado
+
+    def directo(self, direccion):
+        return {"error": "Geocodificación directa no disponible con el índice local"}
+
+
+def obtener_geocodificador(alias='default'):
+    """Instancia (única por proceso) del backend configurado con ese alias"""
+    if alias not in _instancias:
+        configuracion = getattr(settings, 'GEOCODIFICADORES', CONFIGURACION_POR_DEFECTO)
+        # Un alias sin configuración propia usa el backend 'default'
+        datos = configuracion.get(alias, configuracion['default'])
+        _instancias[alias] = import_string(datos['BACKEND'])(**datos.get('OPCIONES', {}))
+    return _instancias[alias]
+
+
+def _con_cache(geocodificador, clave, consultar):
+    if not geocodificador.usar_cache:
+        return consultar()
+
+    errores = []
+
+    def consultar_sin_errores():
+        resultado = consultar()
+        if "error" in resultado:
+            errores.append(resultado)
+            return None
+        return resultado
+
+    resultado = con_cache(clave, consultar_sin_errores)
+    return resultado if resultado is not None else errores[0]
+
+
+def geocodificar_inverso(latitud, longitud, alias='default'):
+    """{'calle', 'distrito', 'etiqueta'} de la coordenada, o {'error'}; usa la cache persistente"""
+    geocodificador = obtener_geocodificador(alias)
+    return _con_cache(
+        geocodificador,
+        clave_inversa(geocodificador.nombre, latitud, longitud),
+        lambda: _capturar(geocodificador.inverso, latitud, longitud),
+    )
+
+
+def geocodificar_directo(direccion, alias='default'):
+    """{'lat', 'lng'} de la dirección, o {'error'}; usa la cache persistente"""
+    geocodificador = obtener_geocodificador(alias)
+    return _con_cache(
+        geocodificador,
+        clave_directa(geocodificador.nombre, direccion),
+        lambda: _capturar(geocodificador.directo, direccion),
+    )
+
+
+def _capturar(metodo, *args):
+    # Timeouts y errores de conexión se reportan como cualquier otra falla
+    try:
+        return metodo(*args)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@receiver(setting_changed)
+def _reiniciar_geocodificadores(setting, **kwargs):
+    if setting == 'GEOCODIFICADORES':
+        _instancias.clear()
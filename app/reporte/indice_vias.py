@@ -0,0 +1,343 @@
+"""
+Índice local de vías y distritos para geocodificación inversa sin conexión.
+
+construir_indice() lee tramos de vías (y, opcionalmente, polígonos de distritos)
+desde GeoJSON o CSV y escribe un archivo binario compacto:
+
+    MAGIA | largo del encabezado (uint64) | encabezado JSON | arreglos alineados
+
+Los tramos se parten en piezas no más largas que una celda y se registran en
+una grilla regular (formato CSR: claves de celda ordenadas + inicios + ids), así
+la vía más cercana dentro de distancia_maxima_m siempre está en el bloque 3x3
+de la celda consultada. IndiceVias abre los arreglos con np.memmap: cargar el
+índice no copia los datos y varios procesos comparten las mismas páginas.
+"""
+import csv
+import json
+import os
+from math import cos, radians
+
+import numpy as np
+
+MAGIA = b'INDICEVIAS1\n'
+ALINEACION = 64
+METROS_POR_GRADO = 111320.0
+CALLE_NO_ENCONTRADA = "Calle no encontrada"
+DISTRITO_NO_ENCONTRADO = "Distrito no encontrado"
+
+# Propiedades reconocidas en los GeoJSON (la primera presente gana)
+PROPIEDADES_NOMBRE = ('nombre', 'name', 'nombre_via')
+PROPIEDADES_DISTRITO = ('distrito', 'district', 'city_district')
+
+
+class IndiceViasError(Exception):
+    """Archivo de entrada o de índice inválido"""
+
+
+def _propiedad(propiedades, llaves):
+    for llave in llaves:
+        valor = (propiedades or {}).get(llave)
+        if valor:
+            return str(valor).strip()
+    return ''
+
+
+def leer_geojson(ruta):
+    """
+    Returns:
+        tuple: (tramos, distritos). tramos = [(lat1, lng1, lat2, lng2, nombre, distrito)],
+        distritos = [(nombre, [anillo, ...])] con anillos de (lat, lng).
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+    features = datos.get('features', [datos] if datos.get('type') == 'Feature' else [])
+
+    tramos, distritos = [], []
+    for feature in features:
+        geometria = feature.get('geometry') or {}
+        propiedades = feature.get('properties')
+        tipo, coordenadas = geometria.get('type'), geometria.get('coordinates')
+        if tipo in ('LineString', 'MultiLineString'):
+            nombre = _propiedad(propiedades, PROPIEDADES_NOMBRE)
+            if not nombre:
+                continue
+            distrito = _propiedad(propiedades, PROPIEDADES_DISTRITO)
+            lineas = [coordenadas] if tipo == 'LineString' else coordenadas
+            for linea in lineas:
+                # GeoJSON usa el orden (lng, lat)
+                for (lng1, lat1, *_), (lng2, lat2, *_) in zip(linea, linea[1:]):
+                    tramos.append((lat1, lng1, lat2, lng2, nombre, distrito))
+        elif tipo in ('Polygon', 'MultiPolygon'):
+            nombre = _propiedad(propiedades, PROPIEDADES_DISTRITO + PROPIEDADES_NOMBRE)
+            if not nombre:
+                continue
+            poligonos = [coordenadas] if tipo == 'Polygon' else coordenadas
+            anillos = [[(lat, lng) for lng, lat, *_ in anillo] for poligono in poligonos for anillo in poligono]
+            distritos.append((nombre, anillos))
+    return tramos, distritos
+
+
+def leer_csv(ruta):
+    """Un tramo por fila: lat1, lng1, lat2, lng2, nombre[, distrito]"""
+    tramos = []
+    with open(ruta, encoding='utf-8', newline='') as archivo:
+        for fila in csv.DictReader(archivo):
+            try:
+                tramos.append((
+                    float(fila['lat1']), float(fila['lng1']), float(fila['lat2']), float(fila['lng2']),
+                    fila['nombre'].strip(), (fila.get('distrito') or '').strip(),
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                raise IndiceViasError(f"Fila inválida en {ruta}: {fila}") from e
+    return tramos, []
+
+
+def leer_entrada(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension in ('.geojson', '.json'):
+        return leer_geojson(ruta)
+    if extension == '.csv':
+        return leer_csv(ruta)
+    raise IndiceViasError(f"Formato no soportado: {ruta} (use .geojson, .json o .csv)")
+
+
+def _catalogo(valores):
+    """(lista de valores únicos, índice de cada valor en la lista)"""
+    unicos, indices = np.unique(np.asarray(valores, dtype=object).astype(str), return_inverse=True)
+    return unicos.tolist(), indices.astype(np.int32)
+
+
+def construir_indice(tramos, distritos, ruta_salida, celda_m=150):
+    """
+    Escribe el índice binario en ruta_salida.
+
+    Returns:
+        dict: cantidad de tramos, piezas, celdas y distritos indexados.
+    """
+    if not tramos:
+        raise IndiceViasError("No hay tramos de vías para indexar")
+
+    lat1, lng1, lat2, lng2 = (np.array([t[k] for t in tramos], dtype=np.float64) for k in range(4))
+    nombres, via = _catalogo([t[4] for t in tramos])
+    nombres_distrito = sorted({t[5] for t in tramos if t[5]} | {nombre for nombre, _ in distritos})
+    posicion_distrito = {nombre: i for i, nombre in enumerate(nombres_distrito)}
+    distrito_tramo = np.array([posicion_distrito.get(t[5], -1) for t in tramos], dtype=np.int32)
+
+    # Proyección equirectangular local con la latitud de referencia redondeada al grado
+    lat_referencia = round(float(np.median(np.concatenate([lat1, lat2]))))
+    escala_lng = cos(radians(lat_referencia))
+    celda_lat = celda_m / METROS_POR_GRADO
+    celda_lng = celda_lat / escala_lng
+
+    # Partir cada tramo en piezas más cortas que una celda: cada pieza toca a lo sumo 2x2 celdas
+    largo_m = np.hypot((lat2 - lat1) * METROS_POR_GRADO, (lng2 - lng1) * METROS_POR_GRADO * escala_lng)
+    partes = np.maximum(np.ceil(largo_m / celda_m), 1).astype(np.int64)
+    origen = np.repeat(np.arange(len(tramos)), partes)
+    inicio_parte = np.arange(len(origen)) - np.repeat(np.cumsum(partes) - partes, partes)
+    t0 = inicio_parte / partes[origen]
+    t1 = (inicio_parte + 1) / partes[origen]
+    piezas = np.stack([
+        lat1[origen] + (lat2 - lat1)[origen] * t0, lng1[origen] + (lng2 - lng1)[origen] * t0,
+        lat1[origen] + (lat2 - lat1)[origen] * t1, lng1[origen] + (lng2 - lng1)[origen] * t1,
+    ], axis=1)
+
+    def celda(lat, lng):
+        return np.floor(lat / celda_lat).astype(np.int64), np.floor(lng / celda_lng).astype(np.int64)
+
+    cy0, cx0 = celda(piezas[:, 0], piezas[:, 1])
+    cy1, cx1 = celda(piezas[:, 2], piezas[:, 3])
+    ids_pieza = np.arange(len(piezas), dtype=np.int64)
+    candidatas = np.concatenate([
+        np.stack([_clave(cy, cx), ids_pieza], axis=1)
+        for cy in (np.minimum(cy0, cy1), np.maximum(cy0, cy1))
+        for cx in (np.minimum(cx0, cx1), np.maximum(cx0, cx1))
+    ])
+    candidatas = np.unique(candidatas, axis=0)
+    claves, inicios = np.unique(candidatas[:, 0], return_index=True)
+
+    arreglos = {
+        'piezas': piezas.astype(np.float64),
+        'via': via[origen],
+        'distrito': distrito_tramo[origen],
+        'claves': claves.astype(np.int64),
+        'inicios': np.append(inicios, len(candidatas)).astype(np.int64),
+        'miembros': candidatas[:, 1].astype(np.int32),
+    }
+    arreglos.update(_arreglos_distritos(distritos, posicion_distrito))
+
+    encabezado = {
+        'celda_m': celda_m,
+        'celda_lat': celda_lat,
+        'celda_lng': celda_lng,
+        'lat_referencia': lat_referencia,
+        'nombres': nombres,
+        'distritos': nombres_distrito,
+        'arreglos': {},
+    }
+    _escribir(ruta_salida, encabezado, arreglos)
+    return {
+        'tramos': len(tramos),
+        'piezas': len(piezas),
+        'celdas': len(claves),
+        'distritos': len(distritos),
+    }
+
+
+def _clave(cy, cx):
+    return cy * (2 ** 32) + (cx + 2 ** 31)
+
+
+def _arreglos_distritos(distritos, posicion_distrito):
+    """Vértices de todos los anillos concatenados, con el rango y el distrito de cada anillo"""
+    vertices, limites, distrito_anillo = [], [0], []
+    for nombre, anillos in distritos:
+        for anillo in anillos:
+            vertices.extend(anillo)
+            limites.append(len(vertices))
+            distrito_anillo.append(posicion_distrito[nombre])
+    vertices = np.array(vertices, dtype=np.float64).reshape(-1, 2)
+    limites = np.array(limites, dtype=np.int64)
+    distrito_anillo = np.array(distrito_anillo, dtype=np.int32)
+
+    cajas = np.empty((len(distrito_anillo), 4), dtype=np.float64)
+    for k in range(len(distrito_anillo)):
+        anillo = vertices[limites[k]:limites[k + 1]]
+        cajas[k] = (*anillo.min(axis=0), *anillo.max(axis=0))
+    return {
+        'vertices': vertices,
+        'limites_anillo': limites,
+        'distrito_anillo': distrito_anillo,
+        'cajas_anillo': cajas,
+    }
+
+
+def _escribir(ruta, encabezado, arreglos):
+    # Primero se calculan los desplazamientos con un encabezado de tamaño fijo
+    desplazamiento = 0
+    for nombre, arreglo in arreglos.items():
+        encabezado['arreglos'][nombre] = [arreglo.dtype.str, list(arreglo.shape), desplazamiento]
+        desplazamiento += -(-arreglo.nbytes // ALINEACION) * ALINEACION
+    texto = json.dumps(encabezado, ensure_ascii=False).encode('utf-8')
+    inicio_datos = -(-(len(MAGIA) + 8 + len(texto)) // ALINEACION) * ALINEACION
+
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'wb') as archivo:
+        archivo.write(MAGIA)
+        archivo.write(np.uint64(len(texto)).tobytes())
+        archivo.write(texto)
+        for nombre, arreglo in arreglos.items():
+            archivo.seek(inicio_datos + encabezado['arreglos'][nombre][2])
+            archivo.write(np.ascontiguousarray(arreglo).tobytes())
+        archivo.truncate(inicio_datos + desplazamiento)
+    # Reemplazo atómico: los procesos con el índice anterior mapeado no se ven afectados
+    os.replace(temporal, ruta)
+
+
+class IndiceVias:
+    """Índice mapeado en memoria; consultar() resuelve calle y distrito de una coordenada"""
+
+    def __init__(self, ruta):
+        try:
+            with open(ruta, 'rb') as archivo:
+                if archivo.read(len(MAGIA)) != MAGIA:
+                    raise IndiceViasError(f"{ruta} no es un índice de vías")
+                largo = int(np.frombuffer(archivo.read(8), dtype=np.uint64)[0])
+                encabezado = json.loads(archivo.read(largo).decode('utf-8'))
+        except OSError as e:
+            raise IndiceViasError(f"No se pudo abrir el índice de vías {ruta}: {e}") from e
+
+        inicio_datos = -(-(len(MAGIA) + 8 + largo) // ALINEACION) * ALINEACION
+        self.ruta = ruta
+        self.celda_m = encabezado['celda_m']
+        self.celda_lat = encabezado['celda_lat']
+        self.celda_lng = encabezado['celda_lng']
+        self.escala_lng = cos(radians(encabezado['lat_referencia']))
+        self.nombres = encabezado['nombres']
+        self.distritos = encabezado['distritos']
+        for nombre, (dtype, forma, desplazamiento) in encabezado['arreglos'].items():
+            if 0 in forma:
+                arreglo = np.empty(forma, dtype=dtype)
+            else:
+                arreglo = np.memmap(ruta, dtype=dtype, mode='r', offset=inicio_datos + desplazamiento, shape=tuple(forma))
+            setattr(self, nombre, arreglo)
+
+        desplazamientos = np.array([-1, 0, 1], dtype=np.int64)
+        self._vecindario = (desplazamientos[:, None] * (2 ** 32) + desplazamientos[None, :]).ravel()
+
+    def consultar(self, latitud, longitud, distancia_maxima_m=None):
+        """
+        Returns:
+            dict: {'calle', 'distrito', 'etiqueta', 'distancia_m'}; calle es
+            CALLE_NO_ENCONTRADA si no hay una vía a menos de distancia_maxima_m
+            (por defecto, el tamaño de celda con que se construyó el índice).
+        """
+        latitud, longitud = float(latitud), float(longitud)
+        distancia_maxima_m = min(distancia_maxima_m or self.celda_m, self.celda_m)
+
+        pieza, distancia = self._pieza_mas_cercana(latitud, longitud)
+        if pieza is not None and distancia <= distancia_maxima_m:
+            calle = self.nombres[self.via[pieza]]
+            indice_distrito = self._distrito_en(latitud, longitud)
+            if indice_distrito < 0:
+                indice_distrito = int(self.distrito[pieza])
+        else:
+            calle, distancia = CALLE_NO_ENCONTRADA, None
+            indice_distrito = self._distrito_en(latitud, longitud)
+
+        distrito = self.distritos[indice_distrito] if indice_distrito >= 0 else DISTRITO_NO_ENCONTRADO
+        return {
+            "calle": calle,
+            "distrito": distrito,
+            "etiqueta": f"{calle}, {distrito}",
+            "distancia_m": distancia,
+        }
+
+    def _pieza_mas_cercana(self, latitud, longitud):
+        clave = _clave(int(np.floor(latitud / self.celda_lat)), int(np.floor(longitud / self.celda_lng)))
+        buscadas = clave + self._vecindario
+        posiciones = np.searchsorted(self.claves, buscadas)
+        existe = posiciones < len(self.claves)
+        existe[existe] = self.claves[posiciones[existe]] == buscadas[existe]
+        posiciones = posiciones[existe]
+        if not len(posiciones):
+            return None, None
+        candidatas = np.unique(np.concatenate([
+            self.miembros[self.inicios[p]:self.inicios[p + 1]] for p in posiciones
+        ]))
+
+        # Distancia punto-segmento en metros (equirectangular local)
+        segmentos = self.piezas[candidatas]
+        ay = (segmentos[:, 0] - latitud) * METROS_POR_GRADO
+        ax = (segmentos[:, 1] - longitud) * METROS_POR_GRADO * self.escala_lng
+        by = (segmentos[:, 2] - latitud) * METROS_POR_GRADO
+        bx = (segmentos[:, 3] - longitud) * METROS_POR_GRADO * self.escala_lng
+        dy, dx = by - ay, bx - ax
+        largo2 = np.maximum(dx * dx + dy * dy, 1e-12)
+        t = np.clip(-(ax * dx + ay * dy) / largo2, 0.0, 1.0)
+        distancias = np.hypot(ax + t * dx, ay + t * dy)
+        mejor = int(np.argmin(distancias))
+        return int(candidatas[mejor]), float(distancias[mejor])
+
+    def _distrito_en(self, latitud, longitud):
+        """Distrito cuyo polígono contiene el punto (par-impar sobre sus anillos), o -1"""
+        if not len(self.distrito_anillo):
+            return -1
+        cajas = self.cajas_anillo
+        candidatos = np.flatnonzero(
+            (cajas[:, 0] <= latitud) & (latitud <= cajas[:, 2]) & (cajas[:, 1] <= longitud) & (longitud <= cajas[:, 3])
+        )
+        cruces = {}
+        for anillo in candidatos.tolist():
+            vertices = self.vertices[self.limites_anillo[anillo]:self.limites_anillo[anillo + 1]]
+            lat_a, lng_a = vertices[:, 0], vertices[:, 1]
+            lat_b, lng_b = np.roll(lat_a, -1), np.roll(lng_a, -1)
+            cruza = (lat_a > latitud) != (lat_b > latitud)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                lng_cruce = lng_a + (latitud - lat_a) * (lng_b - lng_a) / (lat_b - lat_a)
+            distrito = int(self.distrito_anillo[anillo])
+            cruces[distrito] = cruces.get(distrito, 0) + int(np.count_nonzero(cruza & (longitud < lng_cruce)))
+        dentro = [distrito for distrito, total in cruces.items() if total % 2]
+        return dentro[0] if dentro else -1
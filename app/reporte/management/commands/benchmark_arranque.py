@@ -0,0 +1,98 @@
+# Archivo: app/reporte/management/commands/benchmark_arranque.py
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Se ejecuta en un proceso nuevo: cuenta resoluciones DNS y conexiones durante el arranque
+SONDA_IMPORTACION = """
+import os, socket, sys, time
+intentos = []
+_getaddrinfo, _connect = socket.getaddrinfo, socket.socket.connect
+def getaddrinfo(host, *args, **kwargs):
+    intentos.append(host)
+    return _getaddrinfo(host, *args, **kwargs)
+def connect(self, direccion):
+    intentos.append(direccion)
+    return _connect(self, direccion)
+socket.getaddrinfo, socket.socket.connect = getaddrinfo, connect
+
+sys.path.insert(0, {base!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings!r})
+inicio = time.perf_counter()
+import django
+django.setup()
+for modulo in {modulos!r}:
+    __import__(modulo)
+print(time.perf_counter() - inicio, len(intentos))
+"""
+
+
+class Command(BaseCommand):
+    """
+    Mide el costo de arranque de un proceso de Django: el tiempo de un comando de
+    manage.py en procesos nuevos y, por separado, el tiempo de django.setup() más
+    la importación de los módulos de reportes junto con los intentos de red
+    (DNS/conexiones) que hacen al importarse. Debe ser 0.
+
+    Ejemplos de uso:
+    python manage.py benchmark_arranque
+    python manage.py benchmark_arranque --repeticiones 10 --comando showmigrations
+    """
+
+    help = 'Benchmark del arranque de procesos de manage.py e importación de app.reporte'
+
+    MODULOS = ['app.reporte.models', 'app.reporte.utils', 'app.reporte.views']
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5, help='Procesos a lanzar por medición')
+        parser.add_argument('--comando', default='check', help='Comando de manage.py a cronometrar')
+
+    def handle(self, *args, **options):
+        repeticiones = options['repeticiones']
+        if repeticiones < 1:
+            raise CommandError('--repeticiones debe ser al menos 1')
+
+        base = str(settings.BASE_DIR)
+        manage = os.path.join(base, 'manage.py')
+
+        tiempos_comando = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            subprocess.run(
+                [sys.executable, manage, options['comando']],
+                cwd=base, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False,
+            )
+            tiempos_comando.append(time.perf_counter() - inicio)
+
+        sonda = SONDA_IMPORTACION.format(
+            base=base, settings=os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'), modulos=self.MODULOS
+        )
+        tiempos_importacion, intentos_red = [], 0
+        for _ in range(repeticiones):
+            salida = subprocess.run(
+                [sys.executable, '-c', sonda], cwd=base, capture_output=True, text=True, check=True,
+            ).stdout.split()
+            tiempos_importacion.append(float(salida[-2]))
+            intentos_red = max(intentos_red, int(salida[-1]))
+
+        self.stdout.write(f"{'medición':<34} | {'media (s)':>9} | {'mín (s)':>8} | {'máx (s)':>8}")
+        self.stdout.write('-' * 70)
+        for nombre, tiempos in (
+            (f"manage.py {options['comando']}", tiempos_comando),
+            ('setup + importar app.reporte', tiempos_importacion),
+        ):
+            self.stdout.write(
+                f"{nombre:<34} | {statistics.mean(tiempos):>9.3f} | {min(tiempos):>8.3f} | {max(tiempos):>8.3f}"
+            )
+        self.stdout.write(f"Intentos de red al importar: {intentos_red}")
+
+        if intentos_red:
+            self.stdout.write(self.style.WARNING('La importación de los modelos hace I/O de red'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Benchmark finalizado: la importación no hace I/O de red'))
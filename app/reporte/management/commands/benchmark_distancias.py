@@ -0,0 +1,91 @@
+# Archivo: app/reporte/management/commands/benchmark_distancias.py
+
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from app.reporte.distancias import distancias_desde, matriz_distancias
+from app.reporte.models import ReporteColaborativo
+
+
+class Command(BaseCommand):
+    """
+    Compara el cálculo de distancias objeto por objeto (get_distance_from)
+    con el motor vectorizado de app.reporte.distancias.
+
+    Ejemplos de uso:
+    python manage.py benchmark_distancias
+    python manage.py benchmark_distancias --tamanos 10000 100000 --consultas 50
+    """
+
+    help = 'Benchmark de distancias Haversine: bucle por objeto vs. NumPy vectorizado'
+
+    # Centro de Arequipa y variación en grados para generar coordenadas
+    LAT_BASE = -16.4090
+    LNG_BASE = -71.5375
+    VARIACION = 0.08
+
+    # Instancias reutilizadas en el bucle por objeto (evita crear 1M modelos en memoria)
+    TAMANO_POOL = 10000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Cantidades de reportes a evaluar',
+        )
+        parser.add_argument(
+            '--consultas',
+            type=int,
+            default=10,
+            help='Número de puntos de consulta para la matriz de distancias',
+        )
+        parser.add_argument(
+            '--semilla',
+            type=int,
+            default=42,
+            help='Semilla para generar coordenadas reproducibles',
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['semilla'])
+        lat_consulta, lng_consulta = self.LAT_BASE, self.LNG_BASE
+
+        self.stdout.write(
+            f"{'reportes':>10} | {'bucle (s)':>10} | {'numpy (s)':>10} | {'aceleración':>11} | "
+            f"{'matriz ' + str(options['consultas']) + 'xN (s)':>18}"
+        )
+        self.stdout.write('-' * 72)
+
+        for tamano in options['tamanos']:
+            latitudes = self.LAT_BASE + rng.uniform(-self.VARIACION, self.VARIACION, tamano)
+            longitudes = self.LNG_BASE + rng.uniform(-self.VARIACION, self.VARIACION, tamano)
+
+            pool = [
+                ReporteColaborativo(latitud=latitudes[i], longitud=longitudes[i])
+                for i in range(min(tamano, self.TAMANO_POOL))
+            ]
+            inicio = time.perf_counter()
+            for i in range(tamano):
+                pool[i % len(pool)].get_distance_from(lat_consulta, lng_consulta)
+            tiempo_bucle = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            distancias_desde(latitudes, longitudes, lat_consulta, lng_consulta)
+            tiempo_numpy = time.perf_counter() - inicio
+
+            consultas_lat = self.LAT_BASE + rng.uniform(-self.VARIACION, self.VARIACION, options['consultas'])
+            consultas_lng = self.LNG_BASE + rng.uniform(-self.VARIACION, self.VARIACION, options['consultas'])
+            inicio = time.perf_counter()
+            matriz_distancias(latitudes, longitudes, consultas_lat, consultas_lng)
+            tiempo_matriz = time.perf_counter() - inicio
+
+            self.stdout.write(
+                f"{tamano:>10} | {tiempo_bucle:>10.4f} | {tiempo_numpy:>10.4f} | "
+                f"{tiempo_bucle / max(tiempo_numpy, 1e-9):>10.1f}x | {tiempo_matriz:>18.4f}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark finalizado'))
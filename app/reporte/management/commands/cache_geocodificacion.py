@@ -0,0 +1,41 @@
+# Archivo: app/reporte/management/commands/cache_geocodificacion.py
+
+from django.core.management.base import BaseCommand
+
+from app.reporte.cache_geocodificacion import desalojar, estadisticas
+
+
+class Command(BaseCommand):
+    """
+    Muestra el estado de la cache persistente de geocodificación y, con
+    --desalojar, elimina las entradas vencidas y las menos usadas por encima
+    de GEOCODIFICACION_CACHE_MAX_ENTRADAS.
+
+    Los contadores de aciertos/fallos se guardan en la BD
+    (ContadorCacheGeocodificacion): suman los de todos los procesos, cada uno
+    con hasta GEOCODIFICACION_CONTADORES_SEGUNDOS de retraso.
+
+    Ejemplos de uso:
+    python manage.py cache_geocodificacion
+    python manage.py cache_geocodificacion --desalojar
+    """
+
+    help = 'Estadísticas y mantenimiento de la cache de geocodificación'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desalojar',
+            action='store_true',
+            help='Elimina entradas vencidas y las menos usadas que excedan el máximo',
+        )
+
+    def handle(self, *args, **options):
+        if options['desalojar']:
+            eliminadas = desalojar()
+            self.stdout.write(f'Entradas eliminadas: {eliminadas}')
+
+        datos = estadisticas()
+        self.stdout.write(
+            f"Entradas: {datos['entradas']} | aciertos: {datos['aciertos']} | "
+            f"fallos: {datos['fallos']} | tasa de aciertos: {datos['tasa_aciertos']:.1%}"
+        )
@@ -0,0 +1,80 @@
+# Archivo: app/reporte/management/commands/construir_indice_vias.py
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.reporte.indice_vias import IndiceVias, IndiceViasError, construir_indice, leer_entrada
+
+
+class Command(BaseCommand):
+    """
+    Construye el índice binario de vías y distritos que usa GeocodificadorLocal.
+
+    Entradas aceptadas:
+    - GeoJSON: LineString/MultiLineString con propiedad 'nombre' (o 'name') y,
+      opcionalmente, 'distrito'; Polygon/MultiPolygon con 'distrito' (o 'nombre')
+      definen los límites de distrito.
+    - CSV: columnas lat1, lng1, lat2, lng2, nombre[, distrito] (un tramo por fila).
+
+    Ejemplos de uso:
+    python manage.py construir_indice_vias vias.geojson distritos.geojson
+    python manage.py construir_indice_vias tramos.csv --celda-m 100 --salida /srv/indice_vias.bin
+    python manage.py construir_indice_vias vias.geojson --probar -16.3989 -71.5350
+    """
+
+    help = 'Construye el índice local de vías/distritos para geocodificación sin conexión'
+
+    def add_arguments(self, parser):
+        parser.add_argument('entradas', nargs='+', help='Archivos .geojson/.json/.csv')
+        parser.add_argument(
+            '--salida',
+            default=None,
+            help='Archivo de índice (por defecto GEOCODIFICACION_INDICE_VIAS)',
+        )
+        parser.add_argument(
+            '--celda-m',
+            type=float,
+            default=150,
+            help='Tamaño de celda en metros; también es la distancia máxima a una vía',
+        )
+        parser.add_argument(
+            '--probar',
+            nargs=2,
+            type=float,
+            metavar=('LAT', 'LNG'),
+            help='Consulta una coordenada con el índice recién construido',
+        )
+
+    def handle(self, *args, **options):
+        salida = options['salida'] or settings.GEOCODIFICACION_INDICE_VIAS
+        if options['celda_m'] <= 0:
+            raise CommandError('--celda-m debe ser positivo')
+
+        tramos, distritos = [], []
+        try:
+            for ruta in options['entradas']:
+                tramos_archivo, distritos_archivo = leer_entrada(ruta)
+                tramos.extend(tramos_archivo)
+                distritos.extend(distritos_archivo)
+                self.stdout.write(f'{ruta}: {len(tramos_archivo)} tramos, {len(distritos_archivo)} distritos')
+
+            inicio = time.perf_counter()
+            resumen = construir_indice(tramos, distritos, salida, celda_m=options['celda_m'])
+        except (OSError, ValueError, IndiceViasError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Índice escrito en {salida} en {time.perf_counter() - inicio:.2f} s: "
+            f"{resumen['tramos']} tramos ({resumen['piezas']} piezas), {resumen['celdas']} celdas, "
+            f"{resumen['distritos']} distritos"
+        ))
+
+        if options['probar']:
+            latitud, longitud = options['probar']
+            indice = IndiceVias(salida)
+            inicio = time.perf_counter()
+            resultado = indice.consultar(latitud, longitud)
+            microsegundos = (time.perf_counter() - inicio) * 1e6
+            self.stdout.write(f"{latitud}, {longitud} -> {resultado['etiqueta']} ({microsegundos:.0f} µs)")
@@ -0,0 +1,82 @@
+# Archivo: app/reporte/management/commands/exportar_reportes.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.reporte import exportacion
+from app.repositorio.reporte.reporteColaborativoRepositoryImpl import ReporteColaborativoRepositoryImpl
+
+
+class Command(BaseCommand):
+    """
+    Exporta reportes para análisis sin pasar por las pantallas de administración.
+    Lee la BD por bloques y escribe a medida que avanza (memoria constante).
+
+    Formatos: csv, ndjson (un JSON por línea), npz (columnas NumPy; se abre con
+    numpy.load) y arrow (Arrow IPC stream; requiere pyarrow).
+
+    Ejemplos de uso:
+    python manage.py exportar_reportes --formato csv --salida reportes.csv
+    python manage.py exportar_reportes --formato ndjson --tipo-incidente accidente > accidentes.ndjson
+    python manage.py exportar_reportes --formato npz --salida reportes.npz --estado probado
+    """
+
+    help = 'Exporta reportes (con filtros) a CSV, NDJSON, NPZ o Arrow'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--formato', choices=sorted(exportacion.FORMATOS), default='csv')
+        parser.add_argument('--salida', default='-', help="Archivo de salida ('-' = salida estándar)")
+        parser.add_argument('--chunk', type=int, default=exportacion.CHUNK_POR_DEFECTO, help='Filas por lectura')
+        parser.add_argument('--estado', help='Estado del reporte (pendiente, probado, ...)')
+        parser.add_argument('--fecha', help='Día de creación (AAAA-MM-DD)')
+        parser.add_argument('--ubicacion', help='Texto en nombre de vía o distrito')
+        parser.add_argument('--tipo-incidente', help='Tipo de incidente')
+        parser.add_argument('--nivel-peligro', help='Nivel de peligro (1-4)')
+
+    def handle(self, *args, **options):
+        formato = options['formato']
+        if options['chunk'] <= 0:
+            raise CommandError('--chunk debe ser positivo')
+        if formato in ('npz', 'arrow') and options['salida'] == '-':
+            raise CommandError(f'El formato {formato} es binario: indica un archivo con --salida')
+        if formato == 'arrow' and not exportacion.arrow_disponible():
+            raise CommandError('El formato arrow requiere pyarrow (pip install pyarrow)')
+
+        reportes = ReporteColaborativoRepositoryImpl().filtrar(
+            estado=options['estado'],
+            fecha=options['fecha'],
+            ubicacion=options['ubicacion'],
+            tipo_incidente=options['tipo_incidente'],
+            nivel_peligro=options['nivel_peligro'],
+        )
+
+        inicio = time.perf_counter()
+        if formato == 'npz':
+            total = exportacion.exportar_npz(reportes, options['salida'], options['chunk'])
+        else:
+            total = self._escribir(formato, reportes, options)
+
+        segundos = time.perf_counter() - inicio
+        self.stderr.write(self.style.SUCCESS(
+            f"{total} reportes exportados ({formato}) en {segundos:.2f} s "
+            f"({total / segundos if segundos > 0 else 0:.0f}/s)"
+        ))
+
+    def _escribir(self, formato, reportes, options):
+        fragmentos = {
+            'csv': exportacion.exportar_csv,
+            'ndjson': exportacion.exportar_ndjson,
+            'arrow': exportacion.exportar_arrow,
+        }[formato](reportes, options['chunk'])
+
+        if options['salida'] == '-':
+            for fragmento in fragmentos:
+                self.stdout.write(fragmento, ending='')
+        elif formato == 'arrow':
+            with open(options['salida'], 'wb') as destino:
+                destino.writelines(fragmentos)
+        else:
+            with open(options['salida'], 'w', encoding='utf-8', newline='') as destino:
+                destino.writelines(fragmentos)
+        return reportes.count()
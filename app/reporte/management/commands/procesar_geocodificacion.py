@@ -0,0 +1,56 @@
+# Archivo: app/reporte/management/commands/procesar_geocodificacion.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.reporte.cola_geocodificacion import procesar_pendientes
+
+
+class Command(BaseCommand):
+    """
+    Trabajador de la cola de geocodificación inversa. Completa nombre_via y
+    distrito de los reportes guardados sin dirección, con reintentos y backoff
+    exponencial ante fallas del servicio externo.
+
+    Ejemplos de uso:
+    python manage.py procesar_geocodificacion
+    python manage.py procesar_geocodificacion --una-vez
+    python manage.py procesar_geocodificacion --lote 50 --pausa 1.5
+    """
+
+    help = 'Procesa la cola de geocodificación de reportes (nombre de vía y distrito)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--una-vez',
+            action='store_true',
+            help='Procesa las tareas disponibles y termina',
+        )
+        parser.add_argument('--lote', type=int, default=20, help='Tareas reclamadas por consulta')
+        parser.add_argument(
+            '--pausa',
+            type=float,
+            default=1.0,
+            help='Segundos entre solicitudes al geocodificador',
+        )
+        parser.add_argument(
+            '--espera',
+            type=float,
+            default=5.0,
+            help='Segundos entre revisiones de la cola cuando está vacía',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            resultado = procesar_pendientes(lote=options['lote'], pausa=options['pausa'])
+            if any(resultado.values()):
+                self.stdout.write(
+                    f"Geocodificación: {resultado['completada']} completadas, "
+                    f"{resultado['pendiente']} reprogramadas, {resultado['fallida']} fallidas"
+                )
+            if options['una_vez']:
+                break
+            time.sleep(options['espera'])
+
+        self.stdout.write(self.style.SUCCESS('Cola de geocodificación procesada'))
@@ -0,0 +1,48 @@
+# Archivo: app/reporte/management/commands/recalcular_estadisticas_usuario.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.reporte import estadisticas_usuario
+from app.reporte.models import EstadisticasUsuario, ReporteColaborativo
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye EstadisticasUsuario a partir de los reportes. Las señales la
+    mantienen al día, pero las escrituras que no pasan por save()/delete()
+    (QuerySet.update, SQL directo, cargas masivas) no se reflejan hasta correr
+    este comando.
+
+    Ejemplos de uso:
+    python manage.py recalcular_estadisticas_usuario
+    python manage.py recalcular_estadisticas_usuario --usuario 42 --usuario 57
+    """
+
+    help = 'Recalcula las estadísticas materializadas de reportes por usuario'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario',
+            type=int,
+            action='append',
+            help='Id de usuario a recalcular (se puede repetir); por defecto todos',
+        )
+
+    def handle(self, *args, **options):
+        usuarios = options['usuario']
+        if not usuarios:
+            # Autores de reportes y usuarios que ya tienen fila (quizás sin reportes activos)
+            usuarios = set(
+                ReporteColaborativo.objects.exclude(usuario_reportador=None)
+                .values_list('usuario_reportador_id', flat=True).distinct()
+            ) | set(EstadisticasUsuario.objects.values_list('usuario_id', flat=True))
+
+        inicio = time.perf_counter()
+        for usuario_id in sorted(usuarios):
+            estadisticas_usuario.recalcular(usuario_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Estadísticas recalculadas para {len(usuarios)} usuarios en {time.perf_counter() - inicio:.2f} s'
+        ))
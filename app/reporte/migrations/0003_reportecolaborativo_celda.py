@@ -0,0 +1,47 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:17
+
+from django.conf import settings
+from django.db import migrations, models
+from math import floor
+
+GRID_CELDA_GRADOS = 0.01
+
+
+def calcular_celdas(apps, schema_editor):
+    ReporteColaborativo = apps.get_model('reporte', 'ReporteColaborativo')
+    pendientes = []
+    for reporte in ReporteColaborativo.objects.only('id', 'latitud', 'longitud').iterator(chunk_size=2000):
+        reporte.celda_lat = floor(float(reporte.latitud or 0) / GRID_CELDA_GRADOS)
+        reporte.celda_lng = floor(float(reporte.longitud or 0) / GRID_CELDA_GRADOS)
+        pendientes.append(reporte)
+        if len(pendientes) >= 2000:
+            ReporteColaborativo.objects.bulk_update(pendientes, ['celda_lat', 'celda_lng'])
+            pendientes = []
+    if pendientes:
+        ReporteColaborativo.objects.bulk_update(pendientes, ['celda_lat', 'celda_lng'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0002_alter_reportecolaborativo_estado_reporte'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportecolaborativo',
+            name='celda_lat',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='reportecolaborativo',
+            name='celda_lng',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='reportecolaborativo',
+            index=models.Index(fields=['celda_lat', 'celda_lng'], name='reporte_rep_celda_l_e1b376_idx'),
+        ),
+        migrations.RunPython(calcular_celdas, migrations.RunPython.noop),
+    ]
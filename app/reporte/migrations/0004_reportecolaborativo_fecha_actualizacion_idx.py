@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0003_reportecolaborativo_celda'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportecolaborativo',
+            index=models.Index(fields=['fecha_actualizacion'], name='reporte_rep_fecha_a_7cf75e_idx'),
+        ),
+    ]
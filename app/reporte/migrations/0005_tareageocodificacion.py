@@ -0,0 +1,52 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def encolar_reportes_sin_direccion(apps, schema_editor):
+    ReporteColaborativo = apps.get_model('reporte', 'ReporteColaborativo')
+    TareaGeocodificacion = apps.get_model('reporte', 'TareaGeocodificacion')
+    ids = (
+        ReporteColaborativo.objects
+        .filter(Q(nombre_via='') | Q(distrito=''))
+        .exclude(latitud__isnull=True)
+        .exclude(longitud__isnull=True)
+        .values_list('id', flat=True)
+    )
+    TareaGeocodificacion.objects.bulk_create(
+        (TareaGeocodificacion(reporte_id=reporte_id) for reporte_id in ids.iterator(chunk_size=2000)),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0004_reportecolaborativo_fecha_actualizacion_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaGeocodificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completada', 'Completada'), ('fallida', 'Fallida')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('proximo_intento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('token_trabajador', models.CharField(blank=True, default='', max_length=32)),
+                ('ultimo_error', models.TextField(blank=True, default='')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('reporte', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tarea_geocodificacion', to='reporte.reportecolaborativo')),
+            ],
+            options={
+                'verbose_name': 'Tarea de geocodificación',
+                'verbose_name_plural': 'Tareas de geocodificación',
+                'indexes': [models.Index(fields=['estado', 'proximo_intento'], name='reporte_tar_estado_0c9df1_idx')],
+            },
+        ),
+        migrations.RunPython(encolar_reportes_sin_direccion, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0005_tareageocodificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheGeocodificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=255, unique=True)),
+                ('resultado', models.JSONField()),
+                ('aciertos', models.PositiveIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('ultimo_uso', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Cache de geocodificación',
+                'verbose_name_plural': 'Cache de geocodificación',
+            },
+        ),
+    ]
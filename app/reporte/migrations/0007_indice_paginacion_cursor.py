@@ -0,0 +1,19 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0006_cachegeocodificacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reportecolaborativo',
+            index=models.Index(fields=['usuario_reportador', 'fecha_creacion', 'id'], name='reporte_rep_usuario_cac36a_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0007_indice_paginacion_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_reportes', models.IntegerField(default=0)),
+                ('reportes_validados', models.IntegerField(default=0)),
+                ('reportes_pendientes', models.IntegerField(default=0)),
+                ('reportes_con_votos', models.IntegerField(default=0)),
+                ('suma_credibilidad', models.FloatField(default=0.0)),
+                ('promedio_credibilidad', models.FloatField(default=0.0)),
+                ('reportes_por_tipo', models.JSONField(default=dict)),
+                ('reportes_por_dia', models.JSONField(default=dict)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='estadisticas_reportes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de usuario',
+                'verbose_name_plural': 'Estadísticas de usuarios',
+            },
+        ),
+    ]
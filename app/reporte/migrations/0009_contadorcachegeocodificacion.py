@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0008_estadisticasusuario'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorCacheGeocodificacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=20, unique=True)),
+                ('valor', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de cache de geocodificación',
+                'verbose_name_plural': 'Contadores de cache de geocodificación',
+            },
+        ),
+    ]
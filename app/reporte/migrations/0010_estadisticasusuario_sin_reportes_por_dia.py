@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:36
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporte', '0009_contadorcachegeocodificacion'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='estadisticasusuario',
+            name='reportes_por_dia',
+        ),
+    ]
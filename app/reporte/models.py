@@ -1,11 +1,41 @@
 from django.db import models
+from django.db.models import Avg, F, FloatField, IntegerField
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator, MinLengthValidator, FileExtensionValidator
 from django.utils import timezone
 from PIL import Image
 import os
 from decimal import Decimal
-from .utils import reverse_geocode
+from math import asin, cos, degrees, floor, radians, sin
+
+# Tamaño de la celda de la grilla espacial (en grados, ~1.1 km en latitud)
+GRID_CELDA_GRADOS = 0.01
+RADIO_TIERRA_KM = 6371
+
+def porcentaje_votos_positivos():
+    """Expresión SQL: votos positivos * 100 / total de votos (NULL si no hay votos)"""
+    total = F('votos_positivos') + F('votos_negativos')
+    return Cast(F('votos_positivos') * 100.0 / NullIf(total, 0), FloatField())
+
+
+class ReporteColaborativoQuerySet(models.QuerySet):
+    def con_credibilidad(self):
+        """
+        Anota total_votos y credibilidad (porcentaje entero de votos positivos,
+        0 sin votos) calculados en la base de datos; el QuerySet sigue perezoso.
+        """
+        return self.annotate(
+            total_votos=F('votos_positivos') + F('votos_negativos'),
+            credibilidad=Coalesce(Cast(Round(porcentaje_votos_positivos()), IntegerField()), 0),
+        )
+
+    def promedio_credibilidad(self):
+        """Promedio (0-100) de la credibilidad de los reportes con al menos un voto"""
+        return self.aggregate(
+            promedio=Coalesce(Avg(porcentaje_votos_positivos()), 0.0)
+        )['promedio']
+
 
 class ReporteColaborativo(models.Model):
     """Modelo para reportes de incidentes de trafico"""
@@ -163,17 +193,64 @@ class ReporteColaborativo(models.Model):
     votos_positivos = models.IntegerField(default=0)
     votos_negativos = models.IntegerField(default=0)
     usuarios_votantes = models.ManyToManyField(User, related_name='votos_emitidos', blank=True)
+
+    # Índice espacial: celda de la grilla fija donde cae el reporte (se calcula en save)
+    celda_lat = models.IntegerField(default=0, editable=False)
+    celda_lng = models.IntegerField(default=0, editable=False)
+
+    objects = ReporteColaborativoQuerySet.as_manager()
+
+    # Campos que determinan la contribución del reporte a EstadisticasUsuario
+    CAMPOS_ESTADISTICAS = (
+        'usuario_reportador_id', 'is_active', 'estado_reporte', 'tipo_incidente',
+        'votos_positivos', 'votos_negativos',
+    )
+    # Campos que se dibujan en las teselas del mapa de calor (app.mapa.signals)
+    CAMPOS_MAPA = ('latitud', 'longitud', 'nivel_peligro', 'is_active')
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Valores guardados: las señales restan esta contribución antes de sumar la nueva
+        cargados = dict(zip(field_names, values))
+        instancia._valores_estadisticas = (
+            {campo: cargados[campo] for campo in cls.CAMPOS_ESTADISTICAS}
+            if all(campo in cargados for campo in cls.CAMPOS_ESTADISTICAS) else None
+        )
+        # Posición y estado guardados: las teselas de origen se invalidan sin releer la fila
+        instancia._valores_mapa = (
+            tuple(cargados[campo] for campo in cls.CAMPOS_MAPA)
+            if all(campo in cargados for campo in cls.CAMPOS_MAPA) else None
+        )
+        return instancia
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # Lo recién leído es lo guardado; con campos diferidos no se conoce
+        diferidos = self.get_deferred_fields()
+        self._valores_estadisticas = (
+            {campo: getattr(self, campo) for campo in self.CAMPOS_ESTADISTICAS}
+            if not diferidos & set(self.CAMPOS_ESTADISTICAS) else None
+        )
+        self._valores_mapa = (
+            tuple(getattr(self, campo) for campo in self.CAMPOS_MAPA)
+            if not diferidos & set(self.CAMPOS_MAPA) else None
+        )
+
     class Meta:
         verbose_name = 'Incidente de Tráfico'
         verbose_name_plural = 'Incidentes de Tráfico'
         ordering = ['-fecha_creacion']
         indexes = [
             models.Index(fields=['fecha_creacion']),
+            models.Index(fields=['fecha_actualizacion']),
             models.Index(fields=['tipo_incidente']),
             models.Index(fields=['usuario_reportador']),
             models.Index(fields=['latitud', 'longitud']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['celda_lat', 'celda_lng']),
+            # Paginación por cursor de "Mis reportes"
+            models.Index(fields=['usuario_reportador', 'fecha_creacion', 'id']),
         ]
     
     def __str__(self):
@@ -188,21 +265,22 @@ class ReporteColaborativo(models.Model):
         if self.descripcion:
             self.descripcion = self.descripcion.strip()
 
-        # 2. Autocompletar dirección si latitud y longitud están presentes
-        if self.latitud and self.longitud and (not self.nombre_via or not self.distrito):
-            from .utils import reverse_geocode
-            info = reverse_geocode(self.latitud, self.longitud)
+        # 2. La dirección faltante se completa en segundo plano (manage.py procesar_geocodificacion)
+        geocodificar = bool(self.latitud and self.longitud and (not self.nombre_via or not self.distrito))
 
-            if "error" not in info:
-                self.nombre_via = info.get("calle", "Desconocido")
-                self.distrito = info.get("distrito", "Desconocido")
-            else:
-                print(f"⚠️ No se pudo obtener dirección: {info['error']}")
+        # 3. Mantener actualizada la celda del índice espacial
+        self.celda_lat, self.celda_lng = self.calcular_celda(self.latitud, self.longitud)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitud', 'longitud'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'celda_lat', 'celda_lng'}
 
-        # 3. Guardar primero el objeto (incluye imagen en disco)
+        # 4. Guardar primero el objeto (incluye imagen en disco)
         super().save(*args, **kwargs)
 
-        # 4. Validar y procesar imagen si existe
+        if geocodificar:
+            TareaGeocodificacion.encolar(self)
+
+        # 5. Validar y procesar imagen si existe
         if self.foto:
             try:
                 self.validate_and_process_image()
@@ -237,6 +315,14 @@ class ReporteColaborativo(models.Model):
             except Exception as e:
                 raise ValueError(f'Error procesando la imagen: {str(e)}')
     
+    @staticmethod
+    def calcular_celda(lat, lng):
+        """Retorna la celda (fila, columna) de la grilla espacial para una coordenada"""
+        return (
+            floor(float(lat or 0) / GRID_CELDA_GRADOS),
+            floor(float(lng or 0) / GRID_CELDA_GRADOS),
+        )
+
     def get_coordinates(self):
         """Retorna las coordenadas como tupla"""
         return (float(self.latitud), float(self.longitud))
@@ -289,9 +375,12 @@ class ReporteColaborativo(models.Model):
             return "hace unos segundos"
     
     def increment_views(self):
-        """Incrementa el contador de vistas"""
+        """
+        Incrementa el contador de vistas en la BD (UPDATE atómico, sin señales).
+        Las vistas de páginas pasan por contador_vistas, que las escribe en lote.
+        """
+        type(self).objects.filter(pk=self.pk).update(views_count=F('views_count') + 1)
         self.views_count += 1
-        self.save(update_fields=['views_count'])
     
     def get_severity_color(self):
         """Retorna el color CSS para la severidad"""
@@ -353,22 +442,208 @@ class ReporteColaborativo(models.Model):
             is_active=True
         ).select_related('usuario_reportador').order_by('-fecha_creacion')[:limit]
 
+    @classmethod
+    def _filtrar_por_caja(cls, queryset, latitude, longitude, radius_km):
+        """Restringe el queryset a la caja envolvente del radio usando la grilla espacial"""
+        # get_distance_from redondea a 2 decimales: ampliar la caja para no perder bordes
+        radio_angular = (radius_km + 0.01) / RADIO_TIERRA_KM
+        delta_lat = degrees(radio_angular)
+        lat_min, lat_max = latitude - delta_lat, latitude + delta_lat
+
+        fila_min, _ = cls.calcular_celda(lat_min, 0)
+        fila_max, _ = cls.calcular_celda(lat_max, 0)
+        queryset = queryset.filter(
+            celda_lat__gte=fila_min,
+            celda_lat__lte=fila_max,
+            latitud__gte=Decimal(str(lat_min)),
+            latitud__lte=Decimal(str(lat_max)),
+        )
+
+        # Si el círculo toca un polo o cruza el antimeridiano no se acota la longitud
+        proporcion = sin(radio_angular) / max(cos(radians(latitude)), 1e-12)
+        if proporcion >= 1:
+            return queryset
+        delta_lng = degrees(asin(proporcion))
+        lng_min, lng_max = longitude - delta_lng, longitude + delta_lng
+        if lng_min < -180 or lng_max > 180:
+            return queryset
+
+        _, columna_min = cls.calcular_celda(0, lng_min)
+        _, columna_max = cls.calcular_celda(0, lng_max)
+        return queryset.filter(
+            celda_lng__gte=columna_min,
+            celda_lng__lte=columna_max,
+            longitud__gte=Decimal(str(lng_min)),
+            longitud__lte=Decimal(str(lng_max)),
+        )
+
+    @classmethod
+    def get_incidents_near_con_distancia(cls, latitude, longitude, radius_km=5):
+        """Retorna pares (incidente, distancia_km) cercanos a una ubicación, ordenados por distancia"""
+        # Prefiltro en SQL por celdas de la grilla y caja envolvente;
+        # la distancia exacta se calcula de forma vectorizada solo sobre los candidatos
+        from .distancias import distancias_desde, indices_dentro_del_radio
+
+        latitude, longitude, radius_km = float(latitude), float(longitude), float(radius_km)
+        candidatos = list(cls._filtrar_por_caja(
+            cls.objects.filter(is_active=True), latitude, longitude, radius_km
+        ))
+        if not candidatos:
+            return []
+
+        distancias = distancias_desde(
+            [c.latitud for c in candidatos], [c.longitud for c in candidatos], latitude, longitude
+        )
+        return [
+            (candidatos[i], float(distancias[i]))
+            for i in indices_dentro_del_radio(distancias, radius_km)
+        ]
+
     @classmethod
     def get_incidents_near(cls, latitude, longitude, radius_km=5):
-        """Obtiene incidentes cerca de una ubicación (requiere PostGIS para ser más eficiente)"""
-        # Implementación básica sin PostGIS
-        # Para producción, considera usar PostGIS con ST_DWithin
-        incidents = cls.objects.filter(is_active=True)
-        nearby_incidents = []
-        
-        for incident in incidents:
-            distance = incident.get_distance_from(latitude, longitude)
-            if distance <= radius_km:
-                nearby_incidents.append((incident, distance))
-        
-        # Ordenar por distancia
-        nearby_incidents.sort(key=lambda x: x[1])
-        return [incident for incident, distance in nearby_incidents]
+        """Obtiene incidentes cerca de una ubicación ordenados por distancia"""
+        return [
+            incident for incident, distance
+            in cls.get_incidents_near_con_distancia(latitude, longitude, radius_km)
+        ]
+
+    @classmethod
+    def count_incidents_near(cls, latitude, longitude, radius_km=5, since=None):
+        """Cuenta incidentes activos cercanos (opcionalmente creados desde `since`) sin instanciar modelos"""
+        from .distancias import distancias_desde
+
+        latitude, longitude, radius_km = float(latitude), float(longitude), float(radius_km)
+        candidatos = cls._filtrar_por_caja(
+            cls.objects.filter(is_active=True), latitude, longitude, radius_km
+        )
+        if since is not None:
+            candidatos = candidatos.filter(fecha_creacion__gte=since)
+
+        coordenadas = list(candidatos.values_list('latitud', 'longitud'))
+        if not coordenadas:
+            return 0
+        latitudes, longitudes = zip(*coordenadas)
+        distancias = distancias_desde(latitudes, longitudes, latitude, longitude)
+        return int((distancias <= radius_km).sum())
+
+
+class TareaGeocodificacion(models.Model):
+    """Cola (en BD) de reportes cuya vía/distrito falta completar por geocodificación inversa"""
+
+    ESTADOS = [
+        ('pendiente', 'Pendiente'),
+        ('procesando', 'Procesando'),
+        ('completada', 'Completada'),
+        ('fallida', 'Fallida'),
+    ]
+
+    reporte = models.OneToOneField(
+        ReporteColaborativo,
+        on_delete=models.CASCADE,
+        related_name='tarea_geocodificacion'
+    )
+    estado = models.CharField(max_length=20, choices=ESTADOS, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    # Cuándo puede tomarse la tarea (reintento con backoff o fin del bloqueo de un trabajador)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    # Identifica al trabajador que reclamó la tarea
+    token_trabajador = models.CharField(max_length=32, blank=True, default='')
+    ultimo_error = models.TextField(blank=True, default='')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Tarea de geocodificación'
+        verbose_name_plural = 'Tareas de geocodificación'
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento']),
+        ]
+
+    def __str__(self):
+        return f"Geocodificación del reporte {self.reporte_id} ({self.estado})"
+
+    @classmethod
+    def encolar(cls, reporte):
+        """Agrega (o reactiva) la tarea del reporte; no hace ninguna llamada de red"""
+        tarea, creada = cls.objects.get_or_create(reporte=reporte)
+        if not creada and tarea.estado not in ('pendiente', 'procesando'):
+            cls.objects.filter(id=tarea.id).update(
+                estado='pendiente',
+                intentos=0,
+                proximo_intento=timezone.now(),
+                ultimo_error='',
+                fecha_actualizacion=timezone.now(),
+            )
+        return tarea
+
+
+class CacheGeocodificacion(models.Model):
+    """
+    Resultados de geocodificación (inversa por coordenada cuantizada, directa por
+    dirección normalizada) para no repetir llamadas al servicio externo.
+    """
+
+    clave = models.CharField(max_length=255, unique=True)
+    resultado = models.JSONField()
+    # Lecturas de esta entrada (se acumulan en memoria y se escriben en lote)
+    aciertos = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Para el desalojo LRU (se actualiza con granularidad gruesa, no en cada acierto)
+    ultimo_uso = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Cache de geocodificación'
+        verbose_name_plural = 'Cache de geocodificación'
+
+    def __str__(self):
+        return self.clave
+
+
+class ContadorCacheGeocodificacion(models.Model):
+    """
+    Aciertos y fallos de la cache de geocodificación (una fila por contador).
+    Viven en la BD para que todos los procesos sumen sobre los mismos valores
+    y el comando cache_geocodificacion y el panel vean el total; cada proceso
+    los acumula en memoria y los escribe en lote (ContadoresCache).
+    """
+
+    nombre = models.CharField(max_length=20, unique=True)
+    valor = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Contador de cache de geocodificación'
+        verbose_name_plural = 'Contadores de cache de geocodificación'
+
+    def __str__(self):
+        return f"{self.nombre}: {self.valor}"
+
+
+class EstadisticasUsuario(models.Model):
+    """
+    Resumen materializado de los reportes activos de un usuario. Lo mantienen
+    las señales de ReporteColaborativo sumando/restando la contribución de cada
+    reporte (ver app.reporte.estadisticas_usuario); manage.py
+    recalcular_estadisticas_usuario lo reconstruye desde los reportes.
+    """
+
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, related_name='estadisticas_reportes')
+    total_reportes = models.IntegerField(default=0)
+    reportes_validados = models.IntegerField(default=0)
+    reportes_pendientes = models.IntegerField(default=0)
+    # Reportes con al menos un voto y suma de sus credibilidades: el promedio se actualiza sin releer
+    reportes_con_votos = models.IntegerField(default=0)
+    suma_credibilidad = models.FloatField(default=0.0)
+    promedio_credibilidad = models.FloatField(default=0.0)
+    # {tipo_incidente: cantidad}
+    reportes_por_tipo = models.JSONField(default=dict)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadísticas de usuario'
+        verbose_name_plural = 'Estadísticas de usuarios'
+
+    def __str__(self):
+        return f"Estadísticas de {self.usuario_id}: {self.total_reportes} reportes"
 
 
 class Alerta(models.Model):
@@ -0,0 +1,70 @@
+# app/reporte/signals.py
+
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+from app.admin_custom.models import Alerta as AlertaAdmin
+from web.services import cache_dashboard
+from .models import ReporteColaborativo
+from .snapshot_incidentes import snapshot_incidentes
+from . import estadisticas_usuario
+
+
+@receiver(post_save, sender=ReporteColaborativo)
+def actualizar_snapshot_incidentes(sender, instance, **kwargs):
+    """
+    Marca el snapshot de incidentes para sincronizarse en la próxima lectura
+    """
+    snapshot_incidentes.marcar_desactualizado()
+
+
+@receiver(post_delete, sender=ReporteColaborativo)
+def descartar_de_snapshot_incidentes(sender, instance, **kwargs):
+    """
+    Quita el incidente eliminado del snapshot en memoria
+    """
+    snapshot_incidentes.descartar(instance.pk)
+
+
+@receiver(post_save, sender=ReporteColaborativo)
+def actualizar_estadisticas_usuario(sender, instance, created, **kwargs):
+    """
+    Suma al autor la nueva contribución del reporte y resta la que tenía guardada
+    (cambios de estado, votos, tipo, actividad o autor)
+    """
+    nueva = estadisticas_usuario.contribucion(estadisticas_usuario.valores_actuales(instance))
+    anteriores = getattr(instance, '_valores_estadisticas', None)
+    if created or anteriores is not None:
+        estadisticas_usuario.registrar_cambio(estadisticas_usuario.contribucion(anteriores), nueva)
+    elif instance.usuario_reportador_id:
+        # No se sabe qué había en la BD: se reconstruye la fila del autor
+        estadisticas_usuario.recalcular(instance.usuario_reportador_id)
+    instance._valores_estadisticas = estadisticas_usuario.valores_actuales(instance)
+
+
+@receiver(post_delete, sender=ReporteColaborativo)
+def descontar_estadisticas_usuario(sender, instance, **kwargs):
+    """
+    Resta del autor la contribución del reporte eliminado
+    """
+    valores = getattr(instance, '_valores_estadisticas', None) or estadisticas_usuario.valores_actuales(instance)
+    estadisticas_usuario.registrar_cambio(estadisticas_usuario.contribucion(valores), None)
+
+
+@receiver(post_save, sender=ReporteColaborativo)
+@receiver(post_delete, sender=ReporteColaborativo)
+def invalidar_dashboard_reportador(sender, instance, **kwargs):
+    """
+    Los bloques de reportes recientes y estadísticas del autor pasan a una versión nueva
+    """
+    if instance.usuario_reportador_id:
+        cache_dashboard.invalidar(cache_dashboard.AMBITO_REPORTES, instance.usuario_reportador_id)
+
+
+@receiver(post_save, sender=AlertaAdmin)
+@receiver(post_delete, sender=AlertaAdmin)
+@receiver(m2m_changed, sender=AlertaAdmin.destinatarios.through)
+def invalidar_dashboard_alertas(sender, **kwargs):
+    """
+    Una alerta nueva, editada o con otros destinatarios cambia el bloque de alertas
+    """
+    cache_dashboard.invalidar(cache_dashboard.AMBITO_ALERTAS)
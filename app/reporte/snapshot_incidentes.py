@@ -0,0 +1,233 @@
+import hashlib
+import threading
+import time
+from math import asin, degrees, cos, radians, sin
+
+import numpy as np
+from django.conf import settings
+
+from .distancias import RADIO_TIERRA_KM, distancias_desde, indices_dentro_del_radio
+
+
+class SnapshotIncidentes:
+    """
+    Copia en memoria (por proceso) de los incidentes activos como arreglos compactos:
+    id, latitud, longitud, tipo, nivel de peligro y fecha de creación.
+
+    Se mantiene al día de forma incremental: las señales post_save/post_delete marcan
+    el snapshot como desactualizado y, al leerlo, solo se consultan las filas con
+    fecha_actualizacion >= a la última vista (watermark). Si el total de activos no
+    coincide (borrados en otro proceso, update() masivos) se reconstruye completo.
+    """
+
+    CAMPOS = ('id', 'latitud', 'longitud', 'tipo_incidente', 'nivel_peligro',
+              'fecha_creacion', 'fecha_actualizacion', 'is_active')
+
+    def __init__(self, ttl=None):
+        self._ttl = ttl
+        self._lock = threading.RLock()
+        self._tipos = []
+        self._codigos_tipo = {}
+        self._limpiar()
+
+    def _limpiar(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.latitudes = np.empty(0, dtype=np.float64)
+        self.longitudes = np.empty(0, dtype=np.float64)
+        self.tipos = np.empty(0, dtype=np.int16)
+        self.niveles = np.empty(0, dtype=np.int8)
+        self.creados = np.empty(0, dtype=np.float64)
+        self._watermark = None
+        self._ultima_revision = None
+        self._sucio = True
+
+    # Sincronización
+
+    @property
+    def ttl(self):
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'SNAPSHOT_INCIDENTES_TTL', 5)
+
+    @property
+    def version(self):
+        """Identifica el estado de los datos: (última fecha_actualizacion, total de activos)"""
+        self.sincronizar()
+        return (self._watermark.isoformat() if self._watermark else None, len(self.ids))
+
+    @property
+    def clave_version(self):
+        """Hash corto de la versión, apto para claves de cache y nombres de archivo"""
+        watermark, total = self.version
+        return hashlib.sha1(f"{watermark}|{total}".encode('utf-8')).hexdigest()[:16]
+
+    def marcar_desactualizado(self):
+        self._sucio = True
+
+    def descartar(self, reporte_id):
+        """Quita un incidente del snapshot (por ejemplo, tras un post_delete)"""
+        with self._lock:
+            self._aplicar([], {reporte_id})
+            self._sucio = True
+
+    def sincronizar(self, forzar=False):
+        with self._lock:
+            ahora = time.monotonic()
+            vigente = (
+                self._ultima_revision is not None
+                and ahora - self._ultima_revision < self.ttl
+            )
+            if vigente and not self._sucio and not forzar:
+                return
+
+            from .models import ReporteColaborativo
+
+            if self._watermark is None:
+                self._reconstruir()
+            else:
+                filas = list(
+                    ReporteColaborativo.objects
+                    .filter(fecha_actualizacion__gte=self._watermark)
+                    .order_by()
+                    .values_list(*self.CAMPOS)
+                )
+                activas = [fila for fila in filas if fila[-1]]
+                inactivas = {fila[0] for fila in filas if not fila[-1]}
+                self._aplicar(activas, inactivas)
+                self._avanzar_watermark(filas)
+
+                if ReporteColaborativo.objects.filter(is_active=True).count() != len(self.ids):
+                    self._reconstruir()
+
+            self._ultima_revision = ahora
+            self._sucio = False
+
+    def _reconstruir(self):
+        from .models import ReporteColaborativo
+
+        filas = list(
+            ReporteColaborativo.objects
+            .filter(is_active=True)
+            .order_by()
+            .values_list(*self.CAMPOS)
+        )
+        watermark = self._watermark
+        self._limpiar()
+        self._watermark = watermark
+        self._aplicar(filas, set())
+        self._avanzar_watermark(filas)
+        ultimo = ReporteColaborativo.objects.order_by('-fecha_actualizacion').values_list(
+            'fecha_actualizacion', flat=True
+        ).first()
+        if ultimo and (self._watermark is None or ultimo > self._watermark):
+            self._watermark = ultimo
+
+    def _avanzar_watermark(self, filas):
+        for fila in filas:
+            if self._watermark is None or fila[6] > self._watermark:
+                self._watermark = fila[6]
+
+    def _codigo_tipo(self, tipo):
+        if tipo not in self._codigos_tipo:
+            self._codigos_tipo[tipo] = len(self._tipos)
+            self._tipos.append(tipo)
+        return self._codigos_tipo[tipo]
+
+    def _aplicar(self, filas_activas, ids_eliminados):
+        """Inserta/actualiza filas activas y elimina ids; mantiene el orden -fecha_creacion"""
+        if not filas_activas and not ids_eliminados:
+            return
+
+        nuevos_ids = np.fromiter((fila[0] for fila in filas_activas), dtype=np.int64, count=len(filas_activas))
+        quitar = np.fromiter(ids_eliminados, dtype=np.int64, count=len(ids_eliminados))
+        conservar = ~np.isin(self.ids, np.concatenate([nuevos_ids, quitar]))
+
+        self.ids = np.concatenate([self.ids[conservar], nuevos_ids])
+        self.latitudes = np.concatenate([
+            self.latitudes[conservar],
+            np.fromiter((float(fila[1]) for fila in filas_activas), dtype=np.float64, count=len(filas_activas)),
+        ])
+        self.longitudes = np.concatenate([
+            self.longitudes[conservar],
+            np.fromiter((float(fila[2]) for fila in filas_activas), dtype=np.float64, count=len(filas_activas)),
+        ])
+        self.tipos = np.concatenate([
+            self.tipos[conservar],
+            np.fromiter((self._codigo_tipo(fila[3]) for fila in filas_activas), dtype=np.int16, count=len(filas_activas)),
+        ])
+        self.niveles = np.concatenate([
+            self.niveles[conservar],
+            np.fromiter((fila[4] for fila in filas_activas), dtype=np.int8, count=len(filas_activas)),
+        ])
+        self.creados = np.concatenate([
+            self.creados[conservar],
+            np.fromiter((fila[5].timestamp() for fila in filas_activas), dtype=np.float64, count=len(filas_activas)),
+        ])
+
+        # Mismo orden que el Meta.ordering del modelo: más recientes primero
+        orden = np.lexsort((-self.ids, -self.creados))
+        self.ids = self.ids[orden]
+        self.latitudes = self.latitudes[orden]
+        self.longitudes = self.longitudes[orden]
+        self.tipos = self.tipos[orden]
+        self.niveles = self.niveles[orden]
+        self.creados = self.creados[orden]
+
+    # Consultas
+
+    def cercanos(self, latitud, longitud, radio_km, tipos=None, desde=None):
+        """
+        Incidentes activos dentro del radio, ordenados por distancia (empates por recencia).
+
+        Returns:
+            tuple: (ids, distancias) como arreglos NumPy.
+        """
+        self.sincronizar()
+        with self._lock:
+            latitud, longitud, radio_km = float(latitud), float(longitud), float(radio_km)
+            mascara = self._mascara_caja(latitud, longitud, radio_km)
+            if tipos:
+                codigos = [self._codigos_tipo[t] for t in tipos if t in self._codigos_tipo]
+                mascara &= np.isin(self.tipos, codigos)
+            if desde is not None:
+                mascara &= self.creados >= desde.timestamp()
+
+            indices = np.flatnonzero(mascara)
+            distancias = distancias_desde(self.latitudes[indices], self.longitudes[indices], latitud, longitud)
+            seleccion = indices_dentro_del_radio(distancias, radio_km)
+            return self.ids[indices[seleccion]], distancias[seleccion]
+
+    def _mascara_caja(self, latitud, longitud, radio_km):
+        radio_angular = (radio_km + 0.01) / RADIO_TIERRA_KM
+        delta_lat = degrees(radio_angular)
+        mascara = np.abs(self.latitudes - latitud) <= delta_lat
+        proporcion = sin(radio_angular) / max(cos(radians(latitud)), 1e-12)
+        if proporcion < 1:
+            delta_lng = degrees(asin(proporcion))
+            if -180 <= longitud - delta_lng and longitud + delta_lng <= 180:
+                mascara &= np.abs(self.longitudes - longitud) <= delta_lng
+        return mascara
+
+    def puntos(self):
+        """Arreglos (ids, latitudes, longitudes, niveles) de todos los incidentes activos"""
+        self.sincronizar()
+        with self._lock:
+            return self.ids, self.latitudes, self.longitudes, self.niveles
+
+    def puntos_con_fecha(self):
+        """Como puntos(), agregando la fecha de creación (segundos epoch) de cada incidente"""
+        self.sincronizar()
+        with self._lock:
+            return self.ids, self.latitudes, self.longitudes, self.niveles, self.creados
+
+    @staticmethod
+    def hidratar(ids):
+        """Crea instancias del modelo solo para los ids indicados, respetando su orden"""
+        from .models import ReporteColaborativo
+
+        ids = [int(i) for i in ids]
+        por_id = ReporteColaborativo.objects.in_bulk(ids)
+        return [por_id[i] for i in ids if i in por_id]
+
+
+snapshot_incidentes = SnapshotIncidentes()
@@ -1,9 +1,38 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+import csv
+import io
+import json
 import sys
 import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app.dominio.mapa_calor.generador_mapa import generar_mapa_calor
+from app.dominio.reporte.excepciones import VotoDuplicadoError
+from app.reporte import cache_geocodificacion, exportacion
+from app.reporte.cache_geocodificacion import ContadoresCache
+from app.reporte.cola_geocodificacion import procesar_pendientes
+from app.reporte.contador_vistas import ContadorVistas, contador_vistas
+from app.reporte.distancias import matriz_distancias
+from app.reporte.geocodificadores import Geocodificador, geocodificar_directo
+from app.reporte.indice_vias import CALLE_NO_ENCONTRADA, IndiceVias, construir_indice, leer_geojson
+from app.reporte.models import CacheGeocodificacion, EstadisticasUsuario, ReporteColaborativo, TareaGeocodificacion
+from app.reporte.snapshot_incidentes import SnapshotIncidentes, snapshot_incidentes
+from app.reporte.utils import reverse_geocode
+from app.repositorio.reporte.reporteColaborativoRepositoryImpl import ReporteColaborativoRepositoryImpl
+from web.services import cache_dashboard
 
 def test_mapa_calor():
     """
@@ -19,3 +48,570 @@ def test_mapa_calor():
     mapa.save("mapa_calor.html")
     print("✅ Mapa de calor generado exitosamente")
 
+
+class IndiceEspacialTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reportero', password='testpass123')
+        coordenadas = [
+            (-16.4090, -71.5375), (-16.4091, -71.5376), (-16.4150, -71.5300),
+            (-16.4300, -71.5000), (-16.3900, -71.5600), (-16.5000, -71.4000),
+            (-16.4095, -71.5199), (-16.4269, -71.5375),
+        ]
+        for i, (lat, lng) in enumerate(coordenadas):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte de prueba {i}',
+                descripcion='Descripción del incidente de prueba',
+                tipo_incidente='embotellamiento',
+                latitud=Decimal(str(lat)),
+                longitud=Decimal(str(lng)),
+                usuario_reportador=self.user,
+                nombre_via='Av. Ejército',
+                distrito='Yanahuara',
+            )
+
+    def _busqueda_completa(self, lat, lng, radio):
+        cercanos = [
+            (r, r.get_distance_from(lat, lng))
+            for r in ReporteColaborativo.objects.filter(is_active=True)
+        ]
+        cercanos = [par for par in cercanos if par[1] <= radio]
+        cercanos.sort(key=lambda par: par[1])
+        return [r.id for r, _ in cercanos]
+
+    def test_celda_se_calcula_al_guardar(self):
+        reporte = ReporteColaborativo.objects.first()
+        self.assertEqual(
+            (reporte.celda_lat, reporte.celda_lng),
+            ReporteColaborativo.calcular_celda(reporte.latitud, reporte.longitud)
+        )
+
+    def test_resultados_identicos_a_busqueda_completa(self):
+        for radio in (0.5, 1, 2, 2.0, 5, 20):
+            esperados = self._busqueda_completa(-16.4090, -71.5375, radio)
+            obtenidos = [r.id for r in ReporteColaborativo.get_incidents_near(-16.4090, -71.5375, radio)]
+            self.assertEqual(obtenidos, esperados, f'radio={radio}')
+
+
+class DistanciasVectorizadasTests(TestCase):
+    def test_matriz_coincide_con_get_distance_from(self):
+        latitudes = [-16.4090, -16.4300, -16.3900, -16.5000]
+        longitudes = [-71.5375, -71.5000, -71.5600, -71.4000]
+        consultas = [(-16.4090, -71.5375), (-16.4000, -71.5300)]
+
+        matriz = matriz_distancias(latitudes, longitudes, [c[0] for c in consultas], [c[1] for c in consultas])
+
+        self.assertEqual(matriz.shape, (2, 4))
+        for i, (lat, lng) in enumerate(consultas):
+            for j in range(4):
+                reporte = ReporteColaborativo(latitud=Decimal(str(latitudes[j])), longitud=Decimal(str(longitudes[j])))
+                self.assertEqual(matriz[i, j], reporte.get_distance_from(lat, lng))
+
+    def test_count_incidents_near(self):
+        user = User.objects.create_user(username='contador', password='testpass123')
+        for lat in (-16.4090, -16.4100, -16.6000):
+            ReporteColaborativo.objects.create(
+                titulo='Reporte para conteo',
+                descripcion='Descripción del incidente de conteo',
+                tipo_incidente='accidente',
+                latitud=Decimal(str(lat)),
+                longitud=Decimal('-71.5375'),
+                usuario_reportador=user,
+                nombre_via='Av. Ejército',
+                distrito='Yanahuara',
+            )
+
+        self.assertEqual(ReporteColaborativo.count_incidents_near(-16.4090, -71.5375, 2), 2)
+
+
+class SnapshotIncidentesTests(TestCase):
+    def setUp(self):
+        self.snapshot = SnapshotIncidentes(ttl=60)
+        self.user = User.objects.create_user(username='snapshot', password='testpass123')
+
+    def _crear(self, lat, tipo='embotellamiento'):
+        return ReporteColaborativo.objects.create(
+            titulo='Reporte para snapshot',
+            descripcion='Descripción del incidente del snapshot',
+            tipo_incidente=tipo,
+            latitud=Decimal(str(lat)),
+            longitud=Decimal('-71.5375'),
+            usuario_reportador=self.user,
+            nombre_via='Av. Ejército',
+            distrito='Yanahuara',
+        )
+
+    def test_cercanos_coincide_con_get_incidents_near(self):
+        for lat in (-16.4090, -16.4120, -16.4200, -16.6000):
+            self._crear(lat)
+
+        ids, distancias = self.snapshot.cercanos(-16.4090, -71.5375, 2)
+
+        esperados = ReporteColaborativo.get_incidents_near_con_distancia(-16.4090, -71.5375, 2)
+        self.assertEqual(ids.tolist(), [r.id for r, _ in esperados])
+        self.assertEqual(distancias.tolist(), [d for _, d in esperados])
+
+    def test_actualizacion_incremental(self):
+        primero = self._crear(-16.4090)
+        self.assertEqual(len(self.snapshot.cercanos(-16.4090, -71.5375, 1)[0]), 1)
+
+        # Cambios en otra fila: el watermark los incorpora al marcarse desactualizado
+        segundo = self._crear(-16.4095, tipo='accidente')
+        primero.is_active = False
+        primero.save()
+        self.snapshot.marcar_desactualizado()
+        ids, _ = self.snapshot.cercanos(-16.4090, -71.5375, 1)
+        self.assertEqual(ids.tolist(), [segundo.id])
+
+        ids, _ = self.snapshot.cercanos(-16.4090, -71.5375, 1, tipos=['embotellamiento'])
+        self.assertEqual(ids.tolist(), [])
+
+        segundo_id = segundo.id
+        segundo.delete()
+        self.snapshot.descartar(segundo_id)
+        self.assertEqual(len(self.snapshot.cercanos(-16.4090, -71.5375, 1)[0]), 0)
+
+    def test_hidratar_respeta_orden(self):
+        a, b = self._crear(-16.4090), self._crear(-16.4100)
+        self.assertEqual([r.id for r in self.snapshot.hidratar([b.id, a.id])], [b.id, a.id])
+
+
+class ColaGeocodificacionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='geocodificacion', password='testpass123')
+
+    def _crear_reporte(self, **extra):
+        datos = {
+            'titulo': 'Reporte sin dirección',
+            'descripcion': 'Reporte para la cola de geocodificación',
+            'tipo_incidente': 'bache',
+            'latitud': Decimal('-16.4321990'),
+            'longitud': Decimal('-71.5032900'),
+            'usuario_reportador': self.user,
+        }
+        datos.update(extra)
+        return ReporteColaborativo.objects.create(**datos)
+
+    def test_guardar_encola_sin_llamar_al_geocodificador(self):
+        with mock.patch('app.reporte.cola_geocodificacion.geocodificar_inverso') as geocodificador:
+            reporte = self._crear_reporte()
+        geocodificador.assert_not_called()
+        self.assertEqual(reporte.tarea_geocodificacion.estado, 'pendiente')
+
+        completo = self._crear_reporte(nombre_via='Av. Ejército', distrito='Cayma')
+        self.assertFalse(TareaGeocodificacion.objects.filter(reporte=completo).exists())
+
+    def test_trabajador_completa_solo_campos_vacios(self):
+        reporte = self._crear_reporte(distrito='Cayma')
+        respuesta = {'calle': 'Av. Dolores', 'distrito': 'José Luis Bustamante y Rivero'}
+        with mock.patch('app.reporte.cola_geocodificacion.geocodificar_inverso', return_value=respuesta):
+            resultado = procesar_pendientes(pausa=0)
+
+        self.assertEqual(resultado['completada'], 1)
+        reporte.refresh_from_db()
+        self.assertEqual(reporte.nombre_via, 'Av. Dolores')
+        self.assertEqual(reporte.distrito, 'Cayma')
+        self.assertEqual(TareaGeocodificacion.objects.get(reporte=reporte).estado, 'completada')
+
+    def test_trabajador_invalida_dashboard_y_snapshot(self):
+        reporte = self._crear_reporte()
+        version = cache_dashboard.version(cache_dashboard.AMBITO_REPORTES, self.user.id)
+        snapshot_incidentes.sincronizar(forzar=True)
+        respuesta = {'calle': 'Av. Dolores', 'distrito': 'Cayma'}
+        with mock.patch('app.reporte.cola_geocodificacion.geocodificar_inverso', return_value=respuesta):
+            with self.captureOnCommitCallbacks(execute=True):
+                procesar_pendientes(pausa=0)
+
+        self.assertNotEqual(cache_dashboard.version(cache_dashboard.AMBITO_REPORTES, self.user.id), version)
+        self.assertTrue(snapshot_incidentes._sucio)
+        actualizado = ReporteColaborativo.objects.get(id=reporte.id)
+        self.assertGreater(actualizado.fecha_actualizacion, reporte.fecha_actualizacion)
+
+    def test_reintentos_con_backoff(self):
+        reporte = self._crear_reporte()
+        with self.settings(GEOCODIFICACION_MAX_INTENTOS=2, GEOCODIFICACION_BACKOFF_BASE=60):
+            with mock.patch('app.reporte.cola_geocodificacion.geocodificar_inverso', return_value={'error': 'Error en la solicitud: 503'}):
+                self.assertEqual(procesar_pendientes(pausa=0)['pendiente'], 1)
+                tarea = TareaGeocodificacion.objects.get(reporte=reporte)
+                self.assertEqual(tarea.intentos, 1)
+                self.assertGreater(tarea.proximo_intento, timezone.now() + timedelta(seconds=40))
+
+                # Aún no vence el backoff: no se reintenta
+                self.assertEqual(procesar_pendientes(pausa=0)['pendiente'], 0)
+
+                TareaGeocodificacion.objects.filter(id=tarea.id).update(proximo_intento=timezone.now())
+                self.assertEqual(procesar_pendientes(pausa=0)['fallida'], 1)
+
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'fallida')
+        self.assertIn('503', tarea.ultimo_error)
+
+
+class CacheGeocodificacionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Contadores propios de la prueba: nada pendiente de otras pruebas ni vaciados por tiempo
+        patcher = mock.patch.object(
+            cache_geocodificacion, 'contadores_cache', ContadoresCache(intervalo=3600, maximo_pendientes=1000)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_coordenadas_cercanas_comparten_entrada(self):
+        respuesta = {'calle': 'Av. Ejército', 'distrito': 'Yanahuara'}
+        with mock.patch('app.reporte.geocodificadores.GeocodificadorNominatim.inverso', return_value=respuesta) as nominatim:
+            self.assertEqual(reverse_geocode(-16.4321990, -71.5032900), respuesta)
+            self.assertEqual(reverse_geocode(-16.4321993, -71.5032897), respuesta)
+
+        nominatim.assert_called_once()
+        # Los contadores están en la BD: no dependen de la cache del proceso
+        cache.clear()
+        datos = cache_geocodificacion.estadisticas()
+        self.assertEqual((datos['aciertos'], datos['fallos'], datos['entradas']), (1, 1, 1))
+
+    def test_aciertos_se_acumulan_y_se_escriben_en_lote(self):
+        cache_geocodificacion.guardar('inversa:nominatim:x', {'calle': 'Av. Ejército'})
+        # Un acierto con ultimo_uso reciente es solo la lectura: no escribe en la BD
+        with self.assertNumQueries(3):
+            for _ in range(3):
+                self.assertEqual(cache_geocodificacion.obtener('inversa:nominatim:x'), {'calle': 'Av. Ejército'})
+        self.assertEqual(CacheGeocodificacion.objects.get(clave='inversa:nominatim:x').aciertos, 0)
+
+        self.assertEqual(cache_geocodificacion.estadisticas()['aciertos'], 3)
+        self.assertEqual(CacheGeocodificacion.objects.get(clave='inversa:nominatim:x').aciertos, 3)
+
+    def test_errores_no_se_cachean(self):
+        with mock.patch('app.reporte.geocodificadores.GeocodificadorNominatim.inverso', return_value={'error': 'Error en la solicitud: 503'}) as nominatim:
+            self.assertIn('error', reverse_geocode(-16.40, -71.53))
+            self.assertIn('error', reverse_geocode(-16.40, -71.53))
+        self.assertEqual(nominatim.call_count, 2)
+        self.assertFalse(CacheGeocodificacion.objects.exists())
+
+    def test_direccion_normalizada(self):
+        self.assertEqual(
+            cache_geocodificacion.clave_directa('ors', 'Av. Ejército  123, Cayma'),
+            cache_geocodificacion.clave_directa('ors', 'av ejercito 123 cayma'),
+        )
+
+    def test_desalojo_lru(self):
+        ahora = timezone.now()
+        for i in range(3):
+            CacheGeocodificacion.objects.create(
+                clave=f'inversa:nominatim:{i}', resultado={}, ultimo_uso=ahora - timedelta(hours=i)
+            )
+
+        with self.settings(GEOCODIFICACION_CACHE_MAX_ENTRADAS=2):
+            self.assertEqual(cache_geocodificacion.desalojar(), 1)
+
+        self.assertFalse(CacheGeocodificacion.objects.filter(clave='inversa:nominatim:2').exists())
+
+
+class GeocodificadoresTests(TestCase):
+    def test_backend_elegido_desde_settings(self):
+        sin_conexion = {'default': {'BACKEND': 'app.reporte.geocodificadores.GeocodificadorSinConexion'}}
+        with self.settings(GEOCODIFICADORES=sin_conexion):
+            with mock.patch('requests.get') as red:
+                info = reverse_geocode(-16.40, -71.53)
+        red.assert_not_called()
+        self.assertEqual(info['calle'], 'Desconocido')
+        self.assertFalse(CacheGeocodificacion.objects.exists())
+
+    def test_backend_incompleto_falla_al_instanciar(self):
+        class SoloInverso(Geocodificador):
+            def inverso(self, latitud, longitud):
+                return {}
+
+        with self.assertRaises(TypeError):
+            SoloInverso()
+
+    def test_ors_sin_api_key_no_consulta_la_red(self):
+        ors = {'default': {'BACKEND': 'app.reporte.geocodificadores.GeocodificadorORS', 'OPCIONES': {'api_key': None}}}
+        with self.settings(GEOCODIFICADORES=ors):
+            with mock.patch('requests.get') as red:
+                self.assertIn('error', geocodificar_directo('Av. Ejército 123'))
+        red.assert_not_called()
+
+
+class IndiceViasTests(TestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.ruta_indice = os.path.join(directorio.name, 'indice_vias.bin')
+        entrada = os.path.join(directorio.name, 'vias.geojson')
+        features = [
+            # Vía larga en sentido este-oeste (se parte en varias piezas)
+            {'type': 'Feature', 'properties': {'nombre': 'Av. Ejército'},
+             'geometry': {'type': 'LineString', 'coordinates': [[-71.5500, -16.4000], [-71.5200, -16.4000]]}},
+            {'type': 'Feature', 'properties': {'nombre': 'Calle Misti', 'distrito': 'Cayma'},
+             'geometry': {'type': 'LineString', 'coordinates': [[-71.5350, -16.4050], [-71.5350, -16.3950]]}},
+            {'type': 'Feature', 'properties': {'distrito': 'Yanahuara'},
+             'geometry': {'type': 'Polygon', 'coordinates': [[
+                 [-71.5600, -16.4100], [-71.5300, -16.4100], [-71.5300, -16.3900], [-71.5600, -16.3900], [-71.5600, -16.4100],
+             ]]}},
+        ]
+        with open(entrada, 'w', encoding='utf-8') as archivo:
+            json.dump({'type': 'FeatureCollection', 'features': features}, archivo)
+        construir_indice(*leer_geojson(entrada), self.ruta_indice, celda_m=150)
+
+    def test_via_mas_cercana_y_distrito_por_poligono(self):
+        indice = IndiceVias(self.ruta_indice)
+
+        cerca_avenida = indice.consultar(-16.4003, -71.5450)
+        self.assertEqual(cerca_avenida['calle'], 'Av. Ejército')
+        self.assertEqual(cerca_avenida['distrito'], 'Yanahuara')
+        self.assertLess(cerca_avenida['distancia_m'], 40)
+
+        self.assertEqual(indice.consultar(-16.3970, -71.5352)['calle'], 'Calle Misti')
+        # El polígono tiene prioridad sobre el distrito del tramo ('Cayma')
+        self.assertEqual(indice.consultar(-16.3980, -71.5351)['distrito'], 'Yanahuara')
+        # Sin vías a menos de 150 m
+        self.assertEqual(indice.consultar(-16.3970, -71.5290)['calle'], CALLE_NO_ENCONTRADA)
+        self.assertEqual(indice.consultar(-16.4020, -71.5100)['distrito'], 'Distrito no encontrado')
+
+    def test_backend_local_detras_de_reverse_geocode(self):
+        local = {'default': {
+            'BACKEND': 'app.reporte.geocodificadores.GeocodificadorLocal',
+            'OPCIONES': {'ruta': self.ruta_indice},
+        }}
+        with self.settings(GEOCODIFICADORES=local):
+            with mock.patch('requests.get') as red:
+                info = reverse_geocode(-16.4001, -71.5250)
+        red.assert_not_called()
+        self.assertEqual(info, {
+            'calle': 'Av. Ejército', 'distrito': 'Distrito no encontrado', 'etiqueta': 'Av. Ejército, Distrito no encontrado',
+        })
+        self.assertFalse(CacheGeocodificacion.objects.exists())
+
+
+class CredibilidadAnotadaTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='credibilidad', password='testpass123')
+        for i, (positivos, negativos) in enumerate([(3, 1), (1, 2), (0, 0), (2, 1)]):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte votado {i}',
+                descripcion='Reporte con votos de prueba',
+                tipo_incidente='accidente',
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                nombre_via='Av. Ejército',
+                distrito='Yanahuara',
+                usuario_reportador=user,
+                votos_positivos=positivos,
+                votos_negativos=negativos,
+            )
+
+    def test_credibilidad_y_promedio_en_sql(self):
+        with self.assertNumQueries(1):
+            valores = {
+                r.titulo: (r.total_votos, r.credibilidad)
+                for r in ReporteColaborativo.objects.con_credibilidad()
+            }
+        self.assertEqual(valores, {
+            'Reporte votado 0': (4, 75),
+            'Reporte votado 1': (3, 33),
+            'Reporte votado 2': (0, 0),
+            'Reporte votado 3': (3, 67),
+        })
+
+        # Mismo criterio que antes: solo promedian los reportes con votos
+        with self.assertNumQueries(1):
+            promedio = ReporteColaborativo.objects.promedio_credibilidad()
+        self.assertAlmostEqual(promedio, (75 + 100 / 3 + 200 / 3) / 3)
+        self.assertEqual(ReporteColaborativo.objects.filter(votos_positivos=0).promedio_credibilidad(), 0.0)
+
+
+class ContadorVistasTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lector', password='testpass123')
+        self.reportes = [
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte visto {i}',
+                descripcion='Reporte para contar vistas',
+                tipo_incidente='bache',
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                usuario_reportador=self.user,
+            )
+            for i in range(3)
+        ]
+
+    def test_vistas_se_escriben_en_lote(self):
+        contador = ContadorVistas(intervalo=60, maximo_pendientes=100)
+        for reporte, vistas in zip(self.reportes, (3, 3, 1)):
+            with self.assertNumQueries(0):
+                for _ in range(vistas):
+                    contador.registrar(reporte.id)
+
+        # Un UPDATE por cada cantidad distinta, no uno por vista
+        with self.assertNumQueries(2):
+            self.assertEqual(contador.vaciar(), 7)
+        self.assertEqual(
+            list(ReporteColaborativo.objects.order_by('id').values_list('views_count', flat=True)), [3, 3, 1]
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(contador.vaciar(), 0)
+
+    def test_maximo_pendientes_fuerza_el_vaciado(self):
+        contador = ContadorVistas(intervalo=60, maximo_pendientes=2)
+        contador.registrar(self.reportes[0].id)
+        contador.registrar(self.reportes[0].id)
+        self.assertEqual(contador.pendientes(self.reportes[0].id), 0)
+        self.reportes[0].refresh_from_db()
+        self.assertEqual(self.reportes[0].views_count, 2)
+
+    def test_detalle_muestra_vistas_pendientes(self):
+        # Nada queda pendiente para el vaciado al salir del proceso
+        self.addCleanup(contador_vistas.vaciar)
+        self.client.force_login(self.user)
+        reporte = self.reportes[0]
+        for esperado in (1, 2):
+            respuesta = self.client.get(reverse('detalle_reporte', args=[reporte.id]))
+            self.assertEqual(respuesta.context['reporte'].views_count, esperado)
+
+        contador_vistas.vaciar()
+        reporte.refresh_from_db()
+        self.assertEqual(reporte.views_count, 2)
+
+
+def _reporte_para_votar(autor):
+    return ReporteColaborativo.objects.create(
+        titulo='Choque en Av. Ejército',
+        descripcion='Reporte para votar',
+        tipo_incidente='accidente',
+        latitud=Decimal('-16.4090'),
+        longitud=Decimal('-71.5375'),
+        usuario_reportador=autor,
+    )
+
+
+class VotarReporteTests(TestCase):
+    def setUp(self):
+        self.autor = User.objects.create_user(username='autor', password='testpass123')
+        self.votante = User.objects.create_user(username='votante', password='testpass123')
+        self.reporte = _reporte_para_votar(self.autor)
+        self.url = reverse('votar_reporte', args=[self.reporte.id])
+
+    def test_un_voto_por_usuario(self):
+        self.client.force_login(self.votante)
+        respuesta = self.client.post(self.url, {'voto': 'positivo'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {'votos_positivos': 1, 'votos_negativos': 0, 'credibilidad': 100})
+
+        # El segundo voto se rechaza y no suma nada
+        respuesta = self.client.post(self.url, {'voto': 'negativo'}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 409)
+        self.reporte.refresh_from_db()
+        self.assertEqual((self.reporte.votos_positivos, self.reporte.votos_negativos), (1, 0))
+        self.assertEqual(list(self.reporte.usuarios_votantes.all()), [self.votante])
+
+        # Las estadísticas del autor reflejan el voto aunque update() no dispare señales
+        self.assertEqual(EstadisticasUsuario.objects.get(usuario=self.autor).promedio_credibilidad, 100.0)
+
+    def test_votos_rechazados(self):
+        self.client.force_login(self.autor)
+        self.assertEqual(self.client.post(self.url, {'voto': 'positivo'}).status_code, 403)
+        self.client.force_login(self.votante)
+        self.assertEqual(self.client.post(self.url, {'voto': 'tal vez'}).status_code, 400)
+        self.assertEqual(
+            self.client.post(reverse('votar_reporte', args=[self.reporte.id + 100]), {'voto': 'negativo'}).status_code,
+            404,
+        )
+        self.reporte.refresh_from_db()
+        self.assertEqual((self.reporte.votos_positivos, self.reporte.votos_negativos), (0, 0))
+
+
+class VotosConcurrentesTests(TransactionTestCase):
+    HILOS = 8
+    VOTOS_POR_HILO = 5
+
+    def test_rafaga_de_votos_no_pierde_actualizaciones(self):
+        reporte = _reporte_para_votar(User.objects.create(username='autor'))
+        User.objects.bulk_create(
+            User(username=f'votante{i}') for i in range(self.HILOS * self.VOTOS_POR_HILO)
+        )
+        votantes = list(User.objects.filter(username__startswith='votante'))
+        repositorio = ReporteColaborativoRepositoryImpl()
+        barrera = threading.Barrier(self.HILOS)
+        errores = []
+
+        def votar(lote):
+            try:
+                barrera.wait()
+                for votante in lote:
+                    # Cada votante vota dos veces: solo debe contar una
+                    for _ in range(2):
+                        try:
+                            repositorio.registrar_voto(reporte.id, votante.id, votante.id % 2 == 0)
+                        except VotoDuplicadoError:
+                            pass
+            except Exception as e:
+                errores.append(e)
+            finally:
+                connection.close()
+
+        hilos = [
+            threading.Thread(target=votar, args=(votantes[i::self.HILOS],))
+            for i in range(self.HILOS)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        reporte.refresh_from_db()
+        positivos = sum(1 for v in votantes if v.id % 2 == 0)
+        self.assertEqual((reporte.votos_positivos, reporte.votos_negativos), (positivos, len(votantes) - positivos))
+        self.assertEqual(reporte.usuarios_votantes.count(), len(votantes))
+
+
+class ExportacionReportesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='analista', password='testpass123')
+        for i, (tipo, distrito) in enumerate([('bache', 'Cayma'), ('accidente', 'Cercado'), ('bache', 'Cercado')]):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte, "exportado" {i}',
+                descripcion='Reporte para exportar',
+                tipo_incidente=tipo,
+                nivel_peligro=i + 1,
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                distrito=distrito,
+                usuario_reportador=self.user,
+            )
+        self.reportes = ReporteColaborativo.objects.all()
+
+    def test_csv_y_ndjson_por_bloques(self):
+        # Una sola consulta leída por bloques (cursor), no una por reporte
+        with self.assertNumQueries(1):
+            contenido = ''.join(exportacion.exportar_csv(self.reportes, chunk=2))
+        filas = list(csv.reader(contenido.splitlines()))
+        self.assertEqual(filas[0], list(exportacion.CAMPOS))
+        self.assertEqual(len(filas), 4)
+        self.assertEqual(filas[1][1], 'Reporte, "exportado" 0')
+
+        lineas = ''.join(exportacion.exportar_ndjson(self.reportes, chunk=2)).splitlines()
+        registros = [json.loads(linea) for linea in lineas]
+        self.assertEqual([r['tipo_incidente'] for r in registros], ['bache', 'accidente', 'bache'])
+        self.assertEqual(registros[0]['latitud'], -16.409)
+        self.assertEqual(registros[0]['usuario_reportador_id'], self.user.id)
+
+    def test_npz_columnas_y_categorias(self):
+        destino = io.BytesIO()
+        self.assertEqual(exportacion.exportar_npz(self.reportes, destino, chunk=2), 3)
+
+        destino.seek(0)
+        with np.load(destino) as datos:
+            self.assertEqual(list(datos['nivel_peligro']), [1, 2, 3])
+            self.assertEqual(list(datos['usuario_reportador_id']), [self.user.id] * 3)
+            self.assertTrue(np.allclose(datos['latitud'], -16.409))
+            tipos = datos['tipo_incidente__categorias'][datos['tipo_incidente']]
+            self.assertEqual(list(tipos), ['bache', 'accidente', 'bache'])
+            self.assertEqual(datos['fecha_creacion'].dtype, np.dtype('datetime64[us]'))
+            self.assertNotIn('descripcion', datos.files)
+
+    def test_comando_aplica_filtros(self):
+        salida, errores = io.StringIO(), io.StringIO()
+        call_command('exportar_reportes', '--formato', 'ndjson', '--ubicacion', 'cercado', stdout=salida, stderr=errores)
+        registros = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+        self.assertEqual([r['distrito'] for r in registros], ['Cercado', 'Cercado'])
+        self.assertIn('2 reportes exportados', errores.getvalue())
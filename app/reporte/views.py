@@ -1,17 +1,20 @@
+import logging
+
 from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic.edit import CreateView, FormView
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.conf import settings
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.generic import TemplateView
 from django.contrib.auth.decorators import login_required, user_passes_test
-import requests
 
 from .models import ReporteColaborativo
 from .forms import ReporteColaborativoForm
+from .geocodificadores import geocodificar_directo, geocodificar_inverso
+
+logger = logging.getLogger(__name__)
 
 class ReporteIncidentView(LoginRequiredMixin, CreateView):
     model = ReporteColaborativo
@@ -61,46 +64,20 @@ class ReporteIncidentView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
     def get_address_from_coords(self, lat, lon):
-        """Obtener dirección a partir de coordenadas usando ORS"""
-        if hasattr(settings, 'ORS_API_KEY') and settings.ORS_API_KEY:
-            url = "https://api.openrouteservice.org/geocode/reverse"
-            headers = {'Authorization': settings.ORS_API_KEY}
-            params = {
-                'point.lat': lat,
-                'point.lon': lon,
-                'size': 1,
-                'lang': 'es'
-            }
-
-            try:
-                response = requests.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                return data["features"][0]["properties"]["label"]
-            except Exception as e:
-                print("Error ORS (reverse):", e)
-        return f"Lat: {lat}, Lng: {lon}"
+        """Obtener dirección a partir de coordenadas (geocodificador 'formulario', con cache)"""
+        info = geocodificar_inverso(lat, lon, alias='formulario')
+        if "error" in info:
+            logger.error(f"Error geocodificación (reverse): {info['error']}")
+            return f"Lat: {lat}, Lng: {lon}"
+        return info["etiqueta"]
 
     def get_coords_from_address(self, address):
-        """Obtener coordenadas a partir de dirección usando ORS"""
-        if hasattr(settings, 'ORS_API_KEY') and settings.ORS_API_KEY:
-            url = "https://api.openrouteservice.org/geocode/search"
-            headers = {'Authorization': settings.ORS_API_KEY}
-            params = {
-                'text': address,
-                'size': 1,
-                'lang': 'es'
-            }
-
-            try:
-                response = requests.get(url, params=params, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                coords = data["features"][0]["geometry"]["coordinates"]  # [lon, lat]
-                return coords[1], coords[0]
-            except Exception as e:
-                print("Error ORS (search):", e)
-        return None, None
+        """Obtener coordenadas a partir de dirección (geocodificador 'formulario', con cache)"""
+        info = geocodificar_directo(address, alias='formulario')
+        if "error" in info:
+            logger.error(f"Error geocodificación (search): {info['error']}")
+            return None, None
+        return info["lat"], info["lng"]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
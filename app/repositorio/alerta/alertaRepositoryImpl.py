@@ -1,17 +1,60 @@
-from app.admin_custom.models import Alerta as AlertaModel
+from itertools import islice
+
+from app.admin_custom import difusion_alertas
+from app.admin_custom.models import Alerta as AlertaModel, HistorialNotificacion
 from django.contrib.auth.models import User
 from app.dominio.alerta.iAlertaRepository import IAlertaRepository
 
+# Filas de historial por INSERT (SQLite parte cada lote según su límite de parámetros)
+HISTORIAL_LOTE = 2000
+
+
 class AlertaRepositoryImpl(IAlertaRepository):
     def guardar(self, alerta):
         alerta_db = AlertaModel.objects.create(
             titulo=alerta.titulo,
             mensaje=alerta.mensaje,
             ubicacion=alerta.ubicacion,
-            enviado_por=alerta.enviado_por
+            enviado_por=alerta.enviado_por,
+            enviar_a_todos=alerta.enviar_a_todos
         )
-        alerta_db.destinatarios.set(alerta.destinatarios)
-        alerta_db.save()
+        # add() inserta las filas intermedias con bulk_create
+        alerta_db.destinatarios.add(*self._ids(alerta.destinatarios))
+        return alerta_db
+
+    def registrar_historial(self, alerta_db, destinatarios, zona):
+        """
+        Una fila de historial por destinatario, insertadas por lotes de
+        HISTORIAL_LOTE. Retorna cuántas se crearon.
+        """
+        ids = iter(self._ids(destinatarios))
+
+        creadas = 0
+        while True:
+            lote = [
+                HistorialNotificacion(
+                    alerta=alerta_db,
+                    usuario_destinatario_id=usuario_id,
+                    zona=zona,
+                    estado_entrega='enviado',
+                    tipo_notificacion='sistema'
+                )
+                for usuario_id in islice(ids, HISTORIAL_LOTE)
+            ]
+            if not lote:
+                return creadas
+            HistorialNotificacion.objects.bulk_create(lote, batch_size=HISTORIAL_LOTE)
+            creadas += len(lote)
+
+    def encolar_difusion(self, alerta_db):
+        return difusion_alertas.encolar(alerta_db)
+
+    @staticmethod
+    def _ids(destinatarios):
+        # QuerySet -> solo ids, sin instanciar miles de usuarios
+        if hasattr(destinatarios, 'values_list'):
+            return list(destinatarios.values_list('id', flat=True))
+        return [getattr(destinatario, 'pk', destinatario) for destinatario in destinatarios]
 
     def obtener_por_usuario(self, usuario_id):
         return AlertaModel.objects.filter(destinatarios__id=usuario_id).order_by('-fecha_envio')
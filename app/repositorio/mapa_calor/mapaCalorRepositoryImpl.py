@@ -1,5 +1,99 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+from django.db import transaction
+from django.utils import timezone
 
-class MapaCalorRepositoryImpl:
-    pass
\ No newline at end of file
+from app.dominio.mapa_calor.iMapaCalorRepository import IMapaCalorRepository
+from app.dominio.mapa_calor.zonaPeligrosa import ZonaPeligrosa
+from app.mapa.models import ZonaPeligrosa as ZonaPeligrosaModel
+
+CAMPOS_ACTUALIZABLES = [
+    'nombre_zona', 'latitud_centro', 'longitud_centro', 'radio_cobertura', 'nivel_peligro',
+    'cantidad_reportes', 'intensidad', 'reportes_asociados', 'tendencia',
+    'reportes_periodo_actual', 'reportes_periodo_anterior', 'version_datos', 'fecha_actualizacion',
+]
+TAMANO_LOTE = 500
+
+
+class MapaCalorRepositoryImpl(IMapaCalorRepository):
+    def guardar_zonas(self, zonas, version_datos):
+        """
+        Sincroniza las zonas por clave: crea las nuevas, actualiza las existentes
+        (conservan su id) y elimina las que ya no aparecen.
+        """
+        with transaction.atomic():
+            existentes = {fila.clave: fila for fila in ZonaPeligrosaModel.objects.defer('reportes_asociados')}
+            nuevas, actualizadas = [], []
+            ahora = timezone.now()
+            for zona in zonas:
+                fila = existentes.pop(zona.clave, None)
+                if fila is None:
+                    fila = ZonaPeligrosaModel(clave=zona.clave)
+                    nuevas.append(fila)
+                else:
+                    actualizadas.append(fila)
+                self._copiar(zona, fila, version_datos, ahora)
+
+            eliminadas = 0
+            if existentes:
+                eliminadas, _ = ZonaPeligrosaModel.objects.filter(
+                    id__in=[fila.id for fila in existentes.values()]
+                ).delete()
+            ZonaPeligrosaModel.objects.bulk_create(nuevas, batch_size=TAMANO_LOTE)
+            ZonaPeligrosaModel.objects.bulk_update(actualizadas, CAMPOS_ACTUALIZABLES, batch_size=TAMANO_LOTE)
+
+        return {'creadas': len(nuevas), 'actualizadas': len(actualizadas), 'eliminadas': eliminadas}
+
+    def listar_zonas(self, nivel_minimo=None, limite=None):
+        filas = ZonaPeligrosaModel.objects.all()
+        if nivel_minimo is not None:
+            filas = filas.filter(nivel_peligro__gte=nivel_minimo)
+        if limite is not None:
+            filas = filas[:limite]
+        return [self._a_dominio(fila) for fila in filas]
+
+    def obtener_zona(self, zona_id):
+        fila = ZonaPeligrosaModel.objects.filter(id=zona_id).first()
+        return self._a_dominio(fila) if fila else None
+
+    def estado_calculo(self):
+        """(version_datos, fecha) del último cálculo guardado, o (None, None)"""
+        return ZonaPeligrosaModel.objects.order_by('-fecha_actualizacion').values_list(
+            'version_datos', 'fecha_actualizacion'
+        ).first() or (None, None)
+
+    def nombres_por_clave(self):
+        return dict(ZonaPeligrosaModel.objects.values_list('clave', 'nombre_zona'))
+
+    @staticmethod
+    def _copiar(zona, fila, version_datos, ahora):
+        fila.nombre_zona = zona.nombre_zona or ''
+        fila.latitud_centro, fila.longitud_centro = zona.ubicacion_centro
+        fila.radio_cobertura = zona.radio_cobertura
+        fila.nivel_peligro = zona.nivel_peligro_actual
+        fila.cantidad_reportes = zona.cantidad_reportes
+        fila.intensidad = zona.intensidad
+        fila.reportes_asociados = list(zona.reportes_asociados)
+        fila.tendencia = zona.tendencia
+        fila.reportes_periodo_actual = zona.reportes_periodo_actual
+        fila.reportes_periodo_anterior = zona.reportes_periodo_anterior
+        fila.version_datos = version_datos
+        fila.fecha_actualizacion = ahora
+
+    @staticmethod
+    def _a_dominio(fila):
+        zona = ZonaPeligrosa()
+        zona.zona_id = fila.id
+        zona.clave = fila.clave
+        zona.nombre_zona = fila.nombre_zona
+        zona.ubicacion_centro = (fila.latitud_centro, fila.longitud_centro)
+        zona.radio_cobertura = fila.radio_cobertura
+        zona.nivel_peligro_actual = fila.nivel_peligro
+        zona.fecha_actualizacion = fila.fecha_actualizacion
+        zona.cantidad_reportes = fila.cantidad_reportes
+        zona.reportes_asociados = fila.reportes_asociados
+        zona.tendencia = fila.tendencia
+        zona.intensidad = fila.intensidad
+        zona.reportes_periodo_actual = fila.reportes_periodo_actual
+        zona.reportes_periodo_anterior = fila.reportes_periodo_anterior
+        return zona
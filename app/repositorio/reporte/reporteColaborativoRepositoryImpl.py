@@ -1,8 +1,14 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date
 
+from app.dominio.reporte.excepciones import ReporteNoEncontradoError, VotoDuplicadoError, VotoPropioError
 from app.dominio.reporte.interface1 import Interface1
+from app.reporte import estadisticas_usuario
 from app.reporte.models import ReporteColaborativo
+from web.services import cache_dashboard
 from app.dominio.reporte.iReporteColaborativoRepository import IReporteColaborativoRepository
 
 
@@ -16,3 +22,93 @@ class ReporteColaborativoRepositoryImpl(IReporteColaborativoRepository):
 
     def actualizar(self, reporte):
         reporte.save()
+
+    def registrar_voto(self, reporte_id, usuario_id, positivo):
+        """
+        Voto sin leer-modificar-escribir: el contador se suma con F() en la BD y la
+        fila del votante en la tabla intermedia (única por reporte y usuario)
+        impide votar dos veces. Todo va en una transacción: un voto rechazado no
+        deja el contador sumado.
+
+        Como update() no dispara señales, aquí mismo se aplica el cambio de
+        credibilidad a EstadisticasUsuario y se renueva el dashboard del autor.
+        """
+        campo = 'votos_positivos' if positivo else 'votos_negativos'
+        activos = ReporteColaborativo.objects.filter(id=reporte_id, is_active=True)
+
+        with transaction.atomic():
+            sumados = activos.exclude(usuario_reportador_id=usuario_id).update(**{campo: F(campo) + 1})
+            if not sumados:
+                if activos.exists():
+                    raise VotoPropioError("No puedes votar tu propio reporte")
+                raise ReporteNoEncontradoError(f"Reporte {reporte_id} no encontrado")
+            try:
+                with transaction.atomic():
+                    ReporteColaborativo.usuarios_votantes.through.objects.create(
+                        reportecolaborativo_id=reporte_id, user_id=usuario_id
+                    )
+            except IntegrityError:
+                raise VotoDuplicadoError("Ya votaste este reporte")
+
+            # La fila ya está bloqueada por el UPDATE: estos son los valores tras este voto
+            despues = activos.values(*ReporteColaborativo.CAMPOS_ESTADISTICAS).get()
+            antes = dict(despues, **{campo: despues[campo] - 1})
+            estadisticas_usuario.registrar_cambio(
+                estadisticas_usuario.contribucion(antes), estadisticas_usuario.contribucion(despues)
+            )
+
+        autor_id = despues['usuario_reportador_id']
+        if autor_id:
+            transaction.on_commit(lambda: cache_dashboard.invalidar(cache_dashboard.AMBITO_REPORTES, autor_id))
+        return {
+            'votos_positivos': despues['votos_positivos'],
+            'votos_negativos': despues['votos_negativos'],
+        }
+
+    def filtrar(self, estado=None, fecha=None, ubicacion=None, tipo_incidente=None, nivel_peligro=None, reportes=None):
+        """
+        Filtros como lookups del ORM sobre un QuerySet (por defecto, todos los
+        reportes): nada se evalúa hasta que quien llama itera o pagina.
+        Los valores vacíos o con formato inválido se ignoran.
+        """
+        reportes = self.obtener_todos() if reportes is None else reportes
+        if estado:
+            reportes = self.por_estado(reportes, estado)
+        if fecha:
+            reportes = self.por_fecha(reportes, fecha)
+        if ubicacion:
+            reportes = self.por_ubicacion(reportes, ubicacion)
+        if tipo_incidente:
+            reportes = self.por_tipo_incidente(reportes, tipo_incidente)
+        if nivel_peligro:
+            reportes = self.por_nivel_peligro(reportes, nivel_peligro)
+        return reportes.select_related('usuario_reportador')
+
+    @staticmethod
+    def por_estado(reportes, estado):
+        return reportes.filter(estado_reporte__iexact=estado)
+
+    @staticmethod
+    def por_fecha(reportes, fecha):
+        """fecha: date o 'YYYY-MM-DD'; se compara el día en la zona horaria local"""
+        if isinstance(fecha, str):
+            try:
+                fecha = parse_date(fecha)
+            except ValueError:
+                fecha = None
+        return reportes.filter(fecha_creacion__date=fecha) if fecha else reportes
+
+    @staticmethod
+    def por_ubicacion(reportes, texto):
+        return reportes.filter(Q(nombre_via__icontains=texto) | Q(distrito__icontains=texto))
+
+    @staticmethod
+    def por_tipo_incidente(reportes, tipo_incidente):
+        return reportes.filter(tipo_incidente__iexact=tipo_incidente)
+
+    @staticmethod
+    def por_nivel_peligro(reportes, nivel_peligro):
+        try:
+            return reportes.filter(nivel_peligro=int(nivel_peligro))
+        except (TypeError, ValueError):
+            return reportes
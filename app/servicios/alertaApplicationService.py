@@ -1,12 +1,24 @@
+from django.db import transaction
+
 from app.dominio.alerta.alerta import Alerta
 
 class AlertaApplicationService:
     def __init__(self, alerta_repo):
         self.alerta_repo = alerta_repo
 
-    def crear_alerta(self, titulo, mensaje, enviado_por, destinatarios, ubicacion=None):
-        alerta = Alerta(titulo, mensaje, enviado_por, destinatarios, ubicacion)
-        self.alerta_repo.guardar(alerta)
+    def crear_alerta(self, titulo, mensaje, enviado_por, destinatarios, ubicacion=None, enviar_a_todos=False):
+        """
+        Guarda la alerta y su historial de envío en una sola transacción; retorna la
+        alerta. Las dirigidas a todos se encolan para el trabajador de difusión.
+        """
+        alerta = Alerta(titulo, mensaje, enviado_por, [] if enviar_a_todos else destinatarios, ubicacion, enviar_a_todos)
+        with transaction.atomic():
+            alerta_db = self.alerta_repo.guardar(alerta)
+            if enviar_a_todos:
+                self.alerta_repo.encolar_difusion(alerta_db)
+            else:
+                self.alerta_repo.registrar_historial(alerta_db, destinatarios, ubicacion or "General")
+        return alerta_db
 
     def alertas_de_usuario(self, usuario_id):
         return self.alerta_repo.obtener_por_usuario(usuario_id)
@@ -1,16 +1,107 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from app.dominio.mapa_calor.zonaPeligrosa import ZonaPeligrosa
+from app.mapa.densidad import agrupar_por_densidad, resumir_zonas
+from app.reporte.models import ReporteColaborativo
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+from app.repositorio.mapa_calor.mapaCalorRepositoryImpl import MapaCalorRepositoryImpl
+
+# Reportes por zona que se consultan para elegir su nombre (vía y distrito más frecuentes)
+MUESTRA_NOMBRE_ZONA = 50
+
 
 class MapaCalorApplicationService:
-    def __init__(self):
+    def __init__(self, mapa_repository=None):
         self.reporte_repository = None
         self.servicio_calculo = None
+        self.mapa_repository = mapa_repository or MapaCalorRepositoryImpl()
 
     def generar_mapa_calor(self, coordenadas, radio):
         pass
 
-    def identificar_zonas_peligrosas(self, ):
-        pass
+    def identificar_zonas_peligrosas(self, forzar=False):
+        """
+        Agrupa por densidad los reportes activos del snapshot en memoria y guarda las
+        zonas resultantes. Si los datos no cambiaron desde el último cálculo (y este no
+        es más antiguo que ZONAS_MAX_EDAD_MINUTOS, por la tendencia) no hace nada.
+
+        Returns:
+            dict | None: conteo de zonas creadas/actualizadas/eliminadas, o None si se omitió.
+        """
+        snapshot_incidentes.sincronizar(forzar=True)
+        version = snapshot_incidentes.clave_version
+        version_guardada, fecha_calculo = self.mapa_repository.estado_calculo()
+        max_edad = timedelta(minutes=getattr(settings, 'ZONAS_MAX_EDAD_MINUTOS', 60))
+        if not forzar and version_guardada == version and timezone.now() - fecha_calculo < max_edad:
+            return None
+
+        ids, latitudes, longitudes, niveles, creados = snapshot_incidentes.puntos_con_fecha()
+        etiquetas, claves = agrupar_por_densidad(
+            latitudes, longitudes,
+            tamano_celda_km=getattr(settings, 'ZONAS_TAMANO_CELDA_KM', 0.2),
+            min_reportes=getattr(settings, 'ZONAS_MIN_REPORTES', 3),
+        )
+        resumen = resumir_zonas(
+            etiquetas, latitudes, longitudes, niveles, creados,
+            ahora=timezone.now().timestamp(),
+            ventana_segundos=getattr(settings, 'ZONAS_VENTANA_TENDENCIA_HORAS', 24) * 3600,
+        )
+
+        zonas = []
+        for k, clave in enumerate(claves):
+            zona = ZonaPeligrosa()
+            zona.clave = clave
+            zona.ubicacion_centro = (round(float(resumen['lat_centro'][k]), 7), round(float(resumen['lng_centro'][k]), 7))
+            zona.radio_cobertura = round(float(resumen['radio_km'][k]), 3)
+            zona.cantidad_reportes = int(resumen['cantidad'][k])
+            zona.intensidad = float(resumen['intensidad'][k])
+            zona.reportes_asociados = ids[resumen['miembros'][k]].tolist()
+            zona.reportes_periodo_actual = int(resumen['periodo_actual'][k])
+            zona.reportes_periodo_anterior = int(resumen['periodo_anterior'][k])
+            zona.actualizar_nivel_peligro()
+            zona.recalcular_tendencia()
+            zonas.append(zona)
+
+        self._asignar_nombres(zonas)
+        return self.mapa_repository.guardar_zonas(zonas, version)
+
+    def _asignar_nombres(self, zonas):
+        """Conserva el nombre de las zonas ya conocidas; las nuevas toman la vía y distrito más frecuentes"""
+        nombres = self.mapa_repository.nombres_por_clave()
+        nuevas = []
+        for zona in zonas:
+            if nombres.get(zona.clave):
+                zona.nombre_zona = nombres[zona.clave]
+            else:
+                nuevas.append(zona)
+        if not nuevas:
+            return
+
+        muestra = [reporte_id for zona in nuevas for reporte_id in zona.reportes_asociados[:MUESTRA_NOMBRE_ZONA]]
+        ubicaciones = {
+            reporte_id: ", ".join(parte for parte in (via, distrito) if parte)
+            for reporte_id, via, distrito in ReporteColaborativo.objects.filter(id__in=muestra)
+            .order_by().values_list('id', 'nombre_via', 'distrito')
+        }
+        for zona in nuevas:
+            frecuentes = Counter(
+                ubicaciones[reporte_id] for reporte_id in zona.reportes_asociados[:MUESTRA_NOMBRE_ZONA]
+                if ubicaciones.get(reporte_id)
+            ).most_common(1)
+            zona.nombre_zona = frecuentes[0][0] if frecuentes else f"Zona {zona.clave}"
+
+    def listar_zonas_peligrosas(self, nivel_minimo=None, limite=None):
+        """Zonas precalculadas, de mayor a menor peligro"""
+        return self.mapa_repository.listar_zonas(nivel_minimo=nivel_minimo, limite=limite)
+
+    def obtener_zona(self, zona_id):
+        return self.mapa_repository.obtener_zona(zona_id)
 
     def calcular_nivel_peligro_zona(self, zona_coordenadas):
         pass
@@ -19,4 +110,5 @@ class MapaCalorApplicationService:
         pass
 
     def generar_alertas_zona_caliente(self, ):
-        pass
+        """Zonas precalculadas que ameritan alerta (nivel alto o muchos reportes)"""
+        return [zona for zona in self.mapa_repository.listar_zonas() if zona.es_zona_caliente()]
@@ -1,13 +1,115 @@
 import folium
+from branca.element import MacroElement
 from folium.plugins import HeatMap
+from jinja2 import Template
+from django.conf import settings
+from django.templatetags.static import static
+from django.urls import reverse
 from app.reporte.models import ReporteColaborativo
+from app.reporte.snapshot_incidentes import snapshot_incidentes
 import os
+import tempfile
+import threading
+
+
+class CapaPuntosAgrupados(MacroElement):
+    """Marcadores agrupados en el servidor que se piden a /api/mapa/puntos/ según la vista"""
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            cargarPuntosMapa({{ this._parent.get_name() }}, {{ this.url|tojson }});
+        {% endmacro %}
+    """)
+
+    def __init__(self, url):
+        super().__init__()
+        self._name = 'CapaPuntosAgrupados'
+        self.url = url
+
 
 class MapaCalorService:
+    """
+    Genera el mapa de calor como artefacto HTML cacheado por versión de datos
+    (última fecha_actualizacion + total de reportes activos). Solo se vuelve a
+    renderizar cuando los reportes cambian; se sirve desde memoria o disco.
+    """
+
+    _cache_memoria = {}
+    _lock = threading.Lock()
+
+    def obtener_html(self):
+        """Retorna el HTML del mapa para la versión actual de los datos"""
+        clave = self._clave_version()
+
+        html = self._cache_memoria.get(clave)
+        if html is not None:
+            return html
+
+        with self._lock:
+            html = self._cache_memoria.get(clave)
+            if html is None:
+                html = self._leer_disco(clave)
+            if html is None:
+                html = self.generar_mapa().get_root().render()
+                self._escribir_disco(clave, html)
+            # Solo se conserva la versión vigente
+            MapaCalorService._cache_memoria = {clave: html}
+        return html
+
+    def _usa_teselas(self):
+        return getattr(settings, 'MAPA_CALOR_TESELAS', False)
+
+    def _clave_version(self):
+        # Con teselas el HTML no depende de los datos: las teselas se cargan según la vista
+        if self._usa_teselas():
+            return 'teselas'
+        return snapshot_incidentes.clave_version
+
+    def _directorio_cache(self):
+        return getattr(
+            settings, 'MAPA_CALOR_CACHE_DIR',
+            os.path.join(settings.BASE_DIR, 'cache', 'mapa_calor')
+        )
+
+    def _ruta_artefacto(self, clave):
+        return os.path.join(self._directorio_cache(), f"mapa_calor_{clave}.html")
+
+    def _leer_disco(self, clave):
+        try:
+            with open(self._ruta_artefacto(clave), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _escribir_disco(self, clave, html):
+        """Escritura atómica: archivo temporal + os.replace, sin carreras entre procesos"""
+        directorio = self._directorio_cache()
+        try:
+            os.makedirs(directorio, exist_ok=True)
+            fd, ruta_temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(ruta_temporal, self._ruta_artefacto(clave))
+        except OSError:
+            # El disco es solo una segunda capa de cache: se sigue sirviendo desde memoria
+            return
+
+        # Eliminar artefactos de versiones anteriores
+        for nombre in os.listdir(directorio):
+            if nombre.startswith("mapa_calor_") and nombre != os.path.basename(self._ruta_artefacto(clave)):
+                try:
+                    os.remove(os.path.join(directorio, nombre))
+                except OSError:
+                    pass
+
     def generar_mapa(self):
+        """Construye el mapa folium con los reportes activos"""
         # Centro de Arequipa como punto inicial
         m = folium.Map(location=[-16.4090474, -71.537451], zoom_start=13)
 
+        if self._usa_teselas():
+            return self._agregar_capa_teselas(m)
+
         # Lista para el heatmap
         heat_data = []
 
@@ -19,20 +121,20 @@ class MapaCalorService:
             4: 'darkred'
         }
 
-        # Obtener los reportes
-        reportes = ReporteColaborativo.objects.filter(is_active=True)
-
-        for r in reportes:
-            if r.latitud and r.longitud:
-                lat = float(r.latitud)
-                lon = float(r.longitud)
-                peso = r.nivel_peligro  # 1 a 4
+        # Puntos activos desde el snapshot en memoria; solo se consultan los títulos para los popups
+        ids, latitudes, longitudes, niveles = snapshot_incidentes.puntos()
+        titulos = dict(
+            ReporteColaborativo.objects.filter(id__in=ids.tolist()).values_list('id', 'titulo')
+        )
+        etiquetas_nivel = dict(ReporteColaborativo._meta.get_field('nivel_peligro').choices)
 
-                # Agregar al heatmap con peso
+        for reporte_id, lat, lon, peso in zip(ids.tolist(), latitudes.tolist(), longitudes.tolist(), niveles.tolist()):
+            if lat and lon:
+                # Agregar al heatmap con peso (nivel 1 a 4)
                 heat_data.append([lat, lon, peso])
 
                 # Agregar marcador con color según nivel
-                color = colores.get(r.nivel_peligro, 'blue')
+                color = colores.get(peso, 'blue')
                 folium.CircleMarker(
                     location=[lat, lon],
                     radius=6 + peso,  # más grande si el nivel es más alto
@@ -40,15 +142,31 @@ class MapaCalorService:
                     fill=True,
                     fill_opacity=0.8,
                     fill_color=color,
-                    popup=f"{r.titulo} - {r.get_nivel_peligro_display()}"
+                    popup=f"{titulos.get(reporte_id, '')} - {etiquetas_nivel.get(peso, peso)}"
                 ).add_to(m)
 
         # Agregar capa heatmap
         if heat_data:
             HeatMap(heat_data, radius=20, blur=15, max_zoom=1).add_to(m)
 
-        # Guardar el HTML
-        ruta_html = os.path.join("app", "usuario", "templates", "mapa_generado.html")
-        m.save(ruta_html)
+        return m
+
+    def _agregar_capa_teselas(self, m):
+        """Capa de teselas z/x/y precalculadas: el navegador solo pide las que están a la vista"""
+        from app.mapa.teselas import zoom_maximo, zoom_minimo
+
+        url = reverse('tesela_calor', kwargs={'z': 0, 'x': 0, 'y': 0}).replace('/0/0/0.png', '/{z}/{x}/{y}.png')
+        folium.TileLayer(
+            tiles=url,
+            attr='Traffic Pulse',
+            name='Mapa de calor',
+            overlay=True,
+            control=False,
+            min_zoom=zoom_minimo(),
+            max_native_zoom=zoom_maximo(),
+        ).add_to(m)
 
-        return ruta_html
+        # Los marcadores ya no se incrustan: se piden agrupados solo para la zona visible
+        m.get_root().header.add_child(folium.JavascriptLink(static('js/puntos_mapa.js')))
+        CapaPuntosAgrupados(reverse('api_mapa_puntos')).add_to(m)
+        return m
@@ -1,9 +1,13 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.contrib.auth.models import User
-from app.reporte.models import ReporteColaborativo
-from app.usuario.models import PerfilUsuario
+from app.reporte.snapshot_incidentes import snapshot_incidentes
+from app.usuario.buffer_ubicaciones import buffer_ubicaciones
+from app.usuario.models import MuestraUbicacion, PerfilUsuario
+from datetime import timedelta
 from decimal import Decimal
 import logging
 
@@ -38,58 +42,103 @@ class NotificationApplicationService:
             logger.error(f"Error actualizando ubicación: {str(e)}")
             return {'status': 'error', 'message': str(e)}
     
+    def registrar_muestras_ubicacion(self, usuario_id, muestras):
+        """
+        muestras: lista de (latitud, longitud, fecha) de un mismo usuario.
+        La más reciente pasa al buffer de ubicaciones (perfil); si
+        UBICACIONES_GUARDAR_RECORRIDO está activo, todas se agregan a
+        MuestraUbicacion con un bulk_create. Retorna la más reciente.
+        """
+        ultima = max(muestras, key=lambda muestra: muestra[2])
+        if buffer_ubicaciones.registrar(usuario_id, *ultima):
+            buffer_ubicaciones.vaciar()
+
+        if getattr(settings, 'UBICACIONES_GUARDAR_RECORRIDO', True):
+            MuestraUbicacion.objects.bulk_create(
+                [
+                    MuestraUbicacion(usuario_id=usuario_id, latitud=latitud, longitud=longitud, fecha=fecha)
+                    for latitud, longitud, fecha in muestras
+                ],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+        return ultima
+
     def verificar_zonas_congestionadas_cercanas(self, user, latitud, longitud):
         """Verifica si hay zonas congestionadas cerca del usuario"""
         try:
             perfil = user.perfil
-            radio = float(perfil.radio_notificacion)
-            
-            # Obtener reportes activos cercanos
-            reportes_cercanos = ReporteColaborativo.get_incidents_near(
-                latitude=latitud,
-                longitude=longitud,
-                radius_km=radio
+            return self.notificaciones_cercanas(
+                latitud, longitud, float(perfil.radio_notificacion), perfil.tipos_incidentes_notificar
             )
-            
-            # Filtrar por tipos de incidentes que el usuario quiere recibir
-            tipos_notificar = perfil.tipos_incidentes_notificar
-            if tipos_notificar:
-                reportes_cercanos = [
-                    r for r in reportes_cercanos 
-                    if r.tipo_incidente in tipos_notificar
-                ]
-            
-            # Filtrar solo reportes recientes (últimas 2 horas)
-            reportes_recientes = [
-                r for r in reportes_cercanos 
-                if r.is_recent(hours=2)
-            ]
-            
-            # Generar notificaciones
-            notificaciones = []
-            for reporte in reportes_recientes[:3]:  # Máximo 3 notificaciones
-                distancia = reporte.get_distance_from(latitud, longitud)
-                notificacion = {
-                    'id': reporte.id,
-                    'tipo': reporte.tipo_incidente,
-                    'titulo': reporte.titulo,
-                    'mensaje': self._generar_mensaje_notificacion(reporte, distancia),
-                    'distancia': distancia,
-                    'ubicacion': f"{reporte.nombre_via}, {reporte.distrito}",
-                    'nivel_peligro': reporte.nivel_peligro,
-                    'timestamp': timezone.now().isoformat()
-                }
-                notificaciones.append(notificacion)
-            
-            return {
-                'status': 'success',
-                'notifications': notificaciones,
-                'total_reportes_cercanos': len(reportes_cercanos)
-            }
-            
         except Exception as e:
             logger.error(f"Error verificando zonas congestionadas: {str(e)}")
             return {'status': 'error', 'message': str(e)}
+
+    def notificaciones_cercanas(self, latitud, longitud, radio, tipos_notificar):
+        """
+        Notificaciones de incidentes cercanos a partir del snapshot en memoria;
+        solo se consultan a la BD los (a lo sumo 3) reportes a notificar.
+        """
+        ids_cercanos, _ = snapshot_incidentes.cercanos(
+            latitud, longitud, radio, tipos=tipos_notificar
+        )
+
+        # Filtrar solo reportes recientes (últimas 2 horas); máximo 3 notificaciones
+        ids_recientes, distancias = snapshot_incidentes.cercanos(
+            latitud, longitud, radio, tipos=tipos_notificar,
+            desde=timezone.now() - timedelta(hours=2)
+        )
+        distancia_por_id = dict(zip(ids_recientes[:3].tolist(), distancias[:3].tolist()))
+        reportes_recientes = [
+            (reporte, distancia_por_id[reporte.id])
+            for reporte in snapshot_incidentes.hidratar(ids_recientes[:3])
+        ]
+
+        # Generar notificaciones
+        notificaciones = []
+        for reporte, distancia in reportes_recientes[:3]:  # Máximo 3 notificaciones
+            notificacion = {
+                'id': reporte.id,
+                'tipo': reporte.tipo_incidente,
+                'titulo': reporte.titulo,
+                'mensaje': self._generar_mensaje_notificacion(reporte, distancia),
+                'distancia': distancia,
+                'ubicacion': f"{reporte.nombre_via}, {reporte.distrito}",
+                'nivel_peligro': reporte.nivel_peligro,
+                'timestamp': timezone.now().isoformat()
+            }
+            notificaciones.append(notificacion)
+
+        return {
+            'status': 'success',
+            'notifications': notificaciones,
+            'total_reportes_cercanos': len(ids_cercanos)
+        }
+
+    def configuracion_proximidad(self, usuario_id):
+        """
+        Lo que necesita la verificación de cercanía en cada ping (notificaciones
+        activas, radio y tipos), cacheado para no leer el perfil cada vez. Sin
+        perfil se usan los valores con los que se creará.
+        """
+        clave = f'ubicacion:proximidad:{usuario_id}'
+        configuracion = cache.get(clave)
+        if configuracion is None:
+            configuracion = PerfilUsuario.objects.filter(usuario_id=usuario_id).values(
+                'notificaciones_activas', 'radio_notificacion', 'tipos_incidentes_notificar'
+            ).first()
+            if configuracion is None:
+                return {
+                    'notificaciones_activas': True,
+                    'radio_notificacion': 2.0,
+                    'tipos_incidentes_notificar': list(PerfilUsuario.TIPOS_NOTIFICAR_POR_DEFECTO),
+                }
+            cache.set(clave, configuracion, getattr(settings, 'UBICACIONES_CONFIGURACION_TTL', 300))
+        return configuracion
+
+    def _invalidar_configuracion_proximidad(self, usuario_id):
+        cache.delete(f'ubicacion:proximidad:{usuario_id}')
     
     def _generar_mensaje_notificacion(self, reporte, distancia):
         """Genera el mensaje de notificación personalizado"""
@@ -154,6 +203,7 @@ class NotificationApplicationService:
                 perfil.tipos_incidentes_notificar = config['tipos_incidentes_notificar']
             
             perfil.save()
+            self._invalidar_configuracion_proximidad(usuario_id)
             
             return {'status': 'success', 'message': 'Configuración actualizada'}
             
@@ -165,6 +215,11 @@ class NotificationApplicationService:
         try:
             user = User.objects.get(id=usuario_id)
             perfil = user.perfil
+
+            # La última ubicación recibida puede estar aún en el buffer
+            pendiente = buffer_ubicaciones.ultima(usuario_id)
+            if pendiente:
+                perfil.latitud_actual, perfil.longitud_actual, perfil.ultima_actualizacion_ubicacion = pendiente
             
             if not perfil.latitud_actual or not perfil.longitud_actual:
                 return {
@@ -176,20 +231,20 @@ class NotificationApplicationService:
                     }
                 }
             
-            # Obtener reportes cercanos actuales
-            reportes_cercanos = ReporteColaborativo.get_incidents_near(
-                latitude=float(perfil.latitud_actual),
-                longitude=float(perfil.longitud_actual),
-                radius_km=float(perfil.radio_notificacion)
+            # Contar reportes cercanos recientes (últimas 2 horas) desde el snapshot en memoria
+            ids_recientes, _ = snapshot_incidentes.cercanos(
+                float(perfil.latitud_actual),
+                float(perfil.longitud_actual),
+                float(perfil.radio_notificacion),
+                desde=timezone.now() - timedelta(hours=2)
             )
-            
-            reportes_recientes = [r for r in reportes_cercanos if r.is_recent(hours=2)]
+            reportes_recientes = len(ids_recientes)
             
             return {
                 'status': 'success',
                 'stats': {
-                    'reportes_cercanos': len(reportes_recientes),
-                    'zona_activa': len(reportes_recientes) > 0,
+                    'reportes_cercanos': reportes_recientes,
+                    'zona_activa': reportes_recientes > 0,
                     'ultima_actualizacion': perfil.ultima_actualizacion_ubicacion.isoformat() if perfil.ultima_actualizacion_ubicacion else None,
                     'radio_configurado': float(perfil.radio_notificacion)
                 }
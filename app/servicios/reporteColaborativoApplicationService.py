@@ -27,8 +27,14 @@ class ReporteColaborativoApplicationService:
         pass
 
     def votar_validacion_reporte(self, reporte_id, usuario_id, voto):
-        # Metodo pendiente de implementación (Voto de validación)
-        pass
+        """
+        voto: True (positivo) o False (negativo). Retorna los contadores y la
+        credibilidad resultantes; lanza VotoError si el voto no procede.
+        """
+        contadores = self.reporte_repository.registrar_voto(reporte_id, usuario_id, bool(voto))
+        total = contadores['votos_positivos'] + contadores['votos_negativos']
+        contadores['credibilidad'] = round(contadores['votos_positivos'] * 100 / total) if total else 0
+        return contadores
 
     def generar_estadisticas_reportes(self, fecha_inicio, fecha_fin):
         # Metodo pendiente de implementación (Estadísticas por fecha)
@@ -40,6 +46,9 @@ class ReporteColaborativoApplicationService:
 
     def listar_repotes(self):
         return self.reporte_repository.obtener_todos()
+
+    def filtrar_reportes(self, filtros):
+        return self.reporte_repository.filtrar(**filtros)
     
     def obtener_reporte_por_id(self,id):
         return self.reporte_repository.buscar_por_id(id)
@@ -0,0 +1,154 @@
+import atexit
+import logging
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Perfiles por UPDATE (cada uno agrega parámetros al CASE)
+LOTE_ACTUALIZACION = 500
+
+
+class BufferUbicaciones:
+    """
+    Guarda en memoria (por proceso) la última ubicación recibida de cada usuario
+    y la escribe en lote: un UPDATE ... SET latitud_actual = CASE usuario_id ...
+    por cada LOTE_ACTUALIZACION perfiles, en lugar de un get_or_create + save()
+    por ping. Los pings que llegan entre dos vaciados se combinan: solo cuenta el
+    último de cada usuario.
+
+    Como ContadorVistas, se vacía al terminar una petición con el intervalo
+    vencido (request_finished), al superar el máximo de usuarios pendientes y al
+    salir el proceso. No hay temporizador en el event loop: bajo WSGI cada vista
+    async corre en un loop de vida corta que descartaría la tarea pendiente, y
+    request_finished se emite igual con ASGI o WSGI.
+    """
+
+    def __init__(self, intervalo=None, maximo_pendientes=None):
+        self._intervalo = intervalo
+        self._maximo_pendientes = maximo_pendientes
+        self._lock = threading.Lock()
+        self._pendientes = {}
+        self._ultimo_vaciado = time.monotonic()
+
+    @property
+    def intervalo(self):
+        if self._intervalo is not None:
+            return self._intervalo
+        return getattr(settings, 'UBICACIONES_VACIADO_SEGUNDOS', 5)
+
+    @property
+    def maximo_pendientes(self):
+        if self._maximo_pendientes is not None:
+            return self._maximo_pendientes
+        return getattr(settings, 'UBICACIONES_MAXIMO_PENDIENTES', 5000)
+
+    def registrar(self, usuario_id, latitud, longitud, fecha=None):
+        """
+        Reemplaza la ubicación pendiente del usuario, salvo que la pendiente sea
+        más reciente que `fecha` (por defecto, ahora). True si el buffer quedó lleno.
+        """
+        fecha = fecha or timezone.now()
+        with self._lock:
+            pendiente = self._pendientes.get(usuario_id)
+            if pendiente is None or pendiente[2] <= fecha:
+                self._pendientes[usuario_id] = (latitud, longitud, fecha)
+            return len(self._pendientes) >= self.maximo_pendientes
+
+    def ultima(self, usuario_id):
+        """(latitud, longitud, fecha) aún no escrita del usuario, o None"""
+        with self._lock:
+            return self._pendientes.get(usuario_id)
+
+    def vaciar(self):
+        """Escribe las ubicaciones pendientes; devuelve cuántos perfiles se actualizaron"""
+        with self._lock:
+            pendientes, self._pendientes = self._pendientes, {}
+            self._ultimo_vaciado = time.monotonic()
+        if not pendientes:
+            return 0
+
+        try:
+            usuarios = sorted(pendientes)
+            for inicio in range(0, len(usuarios), LOTE_ACTUALIZACION):
+                self._escribir({u: pendientes[u] for u in usuarios[inicio:inicio + LOTE_ACTUALIZACION]})
+        except Exception:
+            # Se reintentan en el próximo vaciado, salvo que ya haya un ping más nuevo
+            with self._lock:
+                for usuario_id, ubicacion in pendientes.items():
+                    self._pendientes.setdefault(usuario_id, ubicacion)
+            raise
+        return len(pendientes)
+
+    def _escribir(self, lote):
+        from .models import PerfilUsuario
+
+        campos = {
+            campo: PerfilUsuario._meta.get_field(campo)
+            for campo in ('latitud_actual', 'longitud_actual', 'ultima_actualizacion_ubicacion')
+        }
+
+        def caso(campo, posicion):
+            # Una ubicación guardada más nueva (muestras que llegan tarde) se conserva
+            return Case(
+                *[
+                    When(
+                        Q(usuario_id=usuario_id)
+                        & (Q(ultima_actualizacion_ubicacion__isnull=True)
+                           | Q(ultima_actualizacion_ubicacion__lte=ubicacion[2])),
+                        then=Value(_valor(ubicacion[posicion])),
+                    )
+                    for usuario_id, ubicacion in lote.items()
+                ],
+                default=F(campo),
+                output_field=campos[campo],
+            )
+
+        actualizados = PerfilUsuario.objects.filter(usuario_id__in=lote).update(
+            latitud_actual=caso('latitud_actual', 0),
+            longitud_actual=caso('longitud_actual', 1),
+            ultima_actualizacion_ubicacion=caso('ultima_actualizacion_ubicacion', 2),
+            fecha_actualizacion=timezone.now(),
+        )
+        if actualizados == len(lote):
+            return
+
+        # Usuarios sin perfil todavía: se crea con la ubicación (como get_or_create_for_user)
+        con_perfil = set(PerfilUsuario.objects.filter(usuario_id__in=lote).values_list('usuario_id', flat=True))
+        faltantes = User.objects.filter(id__in=set(lote) - con_perfil).values_list('id', flat=True)
+        PerfilUsuario.objects.bulk_create(
+            [
+                PerfilUsuario(
+                    usuario_id=usuario_id,
+                    latitud_actual=_valor(lote[usuario_id][0]),
+                    longitud_actual=_valor(lote[usuario_id][1]),
+                    ultima_actualizacion_ubicacion=lote[usuario_id][2],
+                    tipos_incidentes_notificar=list(PerfilUsuario.TIPOS_NOTIFICAR_POR_DEFECTO),
+                )
+                for usuario_id in faltantes
+            ],
+            ignore_conflicts=True,
+        )
+
+    def vaciar_si_corresponde(self, **kwargs):
+        if self._pendientes and time.monotonic() - self._ultimo_vaciado >= self.intervalo:
+            try:
+                self.vaciar()
+            except Exception as e:
+                logger.error(f"Error escribiendo ubicaciones de usuarios: {str(e)}")
+
+
+def _valor(valor):
+    return Decimal(str(valor)) if isinstance(valor, float) else valor
+
+
+buffer_ubicaciones = BufferUbicaciones()
+request_finished.connect(buffer_ubicaciones.vaciar_si_corresponde, dispatch_uid='buffer_ubicaciones')
+atexit.register(buffer_ubicaciones.vaciar)
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuario', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MuestraUbicacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitud', models.FloatField(verbose_name='Latitud')),
+                ('longitud', models.FloatField(verbose_name='Longitud')),
+                ('fecha', models.DateTimeField(verbose_name='Fecha de la muestra')),
+                ('usuario', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='muestras_ubicacion', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Muestra de ubicación',
+                'verbose_name_plural': 'Muestras de ubicación',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'fecha'), name='muestra_usuario_fecha_uniq')],
+            },
+        ),
+    ]
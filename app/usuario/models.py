@@ -6,6 +6,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 
 class PerfilUsuario(models.Model):
     """Modelo para el perfil extendido del usuario"""
+
+    TIPOS_NOTIFICAR_POR_DEFECTO = ('embotellamiento', 'accidente', 'construccion', 'cierre_via')
     
     usuario = models.OneToOneField(
         User,
@@ -133,12 +135,7 @@ class PerfilUsuario(models.Model):
                 'notificaciones_activas': True,
                 'radio_notificacion': 2.0,
                 'frecuencia_actualizacion': 30,
-                'tipos_incidentes_notificar': [
-                    'embotellamiento', 
-                    'accidente', 
-                    'construccion',
-                    'cierre_via'
-                ]
+                'tipos_incidentes_notificar': list(cls.TIPOS_NOTIFICAR_POR_DEFECTO)
             }
         )
         return perfil
@@ -156,11 +153,34 @@ class PerfilUsuario(models.Model):
         """Personalización del guardado"""
         # Asegurar que hay tipos de incidentes por defecto
         if not self.tipos_incidentes_notificar:
-            self.tipos_incidentes_notificar = [
-                'embotellamiento', 
-                'accidente', 
-                'construccion',
-                'cierre_via'
-            ]
+            self.tipos_incidentes_notificar = list(self.TIPOS_NOTIFICAR_POR_DEFECTO)
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class MuestraUbicacion(models.Model):
+    """
+    Recorrido del usuario: una fila por muestra de ubicación recibida en lote
+    (/api/ubicacion/lote/). Solo coordenadas y hora, sin índices extra: se
+    consulta por usuario y rango de fechas.
+    """
+
+    usuario = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='muestras_ubicacion',
+        db_index=False,  # cubierto por la restricción (usuario, fecha)
+    )
+    latitud = models.FloatField(verbose_name='Latitud')
+    longitud = models.FloatField(verbose_name='Longitud')
+    fecha = models.DateTimeField(verbose_name='Fecha de la muestra')
+
+    class Meta:
+        verbose_name = 'Muestra de ubicación'
+        verbose_name_plural = 'Muestras de ubicación'
+        constraints = [
+            # Un reenvío del mismo lote (cliente sin confirmación) no duplica muestras
+            models.UniqueConstraint(fields=['usuario', 'fecha'], name='muestra_usuario_fecha_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario_id} @ {self.fecha:%Y-%m-%d %H:%M:%S}: {self.latitud}, {self.longitud}"
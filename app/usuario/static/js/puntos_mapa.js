@@ -0,0 +1,75 @@
+// app/usuario/static/js/puntos_mapa.js
+// Carga en el mapa solo los puntos visibles, agrupados en el servidor (/api/mapa/puntos/)
+
+const COLORES_NIVEL = {1: 'green', 2: 'orange', 3: 'red', 4: 'darkred'};
+const NOMBRES_NIVEL = {1: 'Bajo', 2: 'Medio', 3: 'Alto', 4: 'Crítico'};
+
+// Leaflet interpreta los strings de bindPopup como HTML: los datos del servidor
+// (títulos escritos por usuarios) van como texto de un nodo
+function nodoTexto(texto) {
+    const nodo = document.createElement('span');
+    nodo.textContent = texto;
+    return nodo;
+}
+
+function cargarPuntosMapa(map, url) {
+    const capa = L.layerGroup().addTo(map);
+    let cubierto = null;
+    let pendiente = null;
+
+    function dibujar(datos) {
+        capa.clearLayers();
+        datos.grupos.forEach((grupo) => {
+            const color = COLORES_NIVEL[grupo.nivel_maximo] || 'blue';
+            const marcador = L.circleMarker([grupo.lat, grupo.lng], {
+                radius: grupo.cantidad === 1 ? 6 + grupo.nivel_maximo : 10 + Math.min(Math.log2(grupo.cantidad) * 3, 20),
+                color: color,
+                fill: true,
+                fillColor: color,
+                fillOpacity: 0.7,
+            });
+            if (grupo.cantidad === 1) {
+                marcador.bindPopup(nodoTexto(`${grupo.titulo || 'Reporte'} - ${NOMBRES_NIVEL[grupo.nivel_maximo] || grupo.nivel_maximo}`));
+            } else {
+                marcador.bindTooltip(nodoTexto(String(grupo.cantidad)), {permanent: true, direction: 'center', className: 'grupo-reportes'});
+                marcador.bindPopup(nodoTexto(`${grupo.cantidad} reportes - nivel promedio ${grupo.nivel_peligro}`));
+                marcador.on('dblclick', () => map.setView([grupo.lat, grupo.lng], map.getZoom() + 2));
+            }
+            capa.addLayer(marcador);
+        });
+    }
+
+    async function actualizar() {
+        const zoom = Math.floor(map.getZoom());
+        // La respuesta anterior cubre un bbox ajustado a teselas: si la vista sigue dentro, no se vuelve a pedir
+        if (cubierto && cubierto.zoom === zoom && cubierto.bounds.contains(map.getBounds())) {
+            return;
+        }
+
+        if (pendiente) {
+            pendiente.abort();
+        }
+        pendiente = new AbortController();
+
+        try {
+            const params = new URLSearchParams({bbox: map.getBounds().toBBoxString(), zoom: zoom});
+            const response = await fetch(`${url}?${params}`, {signal: pendiente.signal});
+            const datos = await response.json();
+            if (datos.status !== 'success') {
+                console.error('❌ Error cargando puntos del mapa:', datos.message);
+                return;
+            }
+            const [lngMin, latMin, lngMax, latMax] = datos.bbox;
+            cubierto = {zoom: datos.zoom, bounds: L.latLngBounds([latMin, lngMin], [latMax, lngMax])};
+            dibujar(datos);
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('❌ Error cargando puntos del mapa:', error);
+            }
+        }
+    }
+
+    map.on('moveend', actualizar);
+    actualizar();
+    return capa;
+}
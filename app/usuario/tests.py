@@ -1,13 +1,27 @@
 # app/usuario/tests.py - AGREGAR estos tests
 
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
 from decimal import Decimal
+from unittest import mock
+import base64
 import json
-from .models import PerfilUsuario
-from app.reporte.models import ReporteColaborativo
+import tempfile
+from .buffer_ubicaciones import BufferUbicaciones, buffer_ubicaciones
+from .models import MuestraUbicacion, PerfilUsuario
+from app.admin_custom.models import Alerta as AlertaAdmin
+from app.reporte import estadisticas_usuario
+from app.reporte.models import ConfiguracionUsuario, EstadisticasUsuario, ReporteColaborativo
+from app.servicios.mapa_calor_service import MapaCalorService
 from app.servicios.notificationApplicationService import NotificationApplicationService
+from web.services.paginacion_cursor import PaginadorCursor
+from web.services.reportes_usuario_service import EstadisticasUsuarioService
 
 class NotificationSystemTests(TestCase):
     def setUp(self):
@@ -165,11 +179,383 @@ class PerfilUsuarioModelTests(TestCase):
         self.assertFalse(perfil.tiene_ubicacion_reciente())
         
         # Con ubicación actual
-        from django.utils import timezone
         perfil.ultima_actualizacion_ubicacion = timezone.now()
         perfil.save()
         
         self.assertTrue(perfil.tiene_ubicacion_reciente())
 
+class MapaCalorCacheTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        MapaCalorService._cache_memoria = {}
+        self.user = User.objects.create_user(username='mapa', password='testpass123')
+
+    def _crear_reporte(self):
+        return ReporteColaborativo.objects.create(
+            titulo='Accidente para el mapa',
+            descripcion='Accidente en av. principal',
+            tipo_incidente='accidente',
+            latitud=Decimal('-16.4090'),
+            longitud=Decimal('-71.5375'),
+            usuario_reportador=self.user,
+            nombre_via='Av. Ejército',
+            distrito='Yanahuara',
+        )
+
+    def test_mapa_se_regenera_solo_si_cambian_los_reportes(self):
+        self._crear_reporte()
+        with override_settings(MAPA_CALOR_CACHE_DIR=self.directorio, MAPA_CALOR_TESELAS=False):
+            servicio = MapaCalorService()
+            with mock.patch.object(MapaCalorService, 'generar_mapa', wraps=servicio.generar_mapa) as generar:
+                primero = servicio.obtener_html()
+                self.assertEqual(servicio.obtener_html(), primero)
+                self.assertEqual(generar.call_count, 1)
+
+                self._crear_reporte()
+                servicio.obtener_html()
+                self.assertEqual(generar.call_count, 2)
+
+    def test_vista_mapa_calor(self):
+        self._crear_reporte()
+        with override_settings(MAPA_CALOR_CACHE_DIR=self.directorio, MAPA_CALOR_TESELAS=False):
+            response = self.client.get(reverse('mapa_calor'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Accidente para el mapa')
+
+    def test_vista_mapa_calor_con_teselas(self):
+        self._crear_reporte()
+        with override_settings(MAPA_CALOR_CACHE_DIR=self.directorio, MAPA_CALOR_TESELAS=True):
+            response = self.client.get(reverse('mapa_calor'))
+
+        self.assertContains(response, '/mapa/teselas/{z}/{x}/{y}.png')
+        self.assertContains(response, 'cargarPuntosMapa')
+        self.assertNotContains(response, 'Accidente para el mapa')
+
 # Ejecutar tests con:
-# python manage.py test app.usuario.tests
\ No newline at end of file
+# python manage.py test app.usuario.tests
+
+
+class PaginacionCursorTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='paginador', password='testpass123')
+        ConfiguracionUsuario.objects.create(usuario=self.user, reportes_por_pagina=5)
+        for i in range(12):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte {i}',
+                descripcion='Reporte para paginar',
+                tipo_incidente='bache',
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                nombre_via='Av. Ejército',
+                distrito='Yanahuara',
+                usuario_reportador=self.user,
+            )
+        # Fechas repetidas: el id desempata
+        ReporteColaborativo.objects.filter(id__lte=6).update(fecha_creacion=timezone.now())
+        self.orden = list(
+            ReporteColaborativo.objects.order_by('-fecha_creacion', '-id').values_list('id', flat=True)
+        )
+
+    def test_recorrido_completo_en_ambas_direcciones(self):
+        paginador = PaginadorCursor(ReporteColaborativo.objects.all(), 'fecha_creacion', 5)
+        paginas = [paginador.obtener_pagina()]
+        while paginas[-1].has_next():
+            paginas.append(paginador.obtener_pagina(paginas[-1].siguiente))
+
+        self.assertEqual([len(p) for p in paginas], [5, 5, 2])
+        self.assertEqual([r.id for p in paginas for r in p], self.orden)
+        self.assertFalse(paginas[0].has_previous())
+
+        anterior = paginador.obtener_pagina(paginas[2].anterior)
+        self.assertEqual([r.id for r in anterior], [r.id for r in paginas[1]])
+        self.assertTrue(anterior.has_next())
+
+        # Una página profunda es una sola consulta, sin OFFSET ni COUNT
+        with CaptureQueriesContext(connection) as consultas:
+            paginador.obtener_pagina(paginas[1].siguiente)
+        self.assertEqual(len(consultas), 1)
+        self.assertNotIn('OFFSET', consultas[0]['sql'].upper())
+        self.assertNotIn('COUNT(', consultas[0]['sql'].upper())
+
+        # Un token manipulado vuelve a la primera página, también si decodifica bien con otros tipos
+        self.assertEqual(list(paginador.obtener_pagina('no-es-un-cursor')), list(paginas[0]))
+        for carga in (['a', None, 1], ['s', 5, 1], ['s', '2025-01-01T00:00:00', 'x'], ['s', 'ayer', 1]):
+            token = base64.urlsafe_b64encode(json.dumps(carga).encode()).decode()
+            self.assertEqual(list(paginador.obtener_pagina(token)), list(paginas[0]))
+
+    def test_vista_mis_reportes_usa_cursor(self):
+        self.client.force_login(self.user)
+        primera = self.client.get(reverse('mis_reportes'), {'tipo_incidente': 'bache'})
+        pagina = primera.context['reportes']
+        self.assertEqual([r.id for r in pagina], self.orden[:5])
+        self.assertEqual(pagina[0].credibilidad, 0)
+        self.assertContains(primera, f'?cursor={pagina.siguiente}&tipo_incidente=bache')
+
+        segunda = self.client.get(reverse('mis_reportes'), {'cursor': pagina.siguiente, 'tipo_incidente': 'bache'})
+        self.assertEqual([r.id for r in segunda.context['reportes']], self.orden[5:10])
+
+
+class EstadisticasUsuarioTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='estadistico', password='testpass123')
+        datos = [
+            ('bache', 'probado', 3, 1), ('bache', 'pendiente', 0, 0),
+            ('accidente', 'probado', 1, 1), ('inundacion', 'rechazado', 0, 2),
+        ]
+        for i, (tipo, estado, positivos, negativos) in enumerate(datos):
+            ReporteColaborativo.objects.create(
+                titulo=f'Reporte {i}',
+                descripcion='Reporte para estadísticas',
+                tipo_incidente=tipo,
+                estado_reporte=estado,
+                latitud=Decimal('-16.4090'),
+                longitud=Decimal('-71.5375'),
+                nombre_via='Av. Ejército',
+                distrito='Yanahuara',
+                usuario_reportador=self.user,
+                votos_positivos=positivos,
+                votos_negativos=negativos,
+            )
+        # QuerySet.update no dispara señales: la fila se reconstruye a mano
+        ReporteColaborativo.objects.filter(titulo='Reporte 3').update(
+            fecha_creacion=timezone.now() - timedelta(days=30)
+        )
+        estadisticas_usuario.recalcular(self.user.id)
+
+    def _fila(self):
+        fila = EstadisticasUsuario.objects.get(usuario=self.user)
+        return {
+            campo: getattr(fila, campo) for campo in (
+                'total_reportes', 'reportes_validados', 'reportes_pendientes', 'reportes_con_votos',
+                'reportes_por_tipo',
+            )
+        }, fila.promedio_credibilidad
+
+    def test_lectura_de_una_fila_y_un_conteo(self):
+        with self.assertNumQueries(2):
+            estadisticas = EstadisticasUsuarioService(self.user.id).obtener_estadisticas_completas()
+
+        self.assertEqual(estadisticas['total_reportes'], 4)
+        self.assertEqual(estadisticas['reportes_validados'], 2)
+        self.assertEqual(estadisticas['reportes_pendientes'], 1)
+        self.assertEqual(estadisticas['reportes_recientes'], 3)
+        self.assertEqual(estadisticas['tasa_validacion'], 50.0)
+        self.assertAlmostEqual(estadisticas['promedio_credibilidad'], (75 + 50 + 0) / 3)
+        self.assertFalse(estadisticas['es_usuario_activo'])
+        self.assertEqual(estadisticas['tipos_reportes_frecuentes'], [
+            {'tipo_incidente': 'bache', 'cantidad': 2},
+            {'tipo_incidente': 'accidente', 'cantidad': 1},
+            {'tipo_incidente': 'inundacion', 'cantidad': 1},
+        ])
+
+    def test_reportes_recientes_en_ventana_movil(self):
+        # Ventana de 7 × 24 horas desde la lectura, no días de calendario
+        ReporteColaborativo.objects.filter(titulo='Reporte 1').update(
+            fecha_creacion=timezone.now() - timedelta(days=7, minutes=1)
+        )
+        ReporteColaborativo.objects.filter(titulo='Reporte 2').update(
+            fecha_creacion=timezone.now() - timedelta(days=6, hours=23)
+        )
+        estadisticas = EstadisticasUsuarioService(self.user.id).obtener_estadisticas_completas()
+        self.assertEqual(estadisticas['reportes_recientes'], 2)
+
+    def test_senales_mantienen_la_fila_igual_que_recalcular(self):
+        reporte = ReporteColaborativo.objects.get(titulo='Reporte 1')
+        reporte.votos_positivos = 1
+        reporte.save()
+        estadisticas = EstadisticasUsuarioService(self.user.id).obtener_estadisticas_completas()
+        self.assertAlmostEqual(estadisticas['promedio_credibilidad'], (75 + 100 + 50 + 0) / 4)
+
+        reporte.estado_reporte = 'probado'
+        reporte.tipo_incidente = 'accidente'
+        reporte.save()
+        borrado_logico = ReporteColaborativo.objects.get(titulo='Reporte 0')
+        borrado_logico.is_active = False
+        borrado_logico.save()
+        ReporteColaborativo.objects.get(titulo='Reporte 3').delete()
+        # Con campos diferidos no se conoce la contribución previa: se recalcula
+        parcial = ReporteColaborativo.objects.only('id', 'titulo', 'usuario_reportador').get(titulo='Reporte 2')
+        parcial.titulo = 'Reporte 2 corregido'
+        parcial.save(update_fields=['titulo'])
+
+        incremental = self._fila()
+        estadisticas_usuario.recalcular(self.user.id)
+        self.assertEqual(incremental, self._fila())
+        self.assertEqual(incremental[0]['total_reportes'], 2)
+        self.assertEqual(incremental[0]['reportes_por_tipo'], {'accidente': 2})
+
+    def test_primer_cambio_sin_fila_incluye_reportes_previos(self):
+        # Reportes anteriores a la tabla de estadísticas: no hay fila todavía
+        EstadisticasUsuario.objects.filter(usuario=self.user).delete()
+        ReporteColaborativo.objects.create(
+            titulo='Reporte nuevo',
+            descripcion='Primer reporte tras el despliegue',
+            tipo_incidente='bache',
+            latitud=Decimal('-16.4090'),
+            longitud=Decimal('-71.5375'),
+            usuario_reportador=self.user,
+        )
+        estadisticas = EstadisticasUsuarioService(self.user.id).obtener_estadisticas_completas()
+        self.assertEqual(estadisticas['total_reportes'], 5)
+        self.assertEqual(estadisticas['reportes_pendientes'], 2)
+
+    def test_api_estadisticas(self):
+        self.client.force_login(self.user)
+        respuesta = self.client.get(reverse('api_estadisticas_usuario'))
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['total_reportes'], 4)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_estadisticas_usuario')).status_code, 403)
+
+
+class DashboardFragmentosTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='conductor', password='testpass123')
+        self.client.force_login(self.user)
+
+    def _crear_reporte(self, titulo):
+        return ReporteColaborativo.objects.create(
+            titulo=titulo,
+            descripcion='Reporte para el dashboard',
+            tipo_incidente='bache',
+            latitud=Decimal('-16.4090'),
+            longitud=Decimal('-71.5375'),
+            usuario_reportador=self.user,
+        )
+
+    def test_bloques_se_sirven_de_cache_hasta_que_cambian_los_datos(self):
+        self._crear_reporte('Bache en Av. Ejército')
+        with CaptureQueriesContext(connection) as fria:
+            respuesta = self.client.get(reverse('dashboard'))
+        self.assertEqual(respuesta.context['user_stats']['total_reportes'], 1)
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as caliente:
+            self.client.get(reverse('dashboard'))
+        self.assertLess(len(caliente), len(fria))
+        self.assertFalse(any('reportecolaborativo' in q['sql'] for q in caliente.captured_queries))
+
+        # Un reporte nuevo del usuario sube su versión
+        self._crear_reporte('Bache en Calle Mercaderes')
+        respuesta = self.client.get(reverse('dashboard'))
+        self.assertEqual(respuesta.context['user_stats']['total_reportes'], 2)
+        self.assertEqual(len(respuesta.context['recent_reports']), 2)
+
+        # Una alerta dirigida al usuario sube la versión global de alertas
+        self.assertEqual(respuesta.context['alertas'], [])
+        alerta = AlertaAdmin.objects.create(titulo='Corte de vía', mensaje='Av. Ejército cerrada', enviado_por=self.user)
+        alerta.destinatarios.add(self.user)
+        respuesta = self.client.get(reverse('dashboard'))
+        self.assertEqual([a.titulo for a in respuesta.context['alertas']], ['Corte de vía'])
+
+
+@override_settings(UBICACIONES_VACIADO_SEGUNDOS=3600)
+class UbicacionesEnLoteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Nada queda pendiente para el vaciado de otra prueba
+        self.addCleanup(buffer_ubicaciones.vaciar)
+        self.user = User.objects.create_user(username='conductor', password='testpass123')
+        self.perfil = PerfilUsuario.get_or_create_for_user(self.user)
+        ReporteColaborativo.objects.create(
+            titulo='Accidente en Av. Ejército',
+            descripcion='Choque entre dos autos',
+            tipo_incidente='accidente',
+            latitud=Decimal('-16.4090'),
+            longitud=Decimal('-71.5375'),
+            usuario_reportador=self.user,
+        )
+
+    def test_pings_se_combinan_y_se_escriben_en_lote(self):
+        sin_perfil = User.objects.create_user(username='nuevo', password='testpass123')
+        PerfilUsuario.objects.filter(usuario=sin_perfil).delete()
+        buffer = BufferUbicaciones(intervalo=60, maximo_pendientes=100)
+        with self.assertNumQueries(0):
+            for latitud in (-16.40, -16.41, -16.42):
+                buffer.registrar(self.user.id, latitud, -71.53)
+            buffer.registrar(sin_perfil.id, -16.39, -71.54)
+
+        self.assertEqual(buffer.vaciar(), 2)
+        self.perfil.refresh_from_db()
+        self.assertEqual(self.perfil.get_ubicacion_actual(), (-16.42, -71.53))
+        self.assertIsNotNone(self.perfil.ultima_actualizacion_ubicacion)
+        nuevo = PerfilUsuario.objects.get(usuario=sin_perfil)
+        self.assertEqual(nuevo.get_ubicacion_actual(), (-16.39, -71.54))
+        self.assertEqual(nuevo.tipos_incidentes_notificar, list(PerfilUsuario.TIPOS_NOTIFICAR_POR_DEFECTO))
+
+        # Con todos los perfiles creados basta un UPDATE
+        buffer.registrar(self.user.id, -16.43, -71.53)
+        buffer.registrar(sin_perfil.id, -16.44, -71.54)
+        with self.assertNumQueries(1):
+            buffer.vaciar()
+
+    def test_api_responde_con_notificaciones_y_difiere_la_escritura(self):
+        self.client.force_login(self.user)
+        url = reverse('actualizar_ubicacion')
+        datos = json.dumps({'latitud': -16.4090, 'longitud': -71.5375})
+
+        respuesta = self.client.post(url, data=datos, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([n['tipo'] for n in respuesta.json()['notifications']], ['accidente'])
+        self.perfil.refresh_from_db()
+        self.assertIsNone(self.perfil.latitud_actual)
+        self.assertEqual(buffer_ubicaciones.ultima(self.user.id)[:2], (-16.4090, -71.5375))
+
+        buffer_ubicaciones.vaciar()
+        self.perfil.refresh_from_db()
+        self.assertEqual(self.perfil.get_ubicacion_actual(), (-16.4090, -71.5375))
+
+        # La configuración cacheada se invalida al cambiarla
+        NotificationApplicationService().actualizar_configuracion_notificaciones(
+            self.user.id, {'notificaciones_activas': False}
+        )
+        respuesta = self.client.post(url, data=datos, content_type='application/json')
+        self.assertEqual(respuesta.json()['notifications'], [])
+
+        self.assertEqual(self.client.post(url, data='{}', content_type='application/json').status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.post(url, data=datos, content_type='application/json').status_code, 401)
+
+    def test_lote_de_muestras(self):
+        self.client.force_login(self.user)
+        url = reverse('actualizar_ubicacion_lote')
+        ahora = timezone.now()
+        muestras = [
+            {'latitud': -16.40, 'longitud': -71.53, 'fecha': (ahora - timedelta(minutes=10)).isoformat()},
+            {'latitud': -16.4090, 'longitud': -71.5375, 'fecha': int(ahora.timestamp() * 1000)},
+            {'latitud': -16.41, 'longitud': -71.54, 'fecha': (ahora - timedelta(minutes=5)).isoformat()},
+        ]
+
+        respuesta = self.client.post(url, data=json.dumps({'muestras': muestras}), content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['muestras'], 3)
+        # Notificaciones para la muestra más reciente (junto al accidente), no para la última del lote
+        self.assertEqual([n['tipo'] for n in respuesta.json()['notifications']], ['accidente'])
+        self.assertEqual(MuestraUbicacion.objects.filter(usuario=self.user).count(), 3)
+
+        # Un reenvío no duplica el recorrido ni retrocede la ubicación
+        self.client.post(url, data=json.dumps({'muestras': muestras[:1]}), content_type='application/json')
+        self.assertEqual(MuestraUbicacion.objects.filter(usuario=self.user).count(), 3)
+        buffer_ubicaciones.vaciar()
+        self.perfil.refresh_from_db()
+        self.assertEqual(self.perfil.get_ubicacion_actual(), (-16.4090, -71.5375))
+
+        futura = [{'latitud': -16.4, 'longitud': -71.5, 'fecha': (ahora + timedelta(hours=1)).isoformat()}]
+        # fromtimestamp lanza OSError con epochs fuera de rango
+        fuera_de_rango = [{'latitud': -16.4, 'longitud': -71.5, 'fecha': -1e20}]
+        for cuerpo in ({'muestras': []}, {'muestras': futura}, {'muestras': [{'latitud': -16.4}]},
+                       {'muestras': fuera_de_rango}):
+            respuesta = self.client.post(url, data=json.dumps(cuerpo), content_type='application/json')
+            self.assertEqual(respuesta.status_code, 400)
+
+    def test_muestras_atrasadas_no_pisan_la_ubicacion_guardada(self):
+        buffer = BufferUbicaciones(intervalo=60, maximo_pendientes=100)
+        buffer.registrar(self.user.id, -16.40, -71.53)
+        buffer.vaciar()
+        buffer.registrar(self.user.id, -16.50, -71.60, fecha=timezone.now() - timedelta(hours=1))
+        buffer.vaciar()
+        self.perfil.refresh_from_db()
+        self.assertEqual(self.perfil.get_ubicacion_actual(), (-16.40, -71.53))
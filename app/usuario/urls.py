@@ -12,7 +12,11 @@ urlpatterns = [
     path("mis-reportes/", views.MisReportesView.as_view(), name="mis_reportes"),
     path('mis_reportes/', views.MisReportesView.as_view(), name='mis_reportes'),
     path('reporte/<int:reporte_id>/', views.DetalleReporteView.as_view(), name='detalle_reporte'),
+    path('reporte/<int:reporte_id>/votar/', views.api_votar_reporte, name='votar_reporte'),
     path('configuracion/', views.vista_configuracion_usuario, name='configuracion_usuario'),    
+    path('api/ubicacion/actualizar/', views.api_actualizar_ubicacion, name='actualizar_ubicacion'),
+    path('api/ubicacion/lote/', views.api_actualizar_ubicacion_lote, name='actualizar_ubicacion_lote'),
+    path('api/mis-estadisticas/', views.api_estadisticas_usuario, name='api_estadisticas_usuario'),
     path('reporte/<int:pk>/editar/', views.EditarReporteView.as_view(), name='editar_reporte'),
     path('reportes/validar/<int:reporte_id>/', views.DetalleReporteView.as_view(), name='validar_reporte'),
     path('reporte/<int:pk>/eliminar/', views.EliminarReporteView.as_view(), name='eliminar_reporte'),
@@ -20,6 +20,7 @@ from django.http import JsonResponse, HttpResponse
 from django.shortcuts import render, HttpResponse, redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.utils import timezone
+from django.utils.http import urlencode
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
@@ -29,19 +30,32 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from app.reporte.contador_vistas import contador_vistas
+from app.servicios.notificationApplicationService import NotificationApplicationService
+from app.usuario.buffer_ubicaciones import buffer_ubicaciones
 from app.reporte.forms import ReporteColaborativoForm
 from app.reporte.models import ReporteColaborativo
 from web.services.reportes_usuario_service import (
     ReportesUsuarioService, 
+    EstadisticasUsuarioService,
     UsuarioSinReportesError, 
     UsuarioReporteError,
     ConfiguracionUsuarioService
 )
+from web.services.cache_dashboard import AMBITO_ALERTAS, AMBITO_REPORTES, obtener_fragmento
 from .forms import RegistroUsuarioForm, LoginForm
 from app.presentation.controladores.reporteColaborativoController import ReporteColaborativoController
+from app.dominio.reporte.excepciones import ReporteNoEncontradoError, VotoDuplicadoError, VotoPropioError
+from app.presentation.controladores.mapaCalorController import MapaCalorController
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.utils.dateparse import parse_datetime
 from io import StringIO
 import json
 import csv
+import logging
+
+logger = logging.getLogger(__name__)
 
 # admin
 def is_superuser(user):
@@ -114,6 +128,14 @@ def logout_view(request):
     return redirect('login')
 
 
+ESTADISTICAS_DASHBOARD_VACIAS = {
+    'total_reportes': 0,
+    'validados': 0,
+    'pendientes': 0,
+    'credibilidad': 0
+}
+
+
 @method_decorator(never_cache, name='dispatch')
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'dashboard.html'
@@ -122,13 +144,11 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
-
-        # Obtener alertas
-        alerta_repository = AlertaRepositoryImpl()
-        alertas = alerta_repository.obtener_por_usuario(user.id)
-        context['alertas'] = alertas
         context['user'] = user
 
+        # Zonas peligrosas precalculadas (manage.py calcular_zonas_peligrosas)
+        context['zonas_peligrosas'] = MapaCalorController().obtener_zonas_peligrosas(nivel_minimo=3, limite=5)
+
         # Obtener configuración de usuario (puede ser None)
         config_service = ConfiguracionUsuarioService(user.id)
         config = config_service.obtener_configuracion()
@@ -139,43 +159,45 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context['mostrar_estadisticas'] = mostrar_estadisticas
         context['notificaciones_activas'] = notificaciones_activas
 
-        try:
-            service = ReportesUsuarioService(user.id)
-            recent_reports = service.obtener_reportes_recientes(limite=5)
-            context['recent_reports'] = recent_reports
+        # Bloques costosos desde la cache por usuario (ver web.services.cache_dashboard);
+        # la página sigue sin cachearse en navegadores ni proxies (never_cache)
+        context['alertas'] = []
+        if notificaciones_activas:
+            context['alertas'] = obtener_fragmento(
+                'alertas', user.id, [AMBITO_ALERTAS],
+                lambda: list(AlertaRepositoryImpl().obtener_por_usuario(user.id)),
+            )
 
+        try:
+            context['recent_reports'] = obtener_fragmento(
+                'reportes_recientes', user.id, [AMBITO_REPORTES],
+                lambda: ReportesUsuarioService(user.id).obtener_reportes_recientes(limite=5),
+            )
+            context['user_stats'] = ESTADISTICAS_DASHBOARD_VACIAS
             if mostrar_estadisticas:
-                resultado = service.obtener_reportes_usuario()
-                estadisticas = resultado.get('estadisticas', {})
-
-                context['user_stats'] = {
-                    'total_reportes': estadisticas.get('total_reportes', 0),
-                    'validados': estadisticas.get('reportes_validados', 0),
-                    'pendientes': estadisticas.get('reportes_pendientes', 0),
-                    'credibilidad': round(estadisticas.get('promedio_credibilidad', 0))
-                }
-            else:
-                context['user_stats'] = {
-                    'total_reportes': 0,
-                    'validados': 0,
-                    'pendientes': 0,
-                    'credibilidad': 0
-                }
+                context['user_stats'] = obtener_fragmento(
+                    'estadisticas', user.id, [AMBITO_REPORTES],
+                    lambda: self._estadisticas_dashboard(user.id),
+                )
 
         except (UsuarioSinReportesError, UsuarioReporteError) as e:
             context['recent_reports'] = []
-            context['user_stats'] = {
-                'total_reportes': 0,
-                'validados': 0,
-                'pendientes': 0,
-                'credibilidad': 0
-            }
+            context['user_stats'] = ESTADISTICAS_DASHBOARD_VACIAS
 
         # Simular usuarios online
         context['users_online'] = "1,247"  # Este valor puede ser dinámico en el futuro
         
         return context
 
+    def _estadisticas_dashboard(self, usuario_id):
+        estadisticas = EstadisticasUsuarioService(usuario_id).obtener_estadisticas_completas()
+        return {
+            'total_reportes': estadisticas.get('total_reportes', 0),
+            'validados': estadisticas.get('reportes_validados', 0),
+            'pendientes': estadisticas.get('reportes_pendientes', 0),
+            'credibilidad': round(estadisticas.get('promedio_credibilidad', 0))
+        }
+
 
 class MisReportesView(LoginRequiredMixin, TemplateView):
     template_name = 'mis_reportes.html'
@@ -196,13 +218,19 @@ class MisReportesView(LoginRequiredMixin, TemplateView):
             # Limpiar filtros vacíos
             filtros = {k: v for k, v in filtros.items() if v}
             
-            pagina = self.request.GET.get('page', 1)
-            resultado = service.obtener_reportes_usuario(filtros, pagina)
+            cursor = self.request.GET.get('cursor', '')
+            resultado = service.obtener_reportes_usuario(filtros, cursor=cursor)
             
             context.update({
                 'reportes': resultado['reportes'],
                 'estadisticas': resultado['estadisticas'],
                 'filtros_aplicados': resultado['filtros_aplicados'],
+                # Filtros que conservan los enlaces de paginación
+                'filtros_query': urlencode({
+                    parametro: self.request.GET[parametro]
+                    for parametro in ('estado', 'tipo_incidente', 'fecha_desde', 'nivel_peligro')
+                    if self.request.GET.get(parametro)
+                }),
             })
             
         except UsuarioSinReportesError:
@@ -225,18 +253,17 @@ class DetalleReporteView(LoginRequiredMixin, TemplateView):
         user = self.request.user
         
         try:
-            reporte = get_object_or_404(ReporteColaborativo, id=reporte_id)
+            reporte = get_object_or_404(ReporteColaborativo.objects.con_credibilidad(), id=reporte_id)
             
             # Verificar permisos de visualización
             if reporte.usuario_reportador != user and not user.is_superuser:
                 context['error'] = "No tienes permisos para ver este reporte"
             else:
-                # Incrementar contador de vistas
-                reporte.increment_views()
+                # La vista se acumula en memoria y se escribe en lote (ver contador_vistas)
+                reporte.views_count += contador_vistas.registrar(reporte.id)
                 
-                # Calcular credibilidad
-                total_votos = reporte.votos_positivos + reporte.votos_negativos
-                credibilidad = round((reporte.votos_positivos * 100) / total_votos) if total_votos > 0 else 0
+                # Credibilidad anotada por la consulta
+                credibilidad = reporte.credibilidad
                 
                 # Verificar si es reciente
                 es_reciente = reporte.is_recent(hours=24)
@@ -307,6 +334,138 @@ def vista_configuracion_usuario(request):
     return render(request, 'configuracion_usuario.html', context)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def api_votar_reporte(request, reporte_id):
+    """
+    POST /reporte/<id>/votar/  {"voto": "positivo" | "negativo"}
+    Registra el voto de validación del usuario autenticado (uno por reporte)
+    """
+    voto = request.data.get('voto')
+    if voto not in ('positivo', 'negativo', True, False):
+        return Response({'error': 'voto debe ser "positivo" o "negativo"'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        resultado = ReporteColaborativoController().votar_reporte(reporte_id, request.user.id, voto in ('positivo', True))
+    except ReporteNoEncontradoError as e:
+        return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+    except VotoPropioError as e:
+        return Response({'error': str(e)}, status=status.HTTP_403_FORBIDDEN)
+    except VotoDuplicadoError as e:
+        return Response({'error': str(e)}, status=status.HTTP_409_CONFLICT)
+    return Response(resultado, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def api_estadisticas_usuario(request):
+    """
+    GET /api/mis-estadisticas/
+    Estadísticas del usuario autenticado (una lectura de EstadisticasUsuario)
+    """
+    estadisticas = EstadisticasUsuarioService(request.user.id).obtener_estadisticas_completas()
+    return Response(estadisticas, status=status.HTTP_200_OK)
+
+
+@require_POST
+async def api_actualizar_ubicacion(request):
+    """
+    POST /api/ubicacion/actualizar/  {"latitud": ..., "longitud": ...}
+    Vista async (servida por config/asgi.py): la ubicación queda en el buffer
+    del proceso y se escribe en lote; la cercanía se calcula sobre el snapshot
+    de incidentes en el hilo de sincronía, sin bloquear el event loop.
+    """
+    usuario = await request.auser()
+    if not usuario.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Autenticación requerida'}, status=401)
+
+    try:
+        datos = json.loads(request.body)
+        latitud, longitud = float(datos['latitud']), float(datos['longitud'])
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'status': 'error', 'message': 'latitud y longitud son requeridas'}, status=400)
+    if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+        return JsonResponse({'status': 'error', 'message': 'Coordenadas fuera de rango'}, status=400)
+
+    if buffer_ubicaciones.registrar(usuario.id, latitud, longitud):
+        await sync_to_async(buffer_ubicaciones.vaciar)()
+
+    return JsonResponse(await _notificaciones_cercanas(usuario.id, latitud, longitud))
+
+
+@require_POST
+async def api_actualizar_ubicacion_lote(request):
+    """
+    POST /api/ubicacion/lote/
+    {"muestras": [{"latitud": ..., "longitud": ..., "fecha": "2025-06-01T10:00:00Z"}, ...]}
+    Muestras acumuladas por el cliente (por ejemplo, sin conexión). `fecha` es
+    ISO 8601 o milisegundos desde epoch (position.timestamp). Solo la más
+    reciente actualiza el perfil; las notificaciones se calculan una vez, para esa.
+    """
+    usuario = await request.auser()
+    if not usuario.is_authenticated:
+        return JsonResponse({'status': 'error', 'message': 'Autenticación requerida'}, status=401)
+
+    try:
+        muestras = json.loads(request.body)['muestras']
+        if not isinstance(muestras, list):
+            raise TypeError
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'status': 'error', 'message': 'Se requiere una lista "muestras"'}, status=400)
+
+    maximo = getattr(settings, 'UBICACIONES_MAXIMO_MUESTRAS', 500)
+    if not 0 < len(muestras) <= maximo:
+        return JsonResponse(
+            {'status': 'error', 'message': f'El lote debe tener entre 1 y {maximo} muestras'}, status=400
+        )
+
+    limite = timezone.now() + timedelta(minutes=1)  # tolerancia al reloj del cliente
+    validas = []
+    for indice, muestra in enumerate(muestras):
+        try:
+            latitud, longitud = float(muestra['latitud']), float(muestra['longitud'])
+            fecha = _fecha_muestra(muestra['fecha'])
+        except (ValueError, TypeError, KeyError, OverflowError, OSError):
+            fecha = None
+        if fecha is None or fecha > limite or not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+            return JsonResponse({'status': 'error', 'message': f'Muestra {indice} inválida'}, status=400)
+        validas.append((latitud, longitud, fecha))
+
+    servicio = NotificationApplicationService()
+    latitud, longitud, _ = await sync_to_async(servicio.registrar_muestras_ubicacion)(usuario.id, validas)
+
+    resultado = await _notificaciones_cercanas(usuario.id, latitud, longitud)
+    resultado['muestras'] = len(validas)
+    return JsonResponse(resultado)
+
+
+def _fecha_muestra(valor):
+    """datetime aware a partir de ISO 8601 (sin zona = hora local) o milisegundos epoch"""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return datetime.fromtimestamp(valor / 1000, tz=dt_timezone.utc)
+    fecha = parse_datetime(valor)
+    if fecha is not None and timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+async def _notificaciones_cercanas(usuario_id, latitud, longitud):
+    """Notificaciones para la posición, con la configuración cacheada del usuario"""
+    servicio = NotificationApplicationService()
+    configuracion = await sync_to_async(servicio.configuracion_proximidad)(usuario_id)
+    if not configuracion['notificaciones_activas']:
+        return {'status': 'success', 'notifications': []}
+
+    try:
+        return await sync_to_async(servicio.notificaciones_cercanas)(
+            latitud, longitud, float(configuracion['radio_notificacion']),
+            configuracion['tipos_incidentes_notificar'],
+        )
+    except Exception as e:
+        logger.error(f"Error verificando zonas congestionadas: {str(e)}")
+        return {'status': 'success', 'notifications': []}
+
+
 # Tus vistas existentes (mantenidas)
 def home(request):
     return render(request, 'home.html')
@@ -317,13 +476,10 @@ def register(request):
 def test(request):
     return render(request, 'test.html')
 
-# Vista funcional para generar el mapa de calor y mostrar la página
+# Vista funcional para mostrar el mapa de calor (cacheado por versión de datos)
 def vista_mapa_calor(request):
     servicio = MapaCalorService()
-    ruta_html = servicio.generar_mapa()
-
-    with open(ruta_html, "r", encoding="utf-8") as f:
-        mapa_html = f.read()
+    mapa_html = servicio.obtener_html()
 
     return render(request, "mapa_calor_page.html", {"mapa_html": mapa_html})
 
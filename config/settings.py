@@ -30,6 +30,7 @@ INSTALLED_APPS = [
     'app.usuario',
     'app.reporte',
     'app.admin_custom',
+    'app.mapa',
     # extensiones
     'django_extensions',
 ]
@@ -64,14 +65,42 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
 
 # Base de datos
+# Las transacciones toman el bloqueo de escritura al empezar (IMMEDIATE) y esperan
+# hasta `timeout` segundos por él: escrituras concurrentes (votos) se encolan en vez
+# de fallar con "database is locked". Las pruebas usan un archivo, no la BD en
+# memoria compartida, que no respeta la espera.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    }
+}
+
+# Cache: en memoria del proceso por defecto. Con DJANGO_CACHE_DIR se usa una cache en
+# archivos que comparten los procesos del mismo servidor, sin servicios externos
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'principal',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
+if os.getenv('DJANGO_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.getenv('DJANGO_CACHE_DIR'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
 
 # Login y sesión
 LOGIN_URL = '/loginadmin/'
@@ -137,6 +166,79 @@ LOGGING = {
     },
 }
 
+# Snapshot en memoria de incidentes activos: segundos entre sincronizaciones con la BD
+SNAPSHOT_INCIDENTES_TTL = 5
+
+# Artefactos cacheados del mapa de calor (uno por versión de datos)
+MAPA_CALOR_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'mapa_calor')
+
+# Mapa de calor por teselas z/x/y (False vuelve a un marcador por reporte)
+MAPA_CALOR_TESELAS = True
+MAPA_TESELAS_ZOOM_MIN = 10
+MAPA_TESELAS_ZOOM_MAX = 17
+
+# Segundos que se cachea cada respuesta de /api/mapa/puntos/ (la clave ya incluye la versión de datos)
+MAPA_PUNTOS_CACHE_TTL = 300
+
+# Vistas de reportes acumuladas en memoria: segundos entre escrituras y máximo pendiente por proceso
+VISTAS_VACIADO_SEGUNDOS = 10
+VISTAS_MAXIMO_PENDIENTES = 1000
+
+# Segundos que se cachean los bloques del dashboard (alertas, reportes recientes, estadísticas);
+# la clave lleva la versión de los datos, así que el TTL solo acota lo que depende de la hora
+DASHBOARD_FRAGMENTOS_TTL = 600
+
+# Ubicaciones de /api/ubicacion/actualizar/: segundos entre escrituras en lote, máximo de
+# usuarios pendientes por proceso y segundos que se cachea la configuración de cercanía
+UBICACIONES_VACIADO_SEGUNDOS = 5
+UBICACIONES_MAXIMO_PENDIENTES = 5000
+UBICACIONES_CONFIGURACION_TTL = 300
+
+# /api/ubicacion/lote/: muestras por petición y si se guardan todas en MuestraUbicacion (recorrido)
+UBICACIONES_MAXIMO_MUESTRAS = 500
+UBICACIONES_GUARDAR_RECORRIDO = True
+
+# Zonas peligrosas (manage.py calcular_zonas_peligrosas): celda de densidad, reportes mínimos
+# por celda núcleo, ventana para la tendencia y antigüedad máxima antes de recalcular
+ZONAS_TAMANO_CELDA_KM = 0.2
+ZONAS_MIN_REPORTES = 3
+ZONAS_VENTANA_TENDENCIA_HORAS = 24
+ZONAS_MAX_EDAD_MINUTOS = 60
+
+# Backends de geocodificación: 'default' completa vía/distrito de los reportes y
+# 'formulario' resuelve la ubicación escrita en el formulario de reporte.
+# Para trabajar sin red: 'app.reporte.geocodificadores.GeocodificadorSinConexion' o
+# 'app.reporte.geocodificadores.GeocodificadorLocal' (índice de vías local, ver abajo)
+GEOCODIFICADORES = {
+    'default': {
+        'BACKEND': 'app.reporte.geocodificadores.GeocodificadorNominatim',
+        'OPCIONES': {'timeout': 10},
+    },
+    'formulario': {
+        'BACKEND': 'app.reporte.geocodificadores.GeocodificadorORS',
+        'OPCIONES': {'timeout': 10, 'api_key': ORS_API_KEY},
+    },
+}
+
+# Índice binario de vías/distritos para GeocodificadorLocal (manage.py construir_indice_vias)
+GEOCODIFICACION_INDICE_VIAS = os.path.join(BASE_DIR, 'cache', 'indice_vias.bin')
+
+# Cola de geocodificación inversa (manage.py procesar_geocodificacion)
+GEOCODIFICACION_MAX_INTENTOS = 5
+GEOCODIFICACION_BACKOFF_BASE = 30
+GEOCODIFICACION_BACKOFF_MAX = 3600
+GEOCODIFICACION_BLOQUEO = 300
+
+# Cache persistente de geocodificación: decimales de cuantización (5 ≈ 1 m), vigencia,
+# máximo de entradas (desalojo LRU) y cada cuántas escrituras se revisa el máximo
+GEOCODIFICACION_CACHE_DECIMALES = 5
+GEOCODIFICACION_CACHE_TTL_DIAS = 30
+GEOCODIFICACION_CACHE_MAX_ENTRADAS = 50000
+GEOCODIFICACION_CACHE_REVISION = 100
+# Aciertos/fallos acumulados en memoria: segundos entre escrituras y máximo pendiente por proceso
+GEOCODIFICACION_CONTADORES_SEGUNDOS = 30
+GEOCODIFICACION_CONTADORES_MAXIMO_PENDIENTES = 500
+
 # CORS (para desarrollo con frontend externo)
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
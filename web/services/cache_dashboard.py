@@ -0,0 +1,52 @@
+# web/services/cache_dashboard.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Ámbitos de versión: 'reportes' es por usuario, 'alertas' es global (una alerta
+# puede llegar a todos los usuarios y enviarla no debe tocar miles de claves)
+AMBITO_REPORTES = 'reportes'
+AMBITO_ALERTAS = 'alertas'
+
+
+def _clave_version(ambito, usuario_id=None):
+    return f'dashboard:version:{ambito}' + (f':{usuario_id}' if usuario_id is not None else '')
+
+
+def version(ambito, usuario_id=None):
+    """Versión vigente del ámbito; los fragmentos guardados con otra versión ya no se leen"""
+    clave = _clave_version(ambito, usuario_id)
+    valor = cache.get(clave)
+    if valor is None:
+        # Se parte del reloj: si la versión fue desalojada no se reutiliza un número viejo
+        cache.add(clave, time.time_ns(), None)
+        valor = cache.get(clave)
+    return valor
+
+
+def invalidar(ambito, usuario_id=None):
+    """Sube la versión del ámbito; los fragmentos anteriores caducan solos por TTL"""
+    clave = _clave_version(ambito, usuario_id)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        cache.set(clave, time.time_ns(), None)
+
+
+def obtener_fragmento(nombre, usuario_id, ambitos, calcular):
+    """
+    Valor del bloque `nombre` del dashboard del usuario. La clave incluye la
+    versión de cada ámbito del que depende, así que un cambio de reportes o
+    alertas apunta a una clave nueva en lugar de borrar entradas.
+    """
+    versiones = ':'.join(
+        str(version(ambito, None if ambito == AMBITO_ALERTAS else usuario_id)) for ambito in ambitos
+    )
+    clave = f'dashboard:{nombre}:{usuario_id}:{versiones}'
+    valor = cache.get(clave)
+    if valor is None:
+        valor = calcular()
+        cache.set(clave, valor, getattr(settings, 'DASHBOARD_FRAGMENTOS_TTL', 600))
+    return valor
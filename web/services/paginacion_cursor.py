@@ -0,0 +1,111 @@
+# web/services/paginacion_cursor.py
+
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class CursorInvalidoError(Exception):
+    """Token de paginación mal formado o manipulado"""
+    pass
+
+
+class PaginaCursor:
+    """
+    Página obtenida por keyset. Expone la misma interfaz básica que un Page de
+    Django (iteración, len, has_next/has_previous) más los tokens opacos
+    'siguiente' y 'anterior' para armar los enlaces.
+    """
+
+    def __init__(self, object_list, siguiente=None, anterior=None):
+        self.object_list = object_list
+        self.siguiente = siguiente
+        self.anterior = anterior
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self.siguiente is not None
+
+    def has_previous(self):
+        return self.anterior is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class PaginadorCursor:
+    """
+    Paginación por keyset sobre (campo_orden, id) en orden descendente.
+
+    Cada página es una consulta con WHERE (campo, id) < (valor, id) y LIMIT
+    por_pagina + 1: no usa OFFSET ni COUNT(*), así una página profunda cuesta
+    lo mismo que la primera. El campo de orden debe ser una fecha (DateTimeField)
+    no nula.
+    """
+
+    def __init__(self, queryset, campo_orden, por_pagina):
+        self.queryset = queryset
+        self.campo_orden = campo_orden
+        self.por_pagina = max(int(por_pagina), 1)
+
+    def obtener_pagina(self, cursor=None):
+        """Página que indica el token; sin token o con uno inválido, la primera"""
+        try:
+            direccion, valor, ultimo_id = self.decodificar(cursor) if cursor else ('s', None, None)
+        except CursorInvalidoError:
+            direccion, valor, ultimo_id = 's', None, None
+
+        campo = self.campo_orden
+        if direccion == 's':
+            filas = self.queryset.order_by(f'-{campo}', '-id')
+            if valor is not None:
+                filas = filas.filter(Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'id__lt': ultimo_id}))
+        else:
+            filas = self.queryset.order_by(campo, 'id').filter(
+                Q(**{f'{campo}__gt': valor}) | Q(**{campo: valor, 'id__gt': ultimo_id})
+            )
+
+        filas = list(filas[:self.por_pagina + 1])
+        hay_mas = len(filas) > self.por_pagina
+        filas = filas[:self.por_pagina]
+        if direccion == 'a':
+            filas.reverse()
+        if not filas:
+            return PaginaCursor([])
+
+        # Hay página siguiente si se leyó una fila extra o si se venía retrocediendo
+        tiene_siguiente = hay_mas if direccion == 's' else True
+        tiene_anterior = valor is not None if direccion == 's' else hay_mas
+        return PaginaCursor(
+            filas,
+            siguiente=self.codificar('s', filas[-1]) if tiene_siguiente else None,
+            anterior=self.codificar('a', filas[0]) if tiene_anterior else None,
+        )
+
+    def codificar(self, direccion, objeto):
+        valor = getattr(objeto, self.campo_orden)
+        carga = [direccion, valor.isoformat(), objeto.id]
+        return base64.urlsafe_b64encode(json.dumps(carga, separators=(',', ':')).encode()).decode().rstrip('=')
+
+    def decodificar(self, cursor):
+        try:
+            texto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            direccion, valor, ultimo_id = json.loads(texto)
+            # Un token que decodifica bien pero trae otros tipos no debe llegar al filtro
+            if direccion not in ('s', 'a') or not isinstance(valor, str):
+                raise ValueError(direccion)
+            if not isinstance(ultimo_id, int) or isinstance(ultimo_id, bool):
+                raise ValueError(ultimo_id)
+            return direccion, datetime.fromisoformat(valor), ultimo_id
+        except (TypeError, ValueError, UnicodeDecodeError) as e:
+            raise CursorInvalidoError(f"Cursor inválido: {cursor!r}") from e
@@ -3,9 +3,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.paginator import Paginator
-from django.utils import timezone
-from datetime import timedelta
 from app.reporte.models import ReporteColaborativo, ConfiguracionUsuario, InteraccionUsuario
+from app.reporte import estadisticas_usuario
+from web.services.paginacion_cursor import PaginadorCursor
 
 
 
@@ -29,75 +29,45 @@ class ConfiguracionInvalidaError(UsuarioReporteError):
 class EstadisticasUsuarioService:    
     PERIODO_REPORTE_RECIENTE_DIAS = 7
     UMBRAL_USUARIO_ACTIVO = 5
+    TIPOS_FRECUENTES = 3
     
     def __init__(self, usuario_id: int):
         self.usuario_id = usuario_id
         self._estadisticas_cache = None
     
     def obtener_estadisticas_completas(self):
+        """
+        Estadísticas del usuario leídas de su fila en EstadisticasUsuario, que las
+        señales de reportes mantienen al día (ver app.reporte.estadisticas_usuario);
+        los reportes recientes (ventana móvil de PERIODO_REPORTE_RECIENTE_DIAS) se cuentan al leer.
+        """
         if self._estadisticas_cache is None:
-            self._estadisticas_cache = self._calcular_estadisticas()
+            self._estadisticas_cache = self._armar_estadisticas(estadisticas_usuario.obtener(self.usuario_id))
         return self._estadisticas_cache
     
-    def _calcular_estadisticas(self):
-        reportes = self._obtener_reportes_usuario()
-        fecha_corte_reciente = timezone.now() - timedelta(days=self.PERIODO_REPORTE_RECIENTE_DIAS)
+    def _armar_estadisticas(self, fila):
+        total = fila.total_reportes
+        reportes_recientes = estadisticas_usuario.reportes_recientes(
+            self.usuario_id, self.PERIODO_REPORTE_RECIENTE_DIAS
+        )
         
         return {
-            'total_reportes': self._contar_reportes_totales(reportes),
-            'reportes_validados': self._contar_reportes_validados(reportes),
-            'reportes_pendientes': self._contar_reportes_pendientes(reportes),
-            'reportes_recientes': self._contar_reportes_recientes(reportes, fecha_corte_reciente),
-            'tasa_validacion': self._calcular_tasa_validacion(reportes),
-            'promedio_credibilidad': self._calcular_promedio_credibilidad(reportes),
-            'es_usuario_activo': self._determinar_usuario_activo(reportes),
-            'tipos_reportes_frecuentes': self._obtener_tipos_frecuentes(reportes)
+            'total_reportes': total,
+            'reportes_validados': fila.reportes_validados,
+            'reportes_pendientes': fila.reportes_pendientes,
+            'reportes_recientes': reportes_recientes,
+            'tasa_validacion': (fila.reportes_validados / total * 100) if total > 0 else 0.0,
+            'promedio_credibilidad': fila.promedio_credibilidad,
+            'es_usuario_activo': reportes_recientes >= self.UMBRAL_USUARIO_ACTIVO,
+            'tipos_reportes_frecuentes': self._tipos_frecuentes(fila.reportes_por_tipo)
         }
     
-    def _obtener_reportes_usuario(self):
-        return ReporteColaborativo.objects.filter(
-            usuario_reportador_id=self.usuario_id,
-            is_active=True
-        )
-
-    
-    def _contar_reportes_totales(self, reportes):
-        return reportes.count()
-    
-    def _contar_reportes_validados(self, reportes):
-        return reportes.filter(estado_reporte='probado').count()
-    
-    def _contar_reportes_pendientes(self, reportes):
-        return reportes.filter(estado_reporte='pendiente').count()
-    
-    def _contar_reportes_recientes(self, reportes, fecha_corte):
-        return reportes.filter(fecha_creacion__gte=fecha_corte).count()
-    
-    def _calcular_tasa_validacion(self, reportes):
-        total = reportes.count()
-        validados = reportes.filter(estado_reporte='probado').count()
-        return (validados / total * 100) if total > 0 else 0.0
-    
-    def _calcular_promedio_credibilidad(self, reportes):
-        credibilidades = []
-        for reporte in reportes:
-            total_votos = reporte.votos_positivos + reporte.votos_negativos
-            if total_votos > 0:
-                credibilidad = (reporte.votos_positivos / total_votos) * 100
-                credibilidades.append(credibilidad)
-        
-        return sum(credibilidades) / len(credibilidades) if credibilidades else 0.0
-    
-    def _determinar_usuario_activo(self, reportes):
-        fecha_corte = timezone.now() - timedelta(days=self.PERIODO_REPORTE_RECIENTE_DIAS)
-        reportes_recientes = reportes.filter(fecha_creacion__gte=fecha_corte).count()
-        return reportes_recientes >= self.UMBRAL_USUARIO_ACTIVO
-    
-    def _obtener_tipos_frecuentes(self, reportes):
-        from django.db.models import Count
-        return list(reportes.values('tipo_incidente').annotate(
-            cantidad=Count('tipo_incidente')
-        ).order_by('-cantidad')[:3])
+    def _tipos_frecuentes(self, reportes_por_tipo):
+        conteos = [
+            {'tipo_incidente': tipo, 'cantidad': reportes_por_tipo[tipo]}
+            for tipo, _ in ReporteColaborativo.INCIDENT_TYPES if reportes_por_tipo.get(tipo)
+        ]
+        return sorted(conteos, key=lambda conteo: -conteo['cantidad'])[:self.TIPOS_FRECUENTES]
 
 
 class FiltroReportesService:    
@@ -194,14 +164,19 @@ class ReportesUsuarioService:
         self.pipeline.agregar_paso(self._cargar_reportes_usuario)
         self.pipeline.agregar_paso(self._aplicar_filtros_reportes)
         self.pipeline.agregar_paso(self._calcular_estadisticas_usuario)
-        self.pipeline.agregar_paso(self._agregar_credibilidad_reportes)
         self.pipeline.agregar_paso(self._aplicar_paginacion)
+        self.pipeline.agregar_paso(self._armar_resultado)
     
-    def obtener_reportes_usuario(self, filtros: dict = None, pagina: int = 1):
+    def obtener_reportes_usuario(self, filtros: dict = None, pagina: int = 1, cursor: str = None):
+        """
+        Con cursor (aunque sea '') pagina por keyset sobre (fecha_creacion, id) con
+        tokens opacos; sin cursor usa el Paginator numerado (OFFSET + COUNT).
+        """
         datos_iniciales = {
             'usuario_id': self.usuario_id,
             'filtros': filtros or {},
-            'pagina': pagina
+            'pagina': pagina,
+            'cursor': cursor
         }
         
         return self.pipeline.ejecutar(datos_iniciales)
@@ -246,7 +221,7 @@ class ReportesUsuarioService:
         reportes = ReporteColaborativo.objects.filter(
             usuario_reportador_id=datos['usuario_id'],
             is_active=True
-        ).select_related('usuario_reportador').order_by('-fecha_creacion')
+        ).select_related('usuario_reportador').con_credibilidad().order_by('-fecha_creacion')
 
         
         datos['reportes_base'] = reportes
@@ -265,43 +240,39 @@ class ReportesUsuarioService:
         datos['estadisticas'] = stats_service.obtener_estadisticas_completas()
         return datos
     
-    def _agregar_credibilidad_reportes(self, datos: dict):
-        reportes_con_credibilidad = []
-        
-        for reporte in datos['reportes_filtrados']:
-            total_votos = reporte.votos_positivos + reporte.votos_negativos
-            if total_votos > 0:
-                reporte.credibilidad_porcentaje = round((reporte.votos_positivos * 100) / total_votos)
-                reporte.credibilidad_width = reporte.credibilidad_porcentaje
-            else:
-                reporte.credibilidad_porcentaje = 0
-                reporte.credibilidad_width = 0
-            reporte.total_votos = total_votos
-            reportes_con_credibilidad.append(reporte)
-        
-        datos['reportes_procesados'] = reportes_con_credibilidad
-        return datos
-    
     def _aplicar_paginacion(self, datos: dict):
-        reportes = datos['reportes_procesados']
+        reportes = datos['reportes_filtrados']
         reportes_por_pagina = datos['configuracion'].reportes_por_pagina
-        pagina_actual = datos.get('pagina', 1)
-        
-        paginator = Paginator(reportes, reportes_por_pagina)
-        page_obj = paginator.get_page(pagina_actual)
-        
-        return {
-            'usuario': datos['usuario'],
-            'reportes': page_obj,
-            'estadisticas': datos['estadisticas'] if datos['configuracion'].mostrar_estadisticas else None,
-            'configuracion': datos['configuracion'],
-            'info_paginacion': {
+
+        if datos.get('cursor') is not None:
+            page_obj = PaginadorCursor(reportes, 'fecha_creacion', reportes_por_pagina).obtener_pagina(datos['cursor'])
+            datos['info_paginacion'] = {
+                'tiene_anterior': page_obj.has_previous(),
+                'tiene_siguiente': page_obj.has_next(),
+                'cursor_anterior': page_obj.anterior,
+                'cursor_siguiente': page_obj.siguiente,
+            }
+        else:
+            paginator = Paginator(reportes, reportes_por_pagina)
+            page_obj = paginator.get_page(datos.get('pagina', 1))
+            datos['info_paginacion'] = {
                 'pagina_actual': page_obj.number,
                 'total_paginas': paginator.num_pages,
                 'tiene_anterior': page_obj.has_previous(),
                 'tiene_siguiente': page_obj.has_next(),
                 'total_reportes': paginator.count
-            },
+            }
+
+        datos['pagina_reportes'] = page_obj
+        return datos
+    
+    def _armar_resultado(self, datos: dict):
+        return {
+            'usuario': datos['usuario'],
+            'reportes': datos['pagina_reportes'],
+            'estadisticas': datos['estadisticas'] if datos['configuracion'].mostrar_estadisticas else None,
+            'configuracion': datos['configuracion'],
+            'info_paginacion': datos['info_paginacion'],
             'filtros_aplicados': datos.get('filtros', {})
         }
 